@@ -1,73 +1,138 @@
+import argparse
+import csv
 import os
-from sklearn.metrics import roc_auc_score, roc_curve
-import matplotlib.pyplot as plt
+import time
 import numpy as np
-from Model import TextProcessor
-
-def main():
-    # Datos de ejemplo
-    # X contiene las similitudes calculadas por tu herramienta
-    # y contiene las etiquetas reales: 1 para plagio y 0 para no plagio
-    X = []
-    y = []
-
-    # Datos de ejemplo con etiquetas reales
-    document_pairs = [
-        ("FID-001.txt", "org-009.txt", 0),
-        ("FID-002.txt", "org-010.txt", 0),
-        ("FID-003.txt", "org-011.txt", 0),
-        ("FID-004.txt", "org-011.txt", 0),
-        ("FID-005.txt", "org-023.txt", 1),
-        ("FID-005.txt", "org-059.txt", 1),
-        ("FID-006.txt", "org-011.txt", 0),
-        ("FID-007.txt", "org-011.txt", 0),
-        ("FID-008.txt", "org-011.txt", 0),
-        ("FID-009.txt", "org-011.txt", 0),
-        ("FID-010.txt", "org-091.txt", 1),
-        ("FID-011.txt", "org-011.txt", 0),
-        ("FID-012.txt", "org-011.txt", 0),
-        ("FID-013.txt", "org-009.txt", 1),
-        ("FID-013.txt", "org-001.txt", 1),
-        ("FID-014.txt", "org-019.txt", 1),
-        ("FID-014.txt", "org-011.txt", 1),
-        ("FID-015.txt", "org-034.txt", 1),
-        ("FID-016.txt", "org-046.txt", 1),
-        ("FID-017.txt", "org-062.txt", 1),
-        ("FID-018.txt", "org-057.txt", 1),
-        ("FID-019.txt", "org-066.txt", 1),
-        ("FID-020.txt", "org-014.txt", 1),
-    ]
-
-    for file1, file2, label in document_pairs:
-        file1_path = os.path.join("documents", file1)
-        file2_path = os.path.join("documents", file2)
-        processor = TextProcessor(file1_path, file2_path)
-        similarity_score = processor.process()
-        if (similarity_score['Percentage of similarity'] >= 50.1):
-            print(similarity_score['Percentage of similarity'])
-            X.append(1)
-        else:
-            print("0")
-            X.append(0)
-        y.append(label)
-
-    # Calcula el AUC-ROC
-    auc = roc_auc_score(y, X)
-    print(f"AUC-ROC: {auc:.2f}")
-
-    # Genera la curva ROC
-    fpr, tpr, thresholds = roc_curve(y, X)
-
-    plt.figure()
-    plt.plot(fpr, tpr, color='darkorange', lw=2, label='ROC curve (area = %0.2f)' % auc)
-    plt.plot([0, 1], [0, 1], color='navy', lw=2, linestyle='--')
-    plt.xlim([0.0, 1.0])
-    plt.ylim([0.0, 1.05])
-    plt.xlabel('False Positive Rate')
-    plt.ylabel('True Positive Rate')
-    plt.title('Receiver Operating Characteristic')
-    plt.legend(loc="lower right")
-    plt.show()
+from Cache import ScoreCache, file_hash
+from Evaluation import evaluate, format_report, save_plots
+from Model import PLAGIARISM_THRESHOLD, TextProcessor, binary_cosine, normalizer_versions
+from Parallel import WorkerPool
+
+# Pares etiquetados (file1,file2,label), las rutas son relativas al archivo de pares
+PAIRS_PATH = "pairs.csv"
+
+# Archivo donde se guardan las similitudes de los pares entre ejecuciones
+SCORE_CACHE_PATH = "pair_scores.sqlite"
+
+# Umbral de NewModel (mainIA.py)
+NEW_MODEL_THRESHOLD = 0.988
+
+def lexical_config():
+    # Configuración del pipeline de TextProcessor: una similitud guardada solo sirve con el mismo lematizador
+    return f"TextProcessor|binary-cosine|{normalizer_versions()['lemma']}"
+
+def load_pairs(path):
+    """
+    Lee un CSV con las columnas file1, file2 y label (1 plagio, 0 no) y regresa la lista de
+    (ruta1, ruta2, etiqueta), las rutas relativas se toman desde la carpeta del CSV
+    """
+    folder = os.path.dirname(path)
+    with open(path, newline="", encoding="utf-8") as file:
+        return [
+            (os.path.join(folder, row["file1"]), os.path.join(folder, row["file2"]), int(row["label"]))
+            for row in csv.DictReader(file)
+        ]
+
+def pair_keys(pairs):
+    # La clave de cada par son los hashes de los dos archivos, cada archivo se lee una sola vez
+    hashes = {path: file_hash(path) for pair in pairs for path in pair[:2]}
+    keys = [(hashes[file1], hashes[file2]) for file1, file2, *_ in pairs]
+    paths = {key: pair[:2] for key, pair in zip(keys, pairs)}
+    return keys, paths
+
+def lexical_scores(pairs, cache, pool=None):
+    """
+    Regresa el porcentaje de similitud de TextProcessor (sin redondear) de cada par. Solo se
+    calculan los pares que no están en cache; sus archivos se limpian y lematizan en los procesos de pool
+    """
+    pool = pool if pool is not None else WorkerPool()
+    keys, paths = pair_keys(pairs)
+
+    def compute(missing):
+        files = list(dict.fromkeys(path for key in missing for path in paths[key]))
+        terms = {path: set(corpus) for path, corpus in zip(files, pool.document_terms(files))}
+        return [binary_cosine(terms[paths[key][0]], terms[paths[key][1]]) for key in missing]
+
+    return np.array(cache.scores(lexical_config(), keys, compute)) * 100
+
+def transformer_config(calculation, metric):
+    # Configuración del pipeline de NewModel: modelo, formato numérico, ventanas y métrica
+    return f"NewModel|{calculation.embedding_id}|{calculation.chunk_aggregation}|{metric}"
+
+def transformer_scores(calculation, pairs, cache, metrics=("cosine", "euclidean")):
+    """
+    Regresa un diccionario métrica -> similitud de NewModel de cada par (file1 como texto de
+    entrada y file2 como original). Los archivos de los pares que faltan se embeben en un solo lote
+    y ambas métricas salen de los mismos embeddings
+    """
+    keys, paths = pair_keys(pairs)
+    configs = {metric: transformer_config(calculation, metric) for metric in metrics}
+    saved = {metric: cache.get_many(config, keys) for metric, config in configs.items()}
+    missing = [key for key in dict.fromkeys(keys) if any(key not in saved[metric] for metric in metrics)]
+
+    if missing:
+        from VectorIndex import FlatIndex
+        files = list(dict.fromkeys(path for key in missing for path in paths[key]))
+        embeddings = calculation._document_embeddings([calculation._preprocess_text(calculation._read_file(path)) for path in files])
+        index = FlatIndex(files, np.concatenate([block.numpy() for block in embeddings]), [len(block) for block in embeddings])
+        position = {path: i for i, path in enumerate(files)}
+        rows = [position[paths[key][0]] for key in missing]
+        columns = [position[paths[key][1]] for key in missing]
+        for metric, config in configs.items():
+            scores = calculation._document_scores(index, embeddings, metric)[rows, columns]
+            computed = {key: float(score) for key, score in zip(missing, scores)}
+            cache.put_many(config, computed)
+            saved[metric].update(computed)
+
+    return {metric: np.array([saved[metric][key] for key in keys]) for metric in metrics}
+
+def calibrate(name, labels, scores, threshold, greater_is_positive=True, plot_dir=None):
+    # El barrido de umbrales sobre las similitudes guardadas, sin volver a procesar los archivos
+    start = time.perf_counter()
+    report = evaluate(labels, scores, threshold=threshold, greater_is_positive=greater_is_positive)
+    seconds = time.perf_counter() - start
+    print(f"\n{name} (calibración en {seconds * 1000:.2f} ms)")
+    print(format_report(report))
+    if plot_dir:
+        report["plots"] = save_plots(report, plot_dir, prefix=f"{name}_")
+    return report
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="AUC-ROC y calibración de umbrales sobre pares etiquetados")
+    parser.add_argument("--pairs", default=PAIRS_PATH, help="CSV con las columnas file1,file2,label")
+    parser.add_argument("--cache", default=SCORE_CACHE_PATH, help="archivo SQLite con las similitudes ya calculadas")
+    parser.add_argument("--models", nargs="+", choices=("textprocessor", "newmodel"), default=["textprocessor", "newmodel"])
+    parser.add_argument("--workers", type=int, default=1, help="procesos para limpiar y lematizar los archivos")
+    parser.add_argument("--threshold", type=float, default=PLAGIARISM_THRESHOLD, help="umbral de TextProcessor (%%)")
+    parser.add_argument("--newmodel-threshold", type=float, default=NEW_MODEL_THRESHOLD, help="umbral de NewModel")
+    parser.add_argument("--metric", choices=("cosine", "euclidean"), default="cosine", help="métrica de NewModel")
+    parser.add_argument("--originals", default="originals/")
+    parser.add_argument("--plots", default=None, help="carpeta donde se guardan las curvas")
+    args = parser.parse_args(arguments)
+
+    pairs = load_pairs(args.pairs)
+    labels = [label for _, _, label in pairs]
+    cache = ScoreCache(args.cache)
+    reports = {}
+    try:
+        if "textprocessor" in args.models:
+            start = time.perf_counter()
+            with WorkerPool(args.workers) as pool:
+                scores = lexical_scores(pairs, cache, pool)
+            print(f"TextProcessor: {len(pairs)} pares en {time.perf_counter() - start:.2f} s")
+            reports["textprocessor"] = calibrate("textprocessor", labels, scores, args.threshold, plot_dir=args.plots)
+
+        if "newmodel" in args.models:
+            from NewModel import similarityCalculation
+            calculation = similarityCalculation(args.originals, args.newmodel_threshold, metric=args.metric)
+            start = time.perf_counter()
+            scores = transformer_scores(calculation, pairs, cache)[args.metric]
+            print(f"NewModel: {len(pairs)} pares en {time.perf_counter() - start:.2f} s")
+            reports["newmodel"] = calibrate("newmodel", labels, scores, args.newmodel_threshold,
+                                            greater_is_positive=args.metric != "euclidean", plot_dir=args.plots)
+    finally:
+        cache.close()
+    return reports
 
 if __name__ == "__main__":
     main()
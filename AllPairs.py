@@ -0,0 +1,110 @@
+import heapq
+import numpy as np
+from Model import PLAGIARISM_THRESHOLD, TextProcessor, corpus_terms
+# Importation of the libraries needed for the code
+
+def score_tile(rows, columns, inverse_norms, start, threshold, column_tile=1024):
+    """
+    This function returns the (i, j, similarity) of the pairs of one tile above threshold,
+    rows are the documents of the tile and columns the documents from the first one of the tile.
+    The columns are multiplied by blocks of column_tile documents and every block is filtered by
+    the threshold before the next one, so at most rows x column_tile overlaps exist at once
+    """
+    found_rows, found_columns, found_similarities = [], [], []
+    for column_start in range(0, columns.shape[0], column_tile):
+        overlaps = (rows @ columns[column_start:column_start + column_tile].T).tocoo()
+        row, column = overlaps.row, overlaps.col + column_start
+        keep = column > row
+        row, column, counts = row[keep], column[keep], overlaps.data[keep]
+        similarities = counts * (inverse_norms[row] * inverse_norms[column])
+        keep = similarities > threshold
+        found_rows.append(row[keep])
+        found_columns.append(column[keep])
+        found_similarities.append(similarities[keep])
+    if not found_rows:
+        return []
+    row, column, similarities = (np.concatenate(found) for found in (found_rows, found_columns, found_similarities))
+    # The same order as itertools.combinations: by row and then by column
+    order = np.lexsort((column, row))
+    return [
+        (start + int(i), start + int(j), float(similarity))
+        for i, j, similarity in zip(row[order], column[order], similarities[order])
+    ]
+
+class AllPairsEngine:
+    """
+    This class compares all the documents between them with one sparse matrix product,
+    the documents are the rows of a binary document x term matrix and the product is
+    done by tiles of tile_size rows x tile_size columns so the memory used doesn't depend
+    on the number of documents
+    """
+    def __init__(self, documents, terms, tile_size=1024):
+        self.documents = list(documents)
+        self.tile_size = tile_size
+        self.matrix = self.create_document_term_matrix(terms)
+        # Each row is L2-normalized by multiplying its overlaps by 1/sqrt(|terms|)
+        sizes = np.asarray(self.matrix.sum(axis=1)).ravel()
+        self.inverse_norms = np.zeros(len(sizes))
+        self.inverse_norms[sizes > 0] = 1.0 / np.sqrt(sizes[sizes > 0])
+
+    @classmethod
+    def from_paths(cls, paths, tile_size=1024, processor=None, pool=None):
+        """
+        This function creates the engine with the preprocessed terms of the .txt in paths
+        """
+        terms = pool.document_terms(paths, processor) if pool is not None else corpus_terms(paths, processor)
+        return cls(paths, terms, tile_size)
+
+    def create_document_term_matrix(self, terms):
+        """
+        This function creates the binary CSR matrix with one row per document
+        and one column per term of the whole collection
+        """
+        # scipy is only imported when the matrix is built, a two file check doesn't need it
+        from scipy import sparse
+        vocabulary = {}
+        indptr = [0]
+        indices = []
+        for document_terms in terms:
+            columns = {vocabulary.setdefault(term, len(vocabulary)) for term in document_terms}
+            indices.extend(sorted(columns))
+            indptr.append(len(indices))
+        data = np.ones(len(indices), dtype=np.float64)
+        return sparse.csr_matrix((data, indices, indptr), shape=(len(indptr) - 1, len(vocabulary)))
+
+    def pairs(self, threshold=0.0, pool=None):
+        """
+        This function is a generator of (i, j, similarity) for every pair i < j of documents
+        whose similarity is above threshold, in the same order as itertools.combinations.
+        When a WorkerPool is given the tiles are scored in its processes
+        """
+        total = self.matrix.shape[0]
+        # Only the columns from start are needed because the pairs with j < i were done before
+        tiles = (
+            (self.matrix[start:start + self.tile_size], self.matrix[start:], self.inverse_norms[start:], start, threshold,
+             self.tile_size)
+            for start in range(0, total, self.tile_size)
+        )
+        scored_tiles = pool.map(score_tile, tiles) if pool is not None else (score_tile(*tile) for tile in tiles)
+        for scored_tile in scored_tiles:
+            yield from scored_tile
+
+    def top_k(self, k, threshold=0.0, pool=None):
+        """
+        This function returns the k most similar pairs, from the most to the least similar
+        """
+        return heapq.nlargest(k, self.pairs(threshold, pool), key=lambda pair: pair[2])
+
+    def result(self, i, j, similarity, threshold=PLAGIARISM_THRESHOLD):
+        """
+        This function returns the result of a pair in the same format as TextProcessor.results
+        """
+        processor = TextProcessor(self.documents[i], self.documents[j], threshold=threshold)
+        return processor.results([[1.0, similarity], [similarity, 1.0]])
+
+    def results(self, threshold=0.0):
+        """
+        This function is a generator of the results of every pair above threshold
+        """
+        for i, j, similarity in self.pairs(threshold):
+            yield self.result(i, j, similarity)
@@ -0,0 +1,238 @@
+import hashlib
+import os
+import sqlite3
+from collections import OrderedDict
+# Importation of the libraries needed for the code
+
+def file_hash(path):
+    """
+    This function returns the SHA-1 of the content of a file
+    """
+    with open(path, 'rb') as file:
+        return hashlib.sha1(file.read()).hexdigest()
+
+class WordCache:
+    """
+    This class memoizes the normal form (lemma or stem) of the words, the key is
+    the name of the normalizer and the word. The most recently used words are kept
+    in memory up to max_size, optionally every word is also saved in an SQLite file
+    so the next runs can reuse it. The saved words of a normalizer are deleted when
+    the version of the library behind it changes; versions can be a function, it is
+    only called when the disk store is opened
+    """
+    def __init__(self, max_size=100000, path=None, versions=None):
+        self.max_size = max_size
+        self.path = path
+        self.versions = versions
+        self.memory = OrderedDict()
+        self.connection = None
+        if path:
+            self.connection = self._open(path)
+
+    def _open(self, path):
+        # This function opens the disk store and removes the words of outdated normalizers
+        connection = sqlite3.connect(path)
+        connection.execute("CREATE TABLE IF NOT EXISTS versions (normalizer TEXT PRIMARY KEY, version TEXT)")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS forms (normalizer TEXT, word TEXT, form TEXT, PRIMARY KEY (normalizer, word))"
+        )
+        stored_versions = dict(connection.execute("SELECT normalizer, version FROM versions"))
+        versions = self.versions() if callable(self.versions) else (self.versions or {})
+        for normalizer, version in versions.items():
+            if stored_versions.get(normalizer) != version:
+                connection.execute("DELETE FROM forms WHERE normalizer = ?", (normalizer,))
+                connection.execute("INSERT OR REPLACE INTO versions VALUES (?, ?)", (normalizer, version))
+        connection.commit()
+        return connection
+
+    def __len__(self):
+        return len(self.memory)
+
+    def _remember(self, key, form):
+        # This function adds a word to the memory, removing the least recently used one when it is full
+        self.memory[key] = form
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_size:
+            self.memory.popitem(last=False)
+
+    def get(self, normalizer, word):
+        """
+        This function returns the saved normal form of the word or None if it isn't saved
+        """
+        key = (normalizer, word)
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            return self.memory[key]
+        if self.connection is not None:
+            row = self.connection.execute(
+                "SELECT form FROM forms WHERE normalizer = ? AND word = ?", key
+            ).fetchone()
+            if row is not None:
+                self._remember(key, row[0])
+                return row[0]
+        return None
+
+    def put(self, normalizer, word, form):
+        """
+        This function saves the normal form of one word
+        """
+        self.put_many(normalizer, {word: form})
+
+    def put_many(self, normalizer, forms):
+        """
+        This function saves the normal forms of a dictionary word -> form
+        """
+        for word, form in forms.items():
+            self._remember((normalizer, word), form)
+        if self.connection is not None and forms:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO forms VALUES (?, ?, ?)",
+                [(normalizer, word, form) for word, form in forms.items()]
+            )
+            self.connection.commit()
+
+    def normalize(self, normalizer, words, compute):
+        """
+        This function returns the normal forms of the words in the same order,
+        compute receives the list of different words that aren't saved yet and
+        must return their normal forms in the same order
+        """
+        forms = {}
+        missing = []
+        for word in dict.fromkeys(words):
+            form = self.get(normalizer, word)
+            if form is None:
+                missing.append(word)
+            else:
+                forms[word] = form
+
+        if missing:
+            computed = dict(zip(missing, compute(missing)))
+            self.put_many(normalizer, computed)
+            forms.update(computed)
+
+        return [forms[word] for word in words]
+
+    def clear(self):
+        """
+        This function removes every saved word, from memory and from disk
+        """
+        self.memory.clear()
+        if self.connection is not None:
+            self.connection.execute("DELETE FROM forms")
+            self.connection.commit()
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+class DocumentStore:
+    """
+    This class keeps the features (cleaned and lemmatized terms) of every document
+    already processed, the key is the path of the file and the hash of its content,
+    so a file is processed again only when it changes
+    """
+    def __init__(self):
+        self.documents = {}
+
+    def __len__(self):
+        return len(self.documents)
+
+    def __contains__(self, path):
+        saved = self.documents.get(os.path.abspath(path))
+        return saved is not None and saved[0] == file_hash(path)
+
+    def get(self, path, compute):
+        """
+        This function returns the features of the file, compute receives the path
+        and is only called when the file isn't saved or its content changed
+        """
+        key = os.path.abspath(path)
+        digest = file_hash(path)
+        saved = self.documents.get(key)
+        if saved is not None and saved[0] == digest:
+            return saved[1]
+        features = compute(path)
+        self.documents[key] = (digest, features)
+        return features
+
+    def put(self, path, features):
+        """
+        This function saves the features of a file that were computed somewhere else
+        """
+        self.documents[os.path.abspath(path)] = (file_hash(path), features)
+
+    def clear(self):
+        self.documents.clear()
+
+
+class ScoreCache:
+    """
+    This class keeps the raw similarity of pairs of documents, the key is the
+    configuration of the pipeline that scored them and the hashes of the two
+    files, so a pair is scored again only when one of the files or the pipeline
+    changes. Optionally the scores are also saved in an SQLite file
+    """
+    def __init__(self, path=None):
+        self.path = path
+        self.memory = {}
+        self.connection = None
+        if path:
+            self.connection = sqlite3.connect(path)
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS scores (config TEXT, hash1 TEXT, hash2 TEXT, score REAL, PRIMARY KEY (config, hash1, hash2))"
+            )
+            self.connection.commit()
+
+    def __len__(self):
+        return len(self.memory)
+
+    def get_many(self, config, keys):
+        """
+        This function returns the dictionary (hash1, hash2) -> score of the keys that are saved
+        """
+        scores = {}
+        for key in dict.fromkeys(keys):
+            score = self.memory.get((config,) + key)
+            if score is None and self.connection is not None:
+                row = self.connection.execute(
+                    "SELECT score FROM scores WHERE config = ? AND hash1 = ? AND hash2 = ?", (config,) + key
+                ).fetchone()
+                if row is not None:
+                    score = self.memory[(config,) + key] = row[0]
+            if score is not None:
+                scores[key] = score
+        return scores
+
+    def put_many(self, config, scores):
+        """
+        This function saves the scores of a dictionary (hash1, hash2) -> score
+        """
+        for key, score in scores.items():
+            self.memory[(config,) + key] = score
+        if self.connection is not None and scores:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO scores VALUES (?, ?, ?, ?)",
+                [(config,) + key + (score,) for key, score in scores.items()]
+            )
+            self.connection.commit()
+
+    def scores(self, config, keys, compute):
+        """
+        This function returns the scores of the keys in the same order, compute receives
+        the list of different keys that aren't saved yet and must return their scores in the same order
+        """
+        saved = self.get_many(config, keys)
+        missing = [key for key in dict.fromkeys(keys) if key not in saved]
+        if missing:
+            computed = dict(zip(missing, (float(score) for score in compute(missing))))
+            self.put_many(config, computed)
+            saved.update(computed)
+        return [saved[key] for key in keys]
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
@@ -0,0 +1,171 @@
+import argparse
+import glob
+import os
+import time
+import numpy as np
+from MinHash import MinHashLSH
+from VectorIndex import top_k
+# Importation of the libraries needed for the code
+
+PREFILTERS = ('terms', 'minhash')
+
+def cascade_stats() -> dict:
+    # Counters of the two stages of the cascade
+    return {
+        "queries": 0,
+        "lexical_seconds": 0.0,
+        "transformer_seconds": 0.0,
+        "comparisons": 0,        # (text, original) pairs scored by the transformer
+        "full_comparisons": 0,   # pairs the transformer would score without the cascade
+        "originals_embedded": 0,
+    }
+
+class LexicalPrefilter:
+    """
+    This class is the cheap first stage of the cascade: it shortlists, for every text, the k
+    originals with the most similar set of terms, so only those are scored by the transformer.
+    With method='terms' the score is the cosine of the binary term vectors (binary_cosine of
+    Model) computed for all the originals with one sparse matrix product; with method='minhash'
+    it is the Jaccard similarity estimated from MinHash signatures
+    """
+    def __init__(self, method: str = 'terms', bands: int = 32, rows: int = 4, seed: int = 1) -> None:
+        if method not in PREFILTERS:
+            raise ValueError(f"method must be one of {PREFILTERS}")
+        self.method = method
+        self.minhash = MinHashLSH(bands, rows, seed) if method == 'minhash' else None
+        self.names = []
+        self.key = None
+        self.vocabulary = {}
+        self.matrix = None
+        self.inverse_norms = None
+        self.signatures = None
+
+    def fit(self, names: list, term_sets: list, key=None) -> None:
+        """
+        This function indexes the terms of the originals, nothing is done when key is
+        the same as the one of the last call
+        """
+        if key is not None and key == self.key:
+            return
+        self.names = list(names)
+        self.key = key
+        if self.method == 'minhash':
+            self.signatures = np.array([self.minhash.signature(terms) for terms in term_sets]).reshape(len(self.names), -1)
+            self.empty = np.array([not terms for terms in term_sets], dtype=bool)
+            return
+        self.vocabulary = {}
+        for terms in term_sets:
+            for term in terms:
+                self.vocabulary.setdefault(term, len(self.vocabulary))
+        self.matrix, self.inverse_norms = self._term_matrix(term_sets)
+
+    def _term_matrix(self, term_sets: list) -> tuple:
+        # Binary CSR matrix of the terms that are in the vocabulary, the norms count every term
+        from scipy import sparse
+        indptr = [0]
+        indices = []
+        for terms in term_sets:
+            indices.extend(sorted(self.vocabulary[term] for term in terms if term in self.vocabulary))
+            indptr.append(len(indices))
+        matrix = sparse.csr_matrix(
+            (np.ones(len(indices), dtype=np.float64), np.array(indices, dtype=np.int64), np.array(indptr, dtype=np.int64)),
+            shape=(len(term_sets), len(self.vocabulary)),
+        )
+        sizes = np.array([len(terms) for terms in term_sets], dtype=np.float64)
+        inverse_norms = np.zeros(len(sizes))
+        inverse_norms[sizes > 0] = 1.0 / np.sqrt(sizes[sizes > 0])
+        return matrix, inverse_norms
+
+    def scores(self, term_sets: list) -> np.ndarray:
+        """
+        This function returns the lexical similarity of every text (rows) with every original (columns)
+        """
+        if self.method == 'minhash':
+            scores = np.zeros((len(term_sets), len(self.names)))
+            for row, terms in enumerate(term_sets):
+                if terms:
+                    scores[row] = (self.signatures == self.minhash.signature(terms)).mean(axis=1)
+            scores[:, self.empty] = 0.0
+            return scores
+        matrix, inverse_norms = self._term_matrix(term_sets)
+        overlaps = (matrix @ self.matrix.T).toarray()
+        # The same operations as binary_cosine: |A∩B|·((1/√|A|)·(1/√|B|))
+        return overlaps * (inverse_norms[:, None] * self.inverse_norms[None, :])
+
+    def shortlist(self, term_sets: list, k: int) -> np.ndarray:
+        """
+        This function returns, for every text, the positions of its k most similar originals, sorted
+        """
+        return top_k(self.scores(term_sets), k)
+
+def term_sets(texts: list) -> list:
+    # The terms of a preprocessed text (NewModel._preprocess_text) are its words
+    return [set(text.split()) for text in texts]
+
+def cascade_report(calculation, evaluation_dir: str, ks: list = (1, 2, 5, 10, 20), prefilter: LexicalPrefilter = None,
+                   metric: str = None) -> dict:
+    """
+    This function measures the cascade on the files of evaluation_dir: the time of the lexical stage,
+    the time of the transformer against every original and, for every k, the shortlist recall (how many
+    texts keep the original the full transformer search finds) and the share of transformer comparisons
+    """
+    metric = metric or calculation.metric
+    prefilter = prefilter or calculation.prefilter or LexicalPrefilter()
+    files = sorted(glob.glob(os.path.join(evaluation_dir, '*.txt')))
+    texts = [calculation._preprocess_text(calculation._read_file(file)) for file in files]
+    corpus = calculation.dataBaseProcessing()
+    names = list(corpus)
+
+    start = time.perf_counter()
+    prefilter.fit(names, term_sets(corpus.values()))
+    shortlist = prefilter.shortlist(term_sets(texts), max(ks))
+    lexical_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index = calculation._reference_embedding_index(corpus)
+    scores = calculation._document_scores(index, calculation._document_embeddings(texts), metric)
+    exact = top_k(scores, 1, largest=(metric == 'cosine'))[:, 0]
+    transformer_seconds = time.perf_counter() - start
+
+    rows = []
+    for k in ks:
+        k = min(k, len(names))
+        found = (shortlist[:, :k] == exact[:, None]).any(axis=1)
+        rows.append({
+            "k": k,
+            "recall": float(found.mean()) if len(files) else float('nan'),
+            "comparisons": k / len(names) if names else 0.0,
+            "originals_embedded": len(np.unique(shortlist[:, :k])),
+            "missed": [os.path.basename(files[i]) for i in np.flatnonzero(~found)],
+        })
+    return {
+        "files": len(files),
+        "originals": len(names),
+        "method": prefilter.method,
+        "lexical_seconds": lexical_seconds,
+        "transformer_seconds": transformer_seconds,
+        "ks": rows,
+    }
+
+def main(arguments=None) -> None:
+    # Shortlist recall and stage times of the cascade on the suspicious files
+    from NewModel import similarityCalculation
+    parser = argparse.ArgumentParser(description="Recall of the lexical shortlist against the full transformer search")
+    parser.add_argument("folder", nargs="?", default="suspicious/")
+    parser.add_argument("--originals", default="originals/")
+    parser.add_argument("--prefilter", choices=PREFILTERS, default="terms")
+    parser.add_argument("-k", type=int, nargs="+", default=[1, 2, 5, 10, 20])
+    parser.add_argument("--metric", choices=("cosine", "euclidean"), default="cosine")
+    parser.add_argument("--embeddings", default=None, help="directory of the embedding store")
+    args = parser.parse_args(arguments)
+
+    calculation = similarityCalculation(args.originals, 0.988, metric=args.metric, embedding_store_dir=args.embeddings)
+    report = cascade_report(calculation, args.folder, args.k, LexicalPrefilter(args.prefilter))
+    print(f"{report['files']} files, {report['originals']} originals, prefilter {report['method']}")
+    print(f"Lexical stage {report['lexical_seconds'] * 1000:.1f} ms, transformer against every original {report['transformer_seconds']:.2f} s")
+    for row in report["ks"]:
+        print(f"k={row['k']:<4} recall {row['recall']:.3f}  transformer comparisons {row['comparisons']:.1%}  "
+              f"originals to embed {row['originals_embedded']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import hashlib
+import io
+import logging
+import os
+# Importation of the libraries needed for the code
+
+class ReferenceCorpus:
+    """
+    This class keeps the preprocessed text of every .txt file of a directory. refresh only
+    preprocesses again the files that are new or whose content changed: a file whose
+    modification time and size didn't change isn't read, and one that was touched but has
+    the same content (same hash) isn't preprocessed. version grows every time the content
+    of the corpus changes
+    """
+    def __init__(self, documents_dir: str, preprocess, extension: str = '.txt') -> None:
+        self.documents_dir = documents_dir
+        self.preprocess = preprocess
+        self.extension = extension
+        self.signatures = {}   # file name -> (modification time, size, hash of the file)
+        self.texts = {}        # file name -> preprocessed text, in the order of the directory
+        self.text_hashes = {}  # file name -> hash of the preprocessed text
+        self.version = 0
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def refresh(self) -> dict:
+        """
+        This function updates the corpus with the directory and returns the dictionary
+        file name -> preprocessed text. The same dictionary is returned while nothing changes
+        """
+        file_names = [f for f in os.listdir(self.documents_dir) if f.endswith(self.extension)]
+        changed = False
+        texts = {}
+        for file_name in file_names:
+            path = os.path.join(self.documents_dir, file_name)
+            try:
+                stat = os.stat(path)
+                signature = self.signatures.get(file_name)
+                if signature is not None and signature[:2] == (stat.st_mtime_ns, stat.st_size) and file_name in self.texts:
+                    texts[file_name] = self.texts[file_name]
+                    continue
+                with open(path, 'rb') as f:
+                    data = f.read()
+                digest = hashlib.sha1(data).hexdigest()
+                if signature is not None and signature[2] == digest and file_name in self.texts:
+                    texts[file_name] = self.texts[file_name]
+                else:
+                    # Same text as open(..., 'r'), with the universal newlines
+                    texts[file_name] = self.preprocess(io.StringIO(data.decode('utf-8'), newline=None).read())
+                    self.text_hashes[file_name] = hashlib.sha1(texts[file_name].encode('utf-8')).hexdigest()
+                    changed = True
+                    logging.debug(f'Read file: {file_name}')
+                self.signatures[file_name] = (stat.st_mtime_ns, stat.st_size, digest)
+            except Exception as e:
+                logging.error(f'Error al leer el archivo {file_name}: {e}')
+
+        for file_name in set(self.signatures) - set(texts):
+            del self.signatures[file_name]
+            self.text_hashes.pop(file_name, None)
+        if changed or list(texts) != list(self.texts):
+            self.texts = texts
+            self.version += 1
+        return self.texts
+
+    def text_hash(self, file_name: str, text: str) -> str:
+        """
+        This function returns the hash of a preprocessed text, it is only computed when
+        the text isn't the one saved for that file
+        """
+        if self.texts.get(file_name) is text and file_name in self.text_hashes:
+            return self.text_hashes[file_name]
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()
@@ -0,0 +1,129 @@
+import json
+import os
+import numpy as np
+# Importation of the libraries needed for the code
+
+class EmbeddingStore:
+    """
+    This class keeps the embeddings of the documents on disk: a float32 .npy matrix opened
+    with np.memmap and a JSON manifest with the row, the content hash of every document and
+    the model that made them. A document can also have a block of several rows (one per chunk).
+    New documents are appended and changed ones are written in their same rows, several
+    processes can open the matrix read-only without copying it
+    """
+    MATRIX_FILE = "embeddings.npy"
+    MANIFEST_FILE = "manifest.json"
+
+    def __init__(self, directory: str, model_id: str, read_only: bool = False) -> None:
+        self.directory = directory
+        self.model_id = model_id
+        self.read_only = read_only
+        self.matrix_path = os.path.join(directory, self.MATRIX_FILE)
+        self.manifest_path = os.path.join(directory, self.MANIFEST_FILE)
+        self.rows = {}    # name -> {"row": first row, "rows": number of rows, "hash": hash of the content}
+        self.count = 0
+        self.dim = None
+        self.matrix = None
+        if not read_only:
+            os.makedirs(directory, exist_ok=True)
+        self._open()
+
+    def _open(self) -> None:
+        if not os.path.isfile(self.manifest_path) or not os.path.isfile(self.matrix_path):
+            return
+        with open(self.manifest_path, encoding="utf-8") as file:
+            manifest = json.load(file)
+        # The embeddings of another model can't be used, the store starts empty
+        if manifest.get("model") != self.model_id:
+            return
+        self.rows = manifest["rows"]
+        self.count = manifest["count"]
+        self.dim = manifest["dim"]
+        self.matrix = np.load(self.matrix_path, mmap_mode="r" if self.read_only else "r+")
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.rows
+
+    def get(self, name: str, content_hash: str = None):
+        """
+        This function returns the embedding of the document, or None when it isn't
+        saved or it was saved for another content
+        """
+        block = self.get_block(name, content_hash)
+        return block[0] if block is not None else None
+
+    def get_block(self, name: str, content_hash: str = None):
+        """
+        This function returns all the rows of the document as a matrix, or None when it
+        isn't saved or it was saved for another content
+        """
+        entry = self.rows.get(name)
+        if entry is None or (content_hash is not None and entry["hash"] != content_hash):
+            return None
+        return self.matrix[entry["row"]:entry["row"] + entry.get("rows", 1)]
+
+    def put(self, name: str, content_hash: str, embedding) -> None:
+        """
+        This function saves the embedding (a vector, or a matrix with one row per chunk)
+        of a document, in its same rows if it was already saved with the same number of rows
+        """
+        if self.read_only:
+            raise ValueError("The embedding store was opened read-only")
+        block = np.asarray(embedding, dtype=np.float32)
+        block = block.reshape(-1, block.shape[-1])
+        if self.dim is None:
+            self.dim = block.shape[1]
+        entry = self.rows.get(name)
+        if entry is None or entry.get("rows", 1) != len(block):
+            self._reserve(self.count + len(block))
+            entry = {"row": self.count, "rows": len(block), "hash": content_hash}
+            self.rows[name] = entry
+            self.count += len(block)
+        entry["hash"] = content_hash
+        self.matrix[entry["row"]:entry["row"] + len(block)] = block
+
+    def remove(self, name: str) -> None:
+        # The rows are left unused, the other rows don't move
+        self.rows.pop(name, None)
+
+    def _reserve(self, rows: int) -> None:
+        # The file doubles its size when it is full, so appending costs amortized O(1)
+        capacity = 0 if self.matrix is None else self.matrix.shape[0]
+        if rows <= capacity:
+            return
+        new_capacity = max(rows, 2 * capacity, 64)
+        new_path = self.matrix_path + ".tmp.npy"
+        new_matrix = np.lib.format.open_memmap(new_path, mode="w+", dtype=np.float32, shape=(new_capacity, self.dim))
+        if self.matrix is not None:
+            new_matrix[:self.count] = self.matrix[:self.count]
+        new_matrix.flush()
+        del new_matrix
+        self.matrix = None
+        os.replace(new_path, self.matrix_path)
+        self.matrix = np.load(self.matrix_path, mmap_mode="r+")
+
+    def embeddings(self, names: list) -> np.ndarray:
+        """
+        This function returns the first row of every document in names as one matrix
+        """
+        if not names:
+            return np.zeros((0, self.dim or 0), dtype=np.float32)
+        return self.matrix[[self.rows[name]["row"] for name in names]]
+
+    def save(self) -> None:
+        """
+        This function writes the matrix to disk and then the manifest, the manifest is
+        replaced at once so a reader never sees a half written one
+        """
+        if self.read_only:
+            return
+        if self.matrix is not None:
+            self.matrix.flush()
+        manifest = {"model": self.model_id, "dim": self.dim, "count": self.count, "rows": self.rows}
+        temporary_path = self.manifest_path + ".tmp"
+        with open(temporary_path, "w", encoding="utf-8") as file:
+            json.dump(manifest, file)
+        os.replace(temporary_path, self.manifest_path)
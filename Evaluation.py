@@ -0,0 +1,205 @@
+import argparse
+import csv
+import json
+import os
+import numpy as np
+# Importation of the libraries needed for the code
+# matplotlib is only imported when the plots are saved
+
+# Name of the labels manifest inside the evaluation folder
+LABELS_FILE = "labels.csv"
+
+def load_labels(manifest_path: str) -> dict:
+    """
+    This function reads a CSV manifest with the columns file and label (1 plagiarism, 0 not)
+    and returns the dictionary file name -> label
+    """
+    with open(manifest_path, newline="", encoding="utf-8") as file:
+        return {os.path.basename(row["file"]): int(row["label"]) for row in csv.DictReader(file)}
+
+def _divide(numerator, denominator) -> np.ndarray:
+    # Division that gives nan instead of a warning when the denominator is 0
+    numerator = np.asarray(numerator, dtype=np.float64)
+    denominator = np.asarray(denominator, dtype=np.float64)
+    return np.divide(numerator, denominator, out=np.full(np.broadcast(numerator, denominator).shape, np.nan), where=denominator != 0)
+
+def threshold_sweep(labels, scores, greater_is_positive: bool = True) -> dict:
+    """
+    This function evaluates every possible threshold at once: the scores are sorted one time
+    and the true and false positives of every distinct score come from a cumulative sum.
+    A file is predicted as plagiarism when its score >= threshold (<= for distances,
+    greater_is_positive=False). It returns numpy arrays, one position per threshold, from the
+    strictest to the most permissive
+    """
+    labels = np.asarray(labels, dtype=bool)
+    scores = np.asarray(scores, dtype=np.float64)
+    keyed = scores if greater_is_positive else -scores
+    order = np.argsort(-keyed, kind="mergesort")
+    sorted_keys = keyed[order]
+    # Last position of every group of equal scores
+    ends = np.r_[np.flatnonzero(np.diff(sorted_keys)), len(scores) - 1] if len(scores) else np.zeros(0, dtype=np.int64)
+    true_positives = np.cumsum(labels[order])[ends]
+    false_positives = ends + 1 - true_positives
+    positives = int(labels.sum())
+    negatives = len(labels) - positives
+    false_negatives = positives - true_positives
+    true_negatives = negatives - false_positives
+    recall = _divide(true_positives, positives)
+    false_positive_rate = _divide(false_positives, negatives)
+    return {
+        "thresholds": scores[order][ends],
+        "true_positives": true_positives,
+        "false_positives": false_positives,
+        "false_negatives": false_negatives,
+        "true_negatives": true_negatives,
+        "precision": _divide(true_positives, true_positives + false_positives),
+        "recall": recall,
+        "false_positive_rate": false_positive_rate,
+        "f1": _divide(2 * true_positives, 2 * true_positives + false_positives + false_negatives),
+        "accuracy": _divide(true_positives + true_negatives, len(labels)),
+        "youden": recall - false_positive_rate,
+        "positives": positives,
+        "negatives": negatives,
+    }
+
+def roc_auc(sweep: dict) -> float:
+    """
+    This function returns the area under the ROC curve of a threshold_sweep (trapezoids,
+    the same value as sklearn's roc_auc_score)
+    """
+    if not sweep["positives"] or not sweep["negatives"]:
+        return float("nan")
+    false_positive_rate = np.r_[0.0, sweep["false_positive_rate"]]
+    true_positive_rate = np.r_[0.0, sweep["recall"]]
+    return float(np.sum(np.diff(false_positive_rate) * (true_positive_rate[1:] + true_positive_rate[:-1]) / 2))
+
+def _point(sweep: dict, index: int) -> dict:
+    # The metrics of one threshold of the sweep
+    return {name: (values[index].item() if isinstance(values, np.ndarray) else values) for name, values in sweep.items()
+            if name not in ("positives", "negatives")}
+
+def threshold_metrics(labels, scores, threshold: float, greater_is_positive: bool = True) -> dict:
+    """
+    This function returns the metrics of one fixed threshold, for example the one in use
+    """
+    labels = np.asarray(labels, dtype=bool)
+    scores = np.asarray(scores, dtype=np.float64)
+    predicted = scores >= threshold if greater_is_positive else scores <= threshold
+    true_positives = int(np.sum(predicted & labels))
+    false_positives = int(np.sum(predicted & ~labels))
+    false_negatives = int(np.sum(~predicted & labels))
+    true_negatives = int(np.sum(~predicted & ~labels))
+    return {
+        "threshold": threshold,
+        "true_positives": true_positives,
+        "false_positives": false_positives,
+        "false_negatives": false_negatives,
+        "true_negatives": true_negatives,
+        "precision": _divide(true_positives, true_positives + false_positives).item(),
+        "recall": _divide(true_positives, true_positives + false_negatives).item(),
+        "f1": _divide(2 * true_positives, 2 * true_positives + false_positives + false_negatives).item(),
+        "accuracy": _divide(true_positives + true_negatives, len(labels)).item(),
+    }
+
+def evaluate(labels, scores, threshold: float = None, greater_is_positive: bool = True) -> dict:
+    """
+    This function returns the ROC AUC, the sweep of every threshold, the thresholds with the
+    best F1 and the best Youden index (TPR - FPR) and, when given, the metrics of threshold
+    """
+    sweep = threshold_sweep(labels, scores, greater_is_positive)
+    report = {
+        "auc": roc_auc(sweep),
+        "positives": sweep["positives"],
+        "negatives": sweep["negatives"],
+        "greater_is_positive": greater_is_positive,
+        "sweep": sweep,
+    }
+    if len(sweep["thresholds"]):
+        # nan never wins, the first of equal values is the strictest threshold
+        report["best_f1"] = _point(sweep, int(np.argmax(np.nan_to_num(sweep["f1"], nan=-1))))
+        report["best_youden"] = _point(sweep, int(np.argmax(np.nan_to_num(sweep["youden"], nan=-2))))
+    if threshold is not None:
+        report["at_threshold"] = threshold_metrics(labels, scores, threshold, greater_is_positive)
+    return report
+
+def save_plots(report: dict, directory: str, prefix: str = "") -> list:
+    """
+    This function saves the ROC and the precision-recall curves as PNG files in directory,
+    without opening any window, and returns their paths
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    from matplotlib import pyplot as plt
+    os.makedirs(directory, exist_ok=True)
+    sweep = report["sweep"]
+    paths = []
+
+    figure = plt.figure()
+    plt.plot(np.r_[0.0, sweep["false_positive_rate"]], np.r_[0.0, sweep["recall"]], color='darkorange', lw=2,
+             label='ROC curve (area = %0.2f)' % report["auc"])
+    plt.plot([0, 1], [0, 1], color='navy', lw=2, linestyle='--')
+    plt.xlim([0.0, 1.0])
+    plt.ylim([0.0, 1.05])
+    plt.xlabel('False Positive Rate')
+    plt.ylabel('True Positive Rate')
+    plt.title('Receiver Operating Characteristic')
+    plt.legend(loc="lower right")
+    paths.append(os.path.join(directory, f"{prefix}roc.png"))
+    figure.savefig(paths[-1])
+    plt.close(figure)
+
+    figure = plt.figure()
+    plt.plot(sweep["recall"], sweep["precision"], color='darkorange', lw=2)
+    plt.xlim([0.0, 1.0])
+    plt.ylim([0.0, 1.05])
+    plt.xlabel('Recall')
+    plt.ylabel('Precision')
+    plt.title('Precision-Recall')
+    paths.append(os.path.join(directory, f"{prefix}precision_recall.png"))
+    figure.savefig(paths[-1])
+    plt.close(figure)
+    return paths
+
+def format_report(report: dict) -> str:
+    """
+    This function returns the summary of a report as text
+    """
+    lines = [f"AUC-ROC: {report['auc']:.4f} ({report['positives']} plagiarism, {report['negatives']} not plagiarism)"]
+    for name, title in (("at_threshold", "Current threshold"), ("best_f1", "Best F1"), ("best_youden", "Best Youden")):
+        point = report.get(name)
+        if point is not None:
+            threshold = point.get("threshold", point.get("thresholds"))
+            lines.append(f"{title}: {threshold:.6g} precision={point['precision']:.3f} recall={point['recall']:.3f} "
+                         f"f1={point['f1']:.3f} accuracy={point['accuracy']:.3f}")
+    return "\n".join(lines)
+
+def to_json(report: dict) -> str:
+    # The numpy arrays are written as lists
+    return json.dumps(report, default=lambda value: value.tolist() if isinstance(value, np.ndarray) else str(value))
+
+def main(arguments=None) -> None:
+    # Evaluation of the RoBERTa model on a labeled folder, without windows
+    from NewModel import add_search_arguments, search_options, similarityCalculation
+    parser = argparse.ArgumentParser(description="Headless evaluation of the plagiarism detection")
+    parser.add_argument("folder", nargs="?", default="suspicious/")
+    parser.add_argument("--originals", default="originals/")
+    parser.add_argument("--manifest", default=None, help=f"CSV file,label (default <folder>/{LABELS_FILE})")
+    parser.add_argument("--threshold", type=float, default=0.988)
+    parser.add_argument("--metric", choices=("cosine", "euclidean"), default="cosine")
+    parser.add_argument("--embeddings", default="embeddings/", help="directory of the embedding store")
+    parser.add_argument("--plots", default=None, help="folder where the ROC and precision-recall plots are saved")
+    parser.add_argument("--json", default=None, help="file where the whole report is saved")
+    parser.add_argument("--workers", type=int, default=1, help="processes that clean and lemmatize the files")
+    add_search_arguments(parser)
+    args = parser.parse_args(arguments)
+
+    calculation = similarityCalculation(args.originals, args.threshold, metric=args.metric, embedding_store_dir=args.embeddings,
+                                       **search_options(args))
+    report = calculation.evaluate_directory(args.folder, manifest=args.manifest, plot_dir=args.plots,
+                                            workers=args.workers)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            file.write(to_json(report))
+
+if __name__ == "__main__":
+    main()
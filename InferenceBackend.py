@@ -0,0 +1,159 @@
+from __future__ import annotations
+import argparse
+import contextlib
+import glob
+import logging
+import os
+import time
+# Importation of the libraries needed for the code
+# torch is imported the first time it is used, importing this module is cheap
+
+# The torch module, shared by the whole process and imported the first time it is used
+_torch = None
+
+def get_torch():
+    """
+    This function returns the torch module, importing it the first time it is needed
+    """
+    global _torch
+    if _torch is None:
+        import torch
+        _torch = torch
+    return _torch
+
+class InferenceBackend:
+    """
+    This class decides how the encoder runs on the CPU: dynamic int8 quantization of the
+    Linear layers (quantize), bf16 autocast when the CPU supports it (bf16), the number of
+    threads used inside one operation (intra_op_threads) and to run operations in parallel
+    (inter_op_threads). The forward passes always run under torch.inference_mode. The int8
+    layers only accept fp32 inputs, so quantize and bf16 can't be used together
+    """
+    def __init__(self, quantize: bool = False, bf16: bool = False, intra_op_threads: int = None,
+                 inter_op_threads: int = None) -> None:
+        if quantize and bf16:
+            raise ValueError("quantize and bf16 can't be used together")
+        self.quantize = quantize
+        self.bf16 = bf16
+        if bf16 and not bf16_supported():
+            logging.warning("This CPU doesn't support bf16, the model runs in fp32")
+            self.bf16 = False
+        self.intra_op_threads = intra_op_threads
+        self.inter_op_threads = inter_op_threads
+
+    @property
+    def id(self) -> str:
+        """
+        This function returns the name of the numeric format, the embeddings of different
+        formats are different so it is part of the id of the saved embeddings
+        """
+        return "int8" if self.quantize else "bf16" if self.bf16 else "fp32"
+
+    def configure_threads(self) -> None:
+        torch = get_torch()
+        if self.intra_op_threads:
+            torch.set_num_threads(self.intra_op_threads)
+        if self.inter_op_threads and torch.get_num_interop_threads() != self.inter_op_threads:
+            # torch only accepts it before the first parallel operation of the process
+            try:
+                torch.set_num_interop_threads(self.inter_op_threads)
+            except RuntimeError:
+                logging.warning("The inter-op threads were already set, they stay at %d", torch.get_num_interop_threads())
+
+    def prepare(self, model: torch.nn.Module) -> torch.nn.Module:
+        """
+        This function sets the threads and returns the model ready for inference,
+        with its Linear layers quantized to int8 when quantize is True
+        """
+        self.configure_threads()
+        model.eval()
+        if self.quantize:
+            torch = get_torch()
+            model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        return model
+
+    def context(self) -> contextlib.ExitStack:
+        """
+        This function returns the context every forward pass must run in
+        """
+        torch = get_torch()
+        stack = contextlib.ExitStack()
+        stack.enter_context(torch.inference_mode())
+        if self.bf16:
+            stack.enter_context(torch.autocast("cpu", dtype=torch.bfloat16))
+        return stack
+
+def bf16_supported() -> bool:
+    # oneDNN reports whether the CPU has native bf16 instructions (AVX512-BF16 or AMX)
+    try:
+        return bool(get_torch().ops.mkldnn._is_mkldnn_bf16_supported())
+    except (AttributeError, RuntimeError):
+        return False
+
+def parity_report(reference, candidate, evaluation_dir: str, metric: str = None) -> dict:
+    """
+    This function scores every file of evaluation_dir with two similarityCalculation objects,
+    usually fp32 (reference) and an optimized backend (candidate), and returns the score drift,
+    the files whose most similar original or plagiarism decision changed and the time of each one
+    """
+    metric = metric or reference.metric
+    files = sorted(glob.glob(os.path.join(evaluation_dir, '*.txt')))
+    texts = [reference._preprocess_text(reference._read_file(file)) for file in files]
+    corpus = reference.dataBaseProcessing()
+    results = {}
+    for name, calculator in (("reference", reference), ("candidate", candidate)):
+        start = time.perf_counter()
+        found = calculator.similaritySearch(texts, corpus, k=1)
+        results[name] = ([result[metric][0] if result[metric] else (None, float('nan')) for result in found], time.perf_counter() - start)
+
+    rows = []
+    for file, (reference_file, reference_score), (candidate_file, candidate_score) in zip(files, results["reference"][0], results["candidate"][0]):
+        rows.append({
+            "File": os.path.basename(file),
+            "Reference": reference_file,
+            "Reference score": reference_score,
+            "Candidate": candidate_file,
+            "Candidate score": candidate_score,
+            "Drift": abs(candidate_score - reference_score),
+            # The same decision as plagiarismDetection
+            "Decision changed": (reference_score >= reference.percentaje_simil) != (candidate_score >= reference.percentaje_simil),
+        })
+    drifts = [row["Drift"] for row in rows]
+    return {
+        "files": rows,
+        "max_drift": max(drifts, default=0.0),
+        "mean_drift": sum(drifts) / len(drifts) if drifts else 0.0,
+        "changed_files": sum(row["Reference"] != row["Candidate"] for row in rows),
+        "changed_decisions": sum(row["Decision changed"] for row in rows),
+        "reference_seconds": results["reference"][1],
+        "candidate_seconds": results["candidate"][1],
+    }
+
+def main(arguments=None) -> None:
+    # Parity of an optimized backend against fp32 on the suspicious files
+    from NewModel import similarityCalculation
+    parser = argparse.ArgumentParser(description="Score drift of an optimized inference backend against fp32")
+    parser.add_argument("--originals", default="originals/")
+    parser.add_argument("--suspicious", default="suspicious/")
+    parser.add_argument("--threshold", type=float, default=0.988)
+    parser.add_argument("--metric", choices=("cosine", "euclidean"), default="cosine")
+    parser.add_argument("--quantize", action="store_true", help="dynamic int8 quantization of the Linear layers")
+    parser.add_argument("--bf16", action="store_true", help="bf16 autocast when the CPU supports it")
+    parser.add_argument("--threads", type=int, default=None, help="intra-op threads")
+    parser.add_argument("--interop-threads", type=int, default=None, help="inter-op threads")
+    args = parser.parse_args(arguments)
+
+    backend = InferenceBackend(args.quantize, args.bf16, args.threads, args.interop_threads)
+    reference = similarityCalculation(args.originals, args.threshold, metric=args.metric,
+                                      backend=InferenceBackend(intra_op_threads=args.threads))
+    candidate = similarityCalculation(args.originals, args.threshold, metric=args.metric, backend=backend)
+    report = parity_report(reference, candidate, args.suspicious)
+    for row in report["files"]:
+        if row["Reference"] != row["Candidate"] or row["Decision changed"]:
+            print(f"{row['File']}: {row['Reference']} {row['Reference score']:.5f} -> {row['Candidate']} {row['Candidate score']:.5f}")
+    print(f"Backend {backend.id}: max drift {report['max_drift']:.2e}, mean drift {report['mean_drift']:.2e}, "
+          f"{report['changed_files']} files with another original, {report['changed_decisions']} decisions changed")
+    print(f"fp32 {report['reference_seconds']:.2f} s, {backend.id} {report['candidate_seconds']:.2f} s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+import heapq
+import json
+import math
+import os
+from Cache import file_hash
+from Model import TextProcessor
+# Importation of the libraries needed for the code
+
+class InvertedIndex:
+    """
+    This class keeps, for every term, the posting list of the documents that contain it,
+    so a query only looks at the documents that share at least one term with it.
+    It can be saved to a JSON file and updated only with the files that changed
+    """
+    def __init__(self):
+        self.documents = []   # id -> path, None when the document was removed
+        self.signatures = []  # id -> (modification time, size, hash) of the file
+        self.terms = []       # id -> terms of the document, used to remove it
+        self.ids = {}         # path -> id
+        self.postings = {}    # term -> ids of the documents that contain it
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, path, terms, signature=None):
+        """
+        This function adds a document with its terms, replacing it if it was already there
+        """
+        path = os.path.normpath(path)
+        if path in self.ids:
+            self.remove(path)
+        terms = list(dict.fromkeys(terms))
+        doc_id = len(self.documents)
+        self.documents.append(path)
+        self.signatures.append(signature)
+        self.terms.append(terms)
+        self.ids[path] = doc_id
+        for term in terms:
+            self.postings.setdefault(term, []).append(doc_id)
+        return doc_id
+
+    def remove(self, path):
+        """
+        This function removes a document from the posting lists
+        """
+        doc_id = self.ids.pop(os.path.normpath(path))
+        for term in self.terms[doc_id]:
+            posting = self.postings[term]
+            posting.remove(doc_id)
+            if not posting:
+                del self.postings[term]
+        self.documents[doc_id] = None
+        self.signatures[doc_id] = None
+        self.terms[doc_id] = []
+
+    def _signature(self, path, old_signature):
+        # The hash is only computed again when the modification time or the size change
+        stat = os.stat(path)
+        if old_signature is not None and old_signature[0] == stat.st_mtime_ns and old_signature[1] == stat.st_size:
+            return old_signature
+        return [stat.st_mtime_ns, stat.st_size, file_hash(path)]
+
+    def changed(self, paths):
+        """
+        This function returns the paths that are new or whose content changed
+        """
+        changed = []
+        for path in paths:
+            doc_id = self.ids.get(os.path.normpath(path))
+            old_signature = self.signatures[doc_id] if doc_id is not None else None
+            if old_signature is None or self._signature(path, old_signature)[2] != old_signature[2]:
+                changed.append(path)
+        return changed
+
+    def update(self, paths, processor=None):
+        """
+        This function makes the index contain exactly the files in paths,
+        only the new or changed files are preprocessed with the TextProcessor
+        """
+        processor = processor if processor is not None else TextProcessor(None, None)
+        paths = [os.path.normpath(path) for path in paths]
+        for path in set(self.ids) - set(paths):
+            self.remove(path)
+        for path in paths:
+            doc_id = self.ids.get(path)
+            old_signature = self.signatures[doc_id] if doc_id is not None else None
+            signature = self._signature(path, old_signature)
+            if old_signature is None or old_signature[2] != signature[2]:
+                self.add(path, processor.document_terms(path), signature)
+            else:
+                self.signatures[doc_id] = signature
+
+    def search(self, terms, k=2, exclude=()):
+        """
+        This function returns the k documents most similar to the terms as (path, similarity),
+        from the most to the least similar, the similarity is the cosine of the binary vectors
+        """
+        terms = set(terms)
+        exclude = {os.path.abspath(path) for path in exclude}
+        overlaps = {}
+        for term in terms:
+            for doc_id in self.postings.get(term, ()):
+                overlaps[doc_id] = overlaps.get(doc_id, 0) + 1
+
+        query_norm = 1.0 / math.sqrt(len(terms)) if terms else 0.0
+        scores = (
+            (doc_id, overlap * (query_norm * (1.0 / math.sqrt(len(self.terms[doc_id])))))
+            for doc_id, overlap in overlaps.items()
+            if not exclude or os.path.abspath(self.documents[doc_id]) not in exclude
+        )
+        best = heapq.nsmallest(k, scores, key=lambda score: (-score[1], score[0]))
+        return [(self.documents[doc_id], similarity) for doc_id, similarity in best]
+
+    def save(self, path):
+        """
+        This function saves the index in a JSON file, the removed documents are left out
+        """
+        documents = [
+            {"path": document, "signature": signature, "terms": terms}
+            for document, signature, terms in zip(self.documents, self.signatures, self.terms)
+            if document is not None
+        ]
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump({"documents": documents}, file)
+
+    @classmethod
+    def load(cls, path):
+        """
+        This function loads an index saved with save
+        """
+        index = cls()
+        with open(path, encoding="utf-8") as file:
+            data = json.load(file)
+        for document in data["documents"]:
+            index.add(document["path"], document["terms"], document["signature"])
+        return index
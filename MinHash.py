@@ -0,0 +1,127 @@
+import zlib
+import numpy as np
+from Model import PLAGIARISM_THRESHOLD, binary_cosine, plagiarism_detected
+# Importation of the libraries needed for the code
+
+# Prime bigger than every 32-bit hash, the permutations are (a·x + b) mod prime
+MINHASH_PRIME = np.uint64(4294967311)
+
+class MinHashLSH:
+    """
+    This class estimates which documents are similar without comparing every pair.
+    Each document gets a MinHash signature of bands·rows values computed over its terms,
+    the signature is divided in bands and two documents become a candidate pair when
+    all the rows of one band are equal. Only the candidate pairs are scored exactly
+    """
+    def __init__(self, bands=50, rows=2, seed=1):
+        self.bands = bands
+        self.rows = rows
+        generator = np.random.RandomState(seed)
+        # a and b are below 2^32 so a·x + b never overflows 64 bits
+        self.a = generator.randint(1, 2**32 - 1, size=bands * rows, dtype=np.uint64)
+        self.b = generator.randint(0, 2**32 - 1, size=bands * rows, dtype=np.uint64)
+        self.buckets = [{} for _ in range(bands)]
+        self.terms = []
+        # Candidate pairs scored by the last similar_pairs
+        self.candidates = 0
+
+    def hash_terms(self, terms):
+        """
+        This function returns the 32-bit hash of every different term
+        """
+        unique_terms = dict.fromkeys(terms)
+        return np.fromiter((zlib.crc32(str(term).encode("utf-8")) for term in unique_terms), dtype=np.uint64, count=len(unique_terms))
+
+    def signature(self, terms):
+        """
+        This function returns the MinHash signature of a set of terms, all the
+        permutations are applied at once to all the hashes of the terms
+        """
+        hashes = self.hash_terms(terms)
+        if len(hashes) == 0:
+            return np.full(self.bands * self.rows, MINHASH_PRIME, dtype=np.uint64)
+        permuted = (self.a[:, None] * hashes[None, :] + self.b[:, None]) % MINHASH_PRIME
+        return permuted.min(axis=1)
+
+    def add(self, terms):
+        """
+        This function adds a document to the index and returns its id
+        """
+        doc_id = len(self.terms)
+        self.terms.append(set(terms))
+        if not self.terms[doc_id]:
+            return doc_id
+        signature = self.signature(terms)
+        for band, bucket in enumerate(self.buckets):
+            key = signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            bucket.setdefault(key, []).append(doc_id)
+        return doc_id
+
+    def index(self, terms_list):
+        """
+        This function adds every document in terms_list, the ids follow the order of the list
+        """
+        return [self.add(terms) for terms in terms_list]
+
+    def candidate_pairs(self):
+        """
+        This function returns the sorted pairs (i, j), i < j, that share at least one bucket
+        """
+        candidates = set()
+        for bucket in self.buckets:
+            for doc_ids in bucket.values():
+                for position, i in enumerate(doc_ids):
+                    for j in doc_ids[position + 1:]:
+                        candidates.add((i, j))
+        return sorted(candidates)
+
+    def query(self, terms):
+        """
+        This function returns the sorted ids of the documents that share a bucket with the terms
+        """
+        if not terms:
+            return []
+        signature = self.signature(terms)
+        candidates = set()
+        for band, bucket in enumerate(self.buckets):
+            key = signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            candidates.update(bucket.get(key, ()))
+        return sorted(candidates)
+
+    def similar_pairs(self, threshold=PLAGIARISM_THRESHOLD / 100):
+        """
+        This function is a generator of (i, j, similarity) for the candidate pairs that
+        TextProcessor.results would detect as plagiarism (rounded percentage above threshold)
+        """
+        percentage = round(threshold * 100, 9)
+        candidate_pairs = self.candidate_pairs()
+        self.candidates = len(candidate_pairs)
+        for i, j in candidate_pairs:
+            similarity = binary_cosine(self.terms[i], self.terms[j])
+            if plagiarism_detected(similarity, percentage):
+                yield i, j, similarity
+
+    def candidate_probability(self, jaccard):
+        """
+        This function returns the probability that two documents with that Jaccard
+        similarity become a candidate pair: 1 - (1 - jaccard^rows)^bands
+        """
+        return 1 - (1 - np.asarray(jaccard, dtype=float) ** self.rows) ** self.bands
+
+    def recall_estimate(self, threshold=PLAGIARISM_THRESHOLD / 100):
+        """
+        This function returns the estimated probability of finding a pair whose cosine
+        similarity is exactly the threshold. For two sets of the same size the Jaccard
+        similarity is cosine / (2 - cosine), pairs of very different sizes have a lower
+        Jaccard similarity and their recall is lower than this estimate
+        """
+        return float(self.candidate_probability(threshold / (2 - threshold)))
+
+    def measured_recall(self, exact_pairs):
+        """
+        This function returns the fraction of the exact (i, j) pairs that are candidate pairs
+        """
+        exact_pairs = {(i, j) for i, j, *_ in exact_pairs}
+        if not exact_pairs:
+            return 1.0
+        return len(exact_pairs & set(self.candidate_pairs())) / len(exact_pairs)
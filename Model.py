@@ -1,73 +1,168 @@
-import nltk
-from nltk.stem import LancasterStemmer
-from nltk.util import ngrams
-from sklearn.metrics import pairwise
-from nltk.tokenize import word_tokenize
-import spacy
+from importlib import metadata
 import logging
+import math
 import numpy as np
-from tabulate import tabulate
+from Cache import WordCache, DocumentStore
+from Normalization import CLEAN_FILE
 # Importation of the libraries needed for the code
+# spaCy, NLTK and scikit-learn take seconds to import, they are imported the first time they are used
+
+# Percentage of similarity above which two .txt are considered plagiarism
+PLAGIARISM_THRESHOLD = 50.1
+
+# Number of words sent together to nlp.pipe
+LEMMA_BATCH_SIZE = 1000
+
+# Contractions that spaCy doesn't lemmatize the way we need
+LEMMA_CONTRACTIONS = {"can't": "can", "won't": "will", "don't": "do"}
+
+# The spaCy pipeline is shared by the whole process and loaded the first time it is used
+_nlp = None
+
+def get_nlp():
+    """
+    This function returns the shared spaCy pipeline, the parser and the named entity
+    recognizer are disabled because only the lemmas are used
+    """
+    global _nlp
+    if _nlp is None:
+        import spacy
+        _nlp = spacy.load('en_core_web_sm', disable=['parser', 'ner'])
+    return _nlp
+
+def package_version(name):
+    # Version of an installed distribution, "missing" when it isn't installed (the stemmer doesn't need spaCy)
+    try:
+        return metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return "missing"
+
+# Versions of the libraries behind each normalizer, they are read the first time they are needed
+_normalizer_versions = None
+
+def normalizer_versions():
+    """
+    This function returns the versions of the libraries behind each normalizer, a saved word
+    is discarded when they change. They are read from the installed packages, so the libraries
+    aren't imported, and only when a disk store is opened
+    """
+    global _normalizer_versions
+    if _normalizer_versions is None:
+        # The lemmas come from spaCy and from its en_core_web_sm model, which has its own version
+        _normalizer_versions = {
+            "lemma": f"spacy-{package_version('spacy')}|en_core_web_sm-{package_version('en_core_web_sm')}",
+            "stem": "nltk-" + package_version("nltk"),
+        }
+    return _normalizer_versions
+
+# Lemmas and stems already computed, shared by every TextProcessor
+_word_cache = WordCache(versions=normalizer_versions)
+
+def get_word_cache():
+    """
+    This function returns the word cache shared by every TextProcessor
+    """
+    return _word_cache
+
+def configure_word_cache(max_size=100000, path=None):
+    """
+    This function replaces the shared word cache, max_size is the number of words kept
+    in memory and path is an optional SQLite file to reuse the words between runs
+    """
+    global _word_cache
+    _word_cache.close()
+    _word_cache = WordCache(max_size=max_size, path=path, versions=normalizer_versions)
+    return _word_cache
+
+# Terms of every document already processed, shared by every TextProcessor
+_document_store = DocumentStore()
+
+def binary_cosine(terms1, terms2):
+    """
+    This function returns the cosine similarity of two binary vectors given as the sets
+    of terms that are present, for binary vectors it is |A∩B| / sqrt(|A|·|B|)
+    """
+    terms1 = terms1 if isinstance(terms1, (set, frozenset)) else set(terms1)
+    terms2 = terms2 if isinstance(terms2, (set, frozenset)) else set(terms2)
+    if not terms1 or not terms2:
+        return 0.0
+    return len(terms1 & terms2) * ((1.0 / math.sqrt(len(terms1))) * (1.0 / math.sqrt(len(terms2))))
+
+def plagiarism_detected(similarity, threshold=PLAGIARISM_THRESHOLD):
+    """
+    This function decides if a similarity (0 to 1) is plagiarism the same way as TextProcessor.results:
+    the percentage rounded to two decimals must be above threshold (a percentage)
+    """
+    return round(similarity * 100, 2) > threshold
+
+def corpus_terms(paths, processor=None):
+    """
+    This function returns the corpus (unique lemmas) of every .txt in paths,
+    in the same order, using the shared document store
+    """
+    processor = processor if processor is not None else TextProcessor(None, None)
+    return [processor.document_terms(path) for path in paths]
 
 class TextProcessor:
     """
     This class contains all the functions needed to preprocess, analyze and compare the .txt files
     """
-    def __init__(self, file1, file2):
+    def __init__(self, file1, file2, word_cache=None, document_store=None, threshold=PLAGIARISM_THRESHOLD):
         self.file1 = file1
         self.file2 = file2
+        self.threshold = threshold
+        self.word_cache = word_cache if word_cache is not None else _word_cache
+        self.document_store = document_store if document_store is not None else _document_store
     
     def clean_file(self, document):
     # This function is use to clean the .txt removing points and other things 
         with open(document, encoding="utf-8") as file:
-            document = file.read().lower()
-            #Optimization done by removing the other .replace() functions and just using the for loop
-            for char in ",.¿?¡!()@#$":
-                document = document.replace(char, '')
-            # Remove extra spaces, this was added after running the tests
-            document = ' '.join(document.split())
-        return document
+            # Lowercase, remove ",.¿?¡!()@#$" with str.replace and remove extra spaces
+            return CLEAN_FILE.normalize(file.read())
 
     def make_unigram(self, document):
         # This function devides the .txt in unigrams (separetes it by words)
-        unigram = list(ngrams(document.split(),1))
+        unigram = [(word,) for word in document.split()]
         return unigram
     
-    def lemmatizer(self, unigram):
-        nlp = spacy.load('en_core_web_sm')
+    def unigram_words(self, unigram):
+        """
+        This function returns the words inside the unigram, the unigram can
+        contain tuples (as made by make_unigram) or plain strings
+        """
         words = []
         for palabra in unigram:
             if isinstance(palabra, (list, tuple)) and len(palabra) > 0 and palabra[0]:
-                word = palabra[0]
+                words.append(palabra[0])
             elif isinstance(palabra, str):
-                word = palabra
-            else:
-                continue
-
-            doc = nlp(word)
-            lemmatized_word = doc[0].lemma_
+                words.append(palabra)
+        return words
 
-            if word.lower() == "can't":
-                lemmatized_word = "can"
-            elif word.lower() == "won't":
-                lemmatized_word = "will"
-            elif word.lower() == "don't":
-                lemmatized_word = "do"
+    def lemmatizer(self, unigram, batch_size=LEMMA_BATCH_SIZE):
+        """
+        This function lemmatizes the words of the unigram with the shared spaCy pipeline,
+        only the words that aren't in the word cache are lemmatized and they are sent to spaCy in batches
+        """
+        words = self.unigram_words(unigram)
+        return self.word_cache.normalize("lemma", words, lambda missing: self._lemmatize_words(missing, batch_size))
 
-            words.append(lemmatized_word)
-        return words
+    def _lemmatize_words(self, words, batch_size):
+        # Each word is still its own spaCy document, so the lemmas are the same as nlp(word)
+        nlp = get_nlp()
+        lemmas = []
+        for word, doc in zip(words, nlp.pipe(words, batch_size=batch_size)):
+            lemmas.append(LEMMA_CONTRACTIONS.get(word.lower(), doc[0].lemma_))
+        return lemmas
         
     def stemmer(self, unigram):
-        lancaster_stemmer = LancasterStemmer()
-        words = []
-        for palabra in unigram:
-            if isinstance(palabra, (list, tuple)) and len(palabra) > 0 and palabra[0]:
-                word = palabra[0]
-            elif isinstance(palabra, str):
-                word = palabra
-            else:
-                continue
+        words = self.unigram_words(unigram)
+        return self.word_cache.normalize("stem", words, self._stem_words)
 
+    def _stem_words(self, words):
+        from nltk.stem import LancasterStemmer
+        lancaster_stemmer = LancasterStemmer()
+        stems = []
+        for word in words:
             # Special handling for contractions
             if word.lower() == "can't":
                 stemmed_word = "can"
@@ -78,8 +173,23 @@ class TextProcessor:
             else:
                 stemmed_word = lancaster_stemmer.stem(word)
 
-            words.append(stemmed_word)
-        return words
+            stems.append(stemmed_word)
+        return stems
+
+    def document_terms(self, document):
+        """
+        This function returns the corpus (unique lemmas) of a .txt, it is taken from the
+        document store so every file is cleaned and lemmatized only once while it doesn't change
+        """
+        return self.document_store.get(document, self.extract_terms)
+
+    def extract_terms(self, document):
+        """
+        This function cleans, divides in unigrams and lemmatizes a .txt and returns its corpus
+        """
+        cleaned = self.clean_file(document)
+        unigram = self.make_unigram(cleaned)
+        return self.create_corpus(self.lemmatizer(unigram))
 
     def create_corpus(self, stems):
         """
@@ -114,6 +224,7 @@ class TextProcessor:
         """
         unigram_matrix = []
         for paragraph in final_matrix:
+            paragraph = set(paragraph)
             unigram_row = [1 if word in paragraph else 0 for word in big_corpus]
             unigram_matrix.append(unigram_row)
         return unigram_matrix
@@ -124,13 +235,23 @@ class TextProcessor:
         When the cosine similarity is 1, the two .txt are the same, bigger the
         cosine similarity, means that the .txt analyzed are more similar
         """
+        from sklearn.metrics import pairwise
         return pairwise.cosine_similarity(unigram_matrix)
 
+    def set_cosine_evaluation(self, corpus1, corpus2):
+        """
+        This function gives the same similarity matrix as cosine_evaluation of the
+        unigram matrix, but it is computed from the sets of terms of the two .txt
+        without building the unigram matrix
+        """
+        similarity = binary_cosine(corpus1, corpus2)
+        return [[1.0, similarity], [similarity, 1.0]]
+
     def results(self, cosine_evaluation):
         """
         This function prints the similarity of the two .txt analyzed
         as a percentage with two decimal points if the percentage is above
-        55% the two .txt are considered similar and therefor plagiarism.
+        the threshold (50.1% by default) the two .txt are considered similar and therefor plagiarism.
         A message indicating plagiarism is printed
         """
         logger = logging.getLogger(__name__)
@@ -146,7 +267,7 @@ class TextProcessor:
             logger.error(f"Error computing similarity percentage: {e}")
             return None
         
-        if similarity_percentage > 50.1:
+        if similarity_percentage > self.threshold:
             plagiarism = "Plagiarism detected"
         else:
             plagiarism = "No plagiarism detected"
@@ -167,29 +288,12 @@ class TextProcessor:
         This function calls all the other functions in the class to analyze the .txt
         """
 
-        # Clean documents
-        document1 = self.clean_file(self.file1)
-        document2 = self.clean_file(self.file2)
-
-        # Create unigram
-        unigram1 = self.make_unigram(document1)
-        unigram2 = self.make_unigram(document2)
-        
-        # Stemming
-        stems1 = self.lemmatizer(unigram1)
-        stems2 = self.lemmatizer(unigram2)
-        
-        # Create corpus
-        corpus1 = self.create_corpus(stems1)
-        corpus2 = self.create_corpus(stems2)
-        big_corpus = self.create_big_corpus(corpus1, corpus2)
-
-        # Create matrix
-        final_matrix = self.create_matrix(stems1, stems2)
-        unigram_matrix = self.create_unigram_matrix(final_matrix, big_corpus)
+        # Clean, create unigram, lemmatize and create corpus (once per document)
+        corpus1 = self.document_terms(self.file1)
+        corpus2 = self.document_terms(self.file2)
 
-        # Cosine evaluation
-        similarity_score = self.cosine_evaluation(unigram_matrix)
+        # Cosine evaluation, the vectors are binary so the sets of terms are enough
+        similarity_score = self.set_cosine_evaluation(corpus1, corpus2)
     
         # The results are returned
         result = self.results(similarity_score)
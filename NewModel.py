@@ -1,34 +1,183 @@
+from __future__ import annotations
 import os
 import glob
+import hashlib
 import logging
-import string
-from matplotlib import pyplot as plt
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
-from nltk.stem import WordNetLemmatizer
-from transformers import AutoTokenizer, AutoModel
-import torch
-import nltk
-from Model import TextProcessor
-from tabulate import tabulate
-from sklearn.metrics import roc_auc_score, roc_curve
-nltk.download('stopwords')
-nltk.download('punkt')
+import time
+from EmbeddingStore import EmbeddingStore
+from InferenceBackend import InferenceBackend, get_torch
+from Corpus import ReferenceCorpus
+from VectorIndex import FlatIndex, IVFIndex, CompressedIndex, best_documents
+from Cascade import PREFILTERS, LexicalPrefilter, cascade_stats, term_sets
+from Normalization import new_model_normalizer
+from Evaluation import LABELS_FILE, evaluate, format_report, load_labels, save_plots
+import numpy as np
+# torch, transformers, NLTK and matplotlib take seconds to import,
+# they are imported the first time they are used
+
+# Folder where the NLTK resources are looked for (besides the usual NLTK folders), nothing is
+# downloaded while working: download_nltk_resources downloads them once
+NLTK_DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nltk_data')
+
+# NLTK resources used by _preprocess_text: name -> path inside the NLTK data folder
+NLTK_RESOURCES = {
+    'stopwords': 'corpora/stopwords',
+    'wordnet': 'corpora/wordnet',
+}
+
+# Cómo se combinan los tokens en un embedding (promedio sin el relleno), es parte del id de los embeddings
+# guardados para no mezclar los de otro pooling
+POOLING_ID = 'pool=masked-v2'
+
+def configure_nltk_data(path: str = NLTK_DATA_PATH) -> None:
+    """
+    This function makes NLTK look for its resources in path before its usual folders
+    """
+    import nltk
+    if path not in nltk.data.path:
+        nltk.data.path.insert(0, path)
+
+def missing_nltk_resources() -> list:
+    """
+    This function returns the names of the NLTK resources that aren't in any data folder,
+    it only looks at the disk
+    """
+    import nltk
+    missing = []
+    for name, resource in NLTK_RESOURCES.items():
+        try:
+            nltk.data.find(resource)
+        except LookupError:
+            missing.append(name)
+    return missing
+
+def download_nltk_resources(path: str = NLTK_DATA_PATH) -> None:
+    """
+    This function downloads the NLTK resources to path, it only has to be run once
+    """
+    import nltk
+    for name in NLTK_RESOURCES:
+        nltk.download(name, download_dir=path, quiet=True)
+
+# Normalizador de cada proceso de evaluate_directory(workers=N), se crea una vez por proceso
+_worker_normalizer = None
+
+def init_preprocess_worker(nltk_data_dir: str) -> None:
+    """
+    This function prepares each process that preprocesses texts, the stopwords and WordNet
+    are loaded only once per process
+    """
+    global _worker_normalizer
+    from nltk.corpus import stopwords
+    from nltk.stem import WordNetLemmatizer
+    configure_nltk_data(nltk_data_dir)
+    _worker_normalizer = new_model_normalizer(frozenset(stopwords.words('english')), WordNetLemmatizer().lemmatize)
+
+def preprocess_in_worker(text: str) -> str:
+    # This function runs in the workers, it is similarityCalculation._preprocess_text
+    return _worker_normalizer.normalize(text)
+
+def add_search_arguments(parser) -> None:
+    """
+    This function adds to an argparse parser the options of how the originals are searched:
+    the index, the compression of the embeddings and the lexical prefilter of the cascade
+    """
+    parser.add_argument("--index", choices=("flat", "ivf"), default="flat", help="exact ('flat') or k-means inverted lists ('ivf')")
+    parser.add_argument("--ivf-lists", type=int, default=None, help="inverted lists of the IVF index (default sqrt of the rows)")
+    parser.add_argument("--nprobe", type=int, default=8, help="inverted lists searched by the IVF index")
+    parser.add_argument("--compression", choices=("int8", "pq"), default=None, help="compressed embeddings of the originals")
+    parser.add_argument("--pq-subspaces", type=int, default=96)
+    parser.add_argument("--rerank", type=int, default=10, help="originals scored again with the full embeddings")
+    parser.add_argument("--prefilter", choices=PREFILTERS, default=None, help="lexical stage before the transformer")
+    parser.add_argument("--prefilter-k", type=int, default=10, help="originals the lexical stage keeps for each text")
+
+def search_options(args) -> dict:
+    """
+    This function returns the arguments of similarityCalculation from the options of add_search_arguments
+    """
+    return {"index_type": args.index, "ivf_lists": args.ivf_lists, "ivf_nprobe": args.nprobe,
+            "compression": args.compression, "pq_subspaces": args.pq_subspaces, "rerank": args.rerank,
+            "prefilter": args.prefilter, "prefilter_k": args.prefilter_k}
 
 class similarityCalculation:
-    def __init__(self, documents_dir: str, percentaje_simil: float, metric: str = 'cosine') -> None:
+    def __init__(self, documents_dir: str, percentaje_simil: float, metric: str = 'cosine', embedding_store_dir: str = None,
+                 chunk_size: int = None, chunk_stride: int = 384, chunk_aggregation: str = 'max',
+                 index_type: str = 'flat', ivf_lists: int = None, ivf_nprobe: int = 8,
+                 compression: str = None, pq_subspaces: int = 96, rerank: int = 10,
+                 backend: InferenceBackend = None, nltk_data_dir: str = NLTK_DATA_PATH, prefilter: str = None,
+                 prefilter_k: int = 10) -> None:
+        from nltk.corpus import stopwords
+        from nltk.stem import WordNetLemmatizer
+        from transformers import AutoTokenizer, AutoModel
+        configure_nltk_data(nltk_data_dir)
+        self.nltk_data_dir = nltk_data_dir
+        missing = missing_nltk_resources()
+        if missing:
+            raise LookupError(
+                f"Faltan los recursos de NLTK {missing}, se descargan una vez con: "
+                f"python3 -c \"import NewModel; NewModel.download_nltk_resources()\""
+            )
         self.lemmatizer = WordNetLemmatizer()
         self.documents_dir = documents_dir
         self.percentaje_simil = percentaje_simil
-        self.stop_words = set(stopwords.words('english'))
-        self.tokenizer = AutoTokenizer.from_pretrained("roberta-base")
-        self.model = AutoModel.from_pretrained("roberta-base")
+        self.stop_words = frozenset(stopwords.words('english'))
+        # Perfil de normalización de _preprocess_text: la puntuación se quita con una clase de caracteres precompilada,
+        # el tokenizador de NLTK como regex, stopwords en un frozenset y lemas memorizados
+        self.normalizer = new_model_normalizer(self.stop_words, self.lemmatizer.lemmatize)
+        self.model_name = "roberta-base"
+        self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+        # Cómo corre el modelo en CPU: int8 dinámico, bf16, hilos (por defecto fp32 sin cambios)
+        self.backend = backend if backend is not None else InferenceBackend()
+        self.model = self.backend.prepare(AutoModel.from_pretrained(self.model_name))
         self.metric = metric  # Añadido para seleccionar la métrica
-        self.auc_list = []
+        # Con chunk_size los textos se dividen en ventanas de chunk_size tokens que avanzan chunk_stride tokens,
+        # cada documento se puntúa con la máxima ('max') o la media ('mean') de las similitudes de sus ventanas
+        self.chunk_size = chunk_size
+        self.chunk_stride = chunk_stride
+        self.chunk_aggregation = chunk_aggregation
+        self.embedding_id = f"{self.model_name}|{POOLING_ID}"
+        if chunk_size:
+            self.embedding_id += f"|chunks={chunk_size}/{chunk_stride}"
+        if self.backend.id != 'fp32':
+            self.embedding_id += f"|{self.backend.id}"
+        # Embeddings de los originales: nombre -> (hash del contenido, embedding_id, una fila por ventana);
+        # con compression la tercera parte es None porque los embeddings solo están en el almacén en disco
+        self._reference_embeddings = {}
+        self._reference_names = []
+        self._reference_index = None
+        # Embeddings guardados en disco entre ejecuciones (opcional)
+        self.embedding_store = EmbeddingStore(embedding_store_dir, self.embedding_id) if embedding_store_dir else None
+        # Búsqueda exacta ('flat') o aproximada con listas invertidas de k-means ('ivf') para corpus grandes,
+        # el índice IVF se guarda junto a los embeddings
+        if index_type not in ('flat', 'ivf'):
+            raise ValueError("index_type debe ser 'flat' o 'ivf'")
+        self.index_type = index_type
+        self.ivf_lists = ivf_lists
+        self.ivf_nprobe = ivf_nprobe
+        self.ivf_path = os.path.join(embedding_store_dir, 'ivf.npz') if embedding_store_dir else None
+        # Con compression ('int8' o 'pq') la búsqueda exacta se hace sobre códigos comprimidos y los
+        # rerank mejores originales se vuelven a puntuar con los embeddings completos
+        if compression not in (None, 'int8', 'pq') or (compression and index_type != 'flat'):
+            raise ValueError("compression debe ser None, 'int8' o 'pq' y solo se usa con index_type='flat'")
+        if compression and self.embedding_store is None:
+            raise ValueError("compression necesita embedding_store_dir: los embeddings completos se leen del almacén en disco")
+        self.compression = compression
+        self.pq_subspaces = pq_subspaces
+        self.rerank = rerank
+        # Cascada: con prefilter ('terms' o 'minhash') una etapa léxica elige los prefilter_k originales más
+        # parecidos a cada texto y solo esos se embeben y se puntúan con el transformer
+        if prefilter is not None and (prefilter not in PREFILTERS or index_type != 'flat' or compression):
+            raise ValueError("prefilter debe ser 'terms' o 'minhash' y solo se usa con index_type='flat' sin compression")
+        self.prefilter = LexicalPrefilter(prefilter) if prefilter else None
+        self.prefilter_k = prefilter_k
+        self.cascade_stats = cascade_stats()
+        # Textos preprocesados de los originales, solo se vuelven a procesar los archivos que cambian
+        self.corpus = ReferenceCorpus(documents_dir, self._preprocess_text)
         logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s\n%(message)s')
 
-    def plagiarismDetection(self, input_file_path: str):
-        files_and_content_processed = self.dataBaseProcessing()
+    def plagiarismDetection(self, input_file_path: str, files_and_content_processed: dict = None):
+        if files_and_content_processed is None:
+            files_and_content_processed = self.dataBaseProcessing()
         input_text = self._read_file(input_file_path)
         preprocessed_input_text = self._preprocess_text(input_text)
         
@@ -43,100 +192,242 @@ class similarityCalculation:
         return is_plagiarism, None, similarity_score, is_tp
 
     def similarityComparison(self, input_file_name: str, preprocessed_input_text: str, files_and_content: dict):
-        input_embedding = self._get_embedding(preprocessed_input_text)
         best_score = float('-inf') if self.metric == 'cosine' else float('inf')
         most_similar_file = None
 
-        for file_name, content in files_and_content.items():
-            content_embedding = self._get_embedding(content)
-            if self.metric == 'cosine':
-                similarity = self._cosine_similarity(input_embedding, content_embedding)
-                if similarity > best_score:
-                    best_score = similarity
-                    most_similar_file = file_name
-            elif self.metric == 'euclidean':
-                distance = self._euclidean_distance(input_embedding, content_embedding)
-                if distance < best_score:
-                    best_score = distance
-                    most_similar_file = file_name
+        if self.prefilter is not None:
+            best = self.similaritySearch([preprocessed_input_text], files_and_content, k=1)[0].get(self.metric)
+            return tuple(best[0]) if best else (most_similar_file, best_score)
+
+        index = self._reference_embedding_index(files_and_content)
+        if index is None or self.metric not in ('cosine', 'euclidean'):
+            return most_similar_file, best_score
+
+        # Un solo producto de matrices contra todas las ventanas de todos los originales
+        input_embeddings = self._document_embeddings([preprocessed_input_text])
+        scores = self._document_scores(index, input_embeddings, self.metric)[0]
+        best_index = int(np.argmax(scores)) if self.metric == 'cosine' else int(np.argmin(scores))
 
         # logging.debug(f'Archivo más similar: {most_similar_file} con un puntaje de {best_score}')
         # print(f"Plagiarism detected between {input_file_name} and {most_similar_file}")
         # print(f"Score: {best_score:.2f}")
         
-        return most_similar_file, best_score
+        return index.names[best_index], float(scores[best_index])
 
-    def dataBaseProcessing(self) -> dict:
-        files_and_content_processed = self._uploadDocuments(self.documents_dir)
-        return files_and_content_processed
+    def similaritySearch(self, preprocessed_texts: list, files_and_content: dict, k: int = 5) -> list:
+        # Los k originales más parecidos a cada texto, con las dos métricas y en una sola llamada
+        if self.prefilter is not None:
+            return self._cascade_search(preprocessed_texts, files_and_content, k)
+        index = self._reference_embedding_index(files_and_content)
+        if index is None or not preprocessed_texts:
+            return [{'cosine': [], 'euclidean': []} for _ in preprocessed_texts]
+        input_embeddings = self._document_embeddings(preprocessed_texts)
+        results = [{} for _ in preprocessed_texts]
+        for metric in ('cosine', 'euclidean'):
+            scores = self._document_scores(index, input_embeddings, metric)
+            for result, best in zip(results, best_documents(index.names, scores, k, metric)):
+                result[metric] = best
+        return results
 
-    def _preprocess_text(self, text: str) -> str:
-        text = text.lower()
-        text = text.translate(str.maketrans('', '', string.punctuation))
-        tokens = word_tokenize(text)
-        tokens = [token for token in tokens if token.isalpha() and token not in self.stop_words]
-        tokens = [self.lemmatizer.lemmatize(token) for token in tokens]
-        return ' '.join(tokens)
+    def _cascade_search(self, preprocessed_texts: list, files_and_content: dict, k: int) -> list:
+        # Primera etapa: términos en común con cada original; segunda: el transformer solo contra la lista corta
+        results = [{'cosine': [], 'euclidean': []} for _ in preprocessed_texts]
+        names = list(files_and_content)
+        if not names or not preprocessed_texts:
+            return results
+        start = time.perf_counter()
+        key = tuple((name, self.corpus.text_hash(name, text)) for name, text in files_and_content.items())
+        self.prefilter.fit(names, term_sets(files_and_content.values()), key=key)
+        shortlist = self.prefilter.shortlist(term_sets(preprocessed_texts), max(self.prefilter_k, k))
+        self.cascade_stats['lexical_seconds'] += time.perf_counter() - start
 
-    def evaluate_directory(self, evaluation_dir: str):
+        start = time.perf_counter()
+        candidates = np.unique(shortlist)
+        selected = [names[i] for i in candidates]
+        embedded = self._update_reference_embeddings(files_and_content, selected)
+        blocks = [self._reference_embeddings[name][2] for name in selected]
+        index = FlatIndex(selected, np.concatenate([block.numpy() for block in blocks]), [len(block) for block in blocks])
+        input_embeddings = self._document_embeddings(preprocessed_texts)
+        # Solo cuentan los originales de la lista corta de cada texto
+        allowed = np.zeros((len(preprocessed_texts), len(selected)), dtype=bool)
+        np.put_along_axis(allowed, np.searchsorted(candidates, shortlist), True, axis=1)
+        for metric in ('cosine', 'euclidean'):
+            scores = self._document_scores(index, input_embeddings, metric)
+            scores[~allowed] = -np.inf if metric == 'cosine' else np.inf
+            for result, best in zip(results, best_documents(index.names, scores, k, metric)):
+                result[metric] = best
+        self.cascade_stats['transformer_seconds'] += time.perf_counter() - start
+        self.cascade_stats['queries'] += len(preprocessed_texts)
+        self.cascade_stats['comparisons'] += int(allowed.sum())
+        self.cascade_stats['full_comparisons'] += len(preprocessed_texts) * len(names)
+        self.cascade_stats['originals_embedded'] += embedded
+        return results
 
-        evaluation_files = glob.glob(os.path.join(evaluation_dir, '*.txt'))
-        
-        print("\nResults:")
-
-        for file in evaluation_files:
-            is_plagiarism, similar_file, similarity_score, is_tp = self.plagiarismDetection(file)
-            
-            if is_plagiarism:
-                similar_file= "originals/" + similar_file
-                processor = TextProcessor(file, similar_file)
-                result = processor.process()
-                if result:
-                    print(tabulate([result], headers="keys", tablefmt="pretty"))
-                if result["Plagiarism"] == "Plagiarism detected":
-                    self.auc_list.append(1)
+    def _document_scores(self, index: FlatIndex, input_embeddings: list, metric: str) -> np.ndarray:
+        # Puntaje de cada texto contra cada original; con ventanas, cada ventana del texto toma su mejor
+        # ventana de cada original y después se combinan con la máxima ('max') o la media ('mean')
+        rows = np.concatenate([embeddings.numpy() for embeddings in input_embeddings])
+        row_scores = index.scores(rows, metric)
+        starts = np.concatenate(([0], np.cumsum([len(embeddings) for embeddings in input_embeddings])[:-1]))
+        if self.chunk_aggregation == 'mean':
+            return np.add.reduceat(row_scores, starts, axis=0) / np.array([len(e) for e in input_embeddings])[:, None]
+        reduce = np.maximum if metric == 'cosine' else np.minimum
+        return reduce.reduceat(row_scores, starts, axis=0)
+
+    def _update_reference_embeddings(self, files_and_content: dict, names: list) -> int:
+        # Solo se calcula el embedding de los originales de names nuevos o cuyo contenido cambió,
+        # regresa cuántos se calcularon o se leyeron del almacén
+        for file_name in set(self._reference_embeddings) - set(files_and_content):
+            del self._reference_embeddings[file_name]
+        missing = {}
+        for file_name in names:
+            content = files_and_content[file_name]
+            content_hash = self.corpus.text_hash(file_name, content)
+            cached = self._reference_embeddings.get(file_name)
+            if cached is None or cached[0] != content_hash or cached[1] != self.embedding_id:
+                missing[file_name] = (content_hash, content)
+
+        for file_name, embeddings in self._stored_embeddings(missing).items():
+            self._reference_embeddings[file_name] = (missing[file_name][0], self.embedding_id, embeddings)
+        if missing:
+            # El índice de todos los originales ya no corresponde a los embeddings
+            self._reference_names = []
+        return len(missing)
+
+    def _reference_embedding_index(self, files_and_content: dict):
+        names = list(files_and_content)
+        missing = self._update_reference_embeddings(files_and_content, names)
+        if missing or names != self._reference_names:
+            self._reference_names = names
+            self._reference_index = None
+            if names and self.compression:
+                self._reference_index = self._compressed_index(names)
+            elif names:
+                blocks = [self._reference_embeddings[name][2] for name in names]
+                if self.index_type == 'ivf':
+                    self._reference_index = self._ivf_index(names, blocks)
                 else:
-                    self.auc_list.append(0)
+                    self._reference_index = FlatIndex(names, np.concatenate([block.numpy() for block in blocks]), [len(block) for block in blocks])
+
+        return self._reference_index
+
+    def _ivf_index(self, names: list, blocks: list) -> IVFIndex:
+        # Se reutiliza el índice guardado si se construyó con los mismos originales, contenidos y parámetros
+        fingerprint = hashlib.sha1(repr((
+            self.embedding_id, self.ivf_lists,
+            [(name, self._reference_embeddings[name][0]) for name in names]
+        )).encode('utf-8')).hexdigest()
+        # El archivo solo tiene las listas, los vectores se leen del almacén en disco
+        index = IVFIndex.load(self.ivf_path, self._stored_rows(names), fingerprint) if self.ivf_path else None
+        if index is None:
+            index = IVFIndex(names, np.concatenate([block.numpy() for block in blocks]), [len(block) for block in blocks], n_lists=self.ivf_lists)
+            if self.ivf_path:
+                index.save(self.ivf_path, fingerprint)
+        index.nprobe = self.ivf_nprobe
+        return index
+
+    def _store_rows(self, names: list) -> np.ndarray:
+        # Filas del almacén en disco de las ventanas de cada original, en el orden de names
+        entries = [self.embedding_store.rows[name] for name in names]
+        return np.concatenate([np.arange(entry['row'], entry['row'] + entry.get('rows', 1)) for entry in entries])
+
+    def _stored_rows(self, names: list) -> np.ndarray:
+        # Los embeddings de names leídos del memmap del almacén; sin copia cuando las filas son consecutivas
+        rows = self._store_rows(names)
+        if len(rows) and np.array_equal(rows, np.arange(rows[0], rows[0] + len(rows))):
+            return self.embedding_store.matrix[rows[0]:rows[0] + len(rows)]
+        return self.embedding_store.matrix[rows]
+
+    def _compressed_index(self, names: list) -> CompressedIndex:
+        # Los códigos se calculan por bloques de filas del memmap del almacén en disco y para volver a puntuar
+        # solo se leen las filas de los mejores originales: la matriz completa nunca se copia a memoria
+        store = self.embedding_store
+        full_rows = self._store_rows(names)
+        return CompressedIndex(
+            names, None, [store.rows[name].get('rows', 1) for name in names], method=self.compression,
+            subspaces=self.pq_subspaces, rerank=self.rerank, full_embeddings=store.matrix, full_rows=full_rows
+        )
+
+    def _stored_embeddings(self, documents: dict) -> dict:
+        # Primero se busca en el almacén en disco, los que no están se calculan juntos y se guardan
+        embeddings = {}
+        to_embed = []
+        for file_name, (content_hash, content) in documents.items():
+            stored = self.embedding_store.get_block(file_name, content_hash) if self.embedding_store is not None else None
+            if stored is not None:
+                # Con compression no se copian a memoria, el índice los lee del almacén
+                embeddings[file_name] = None if self.compression else get_torch().from_numpy(np.array(stored))
             else:
-                self.auc_list.append(0)
+                to_embed.append(file_name)
 
-        # Datos de ejemplo con etiquetas reales
-        labels = [0, 0, 0, 0, 1, 0, 0, 0, 0, 1, 0, 0, 1, 1, 1, 1, 1, 1, 1, 1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1, 0, 0, 1, 1, 1, 1, 1, 1, 1, 1]
-        
+        if to_embed:
+            computed = self._document_embeddings([documents[file_name][1] for file_name in to_embed])
+            for file_name, document_embeddings in zip(to_embed, computed):
+                embeddings[file_name] = None if self.compression else document_embeddings
+                if self.embedding_store is not None:
+                    self.embedding_store.put(file_name, documents[file_name][0], document_embeddings.numpy())
+            if self.embedding_store is not None:
+                self.embedding_store.save()
 
+        return embeddings
 
-        # Calcula el AUC-ROC
-        auc = roc_auc_score(self.auc_list, labels)
-        print(f"AUC-ROC: {auc:.2f}")
-
-        # Genera la curva ROC
-        fpr, tpr, thresholds = roc_curve(self.auc_list, labels)
-
-        plt.figure()
-        plt.plot(fpr, tpr, color='darkorange', lw=2, label='ROC curve (area = %0.2f)' % auc)
-        plt.plot([0, 1], [0, 1], color='navy', lw=2, linestyle='--')
-        plt.xlim([0.0, 1.0])
-        plt.ylim([0.0, 1.05])
-        plt.xlabel('False Positive Rate')
-        plt.ylabel('True Positive Rate')
-        plt.title('Receiver Operating Characteristic')
-        plt.legend(loc="lower right")
-        plt.show()
-
-        return auc
-
-    def _uploadDocuments(self, documents_dir: str) -> dict:
-        files_and_content = {}
-        txt_files = [f for f in os.listdir(documents_dir) if f.endswith('.txt')]
-        for file_name in txt_files:
-            try:
-                with open(os.path.join(documents_dir, file_name), 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    files_and_content[file_name] = self._preprocess_text(content)
-                    logging.debug(f'Read file: {file_name}')
-            except Exception as e:
-                logging.error(f'Error al leer el archivo {file_name}: {e}')
-        return files_and_content
+    def dataBaseProcessing(self) -> dict:
+        files_and_content_processed = self.corpus.refresh()
+        return files_and_content_processed
+
+    def _preprocess_text(self, text: str) -> str:
+        # Minúsculas, sin puntuación, las palabras de word_tokenize sin stopwords y lematizadas
+        return self.normalizer.normalize(text)
+
+    def _preprocess_texts(self, texts: list, workers: int = 1) -> list:
+        # Con workers > 1 los textos se reparten entre procesos, los resultados quedan en el mismo orden
+        if workers <= 1 or len(texts) < 2:
+            return [self._preprocess_text(text) for text in texts]
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=init_preprocess_worker, initargs=(self.nltk_data_dir,)) as executor:
+            return list(executor.map(preprocess_in_worker, texts, chunksize=max(1, len(texts) // (4 * workers))))
+
+    def evaluate_directory(self, evaluation_dir: str, manifest: str = None, plot_dir: str = None,
+                           workers: int = 1) -> dict:
+        """
+        Evalúa los archivos etiquetados de evaluation_dir sin abrir ventanas: las etiquetas se leen del
+        manifiesto (por defecto evaluation_dir/labels.csv), todos los archivos se puntúan en un solo lote
+        y el AUC-ROC, la precisión/recall y el barrido de umbrales se calculan en una pasada.
+        Las curvas solo se guardan como imágenes cuando se da plot_dir. Con workers > 1 los archivos
+        se limpian y lematizan en varios procesos
+        """
+        labels_by_file = load_labels(manifest or os.path.join(evaluation_dir, LABELS_FILE))
+        evaluation_files = sorted(f for f in glob.glob(os.path.join(evaluation_dir, '*.txt')) if os.path.basename(f) in labels_by_file)
+        missing = set(labels_by_file) - {os.path.basename(f) for f in evaluation_files}
+        if missing:
+            logging.warning(f"Archivos del manifiesto que no están en {evaluation_dir}: {sorted(missing)}")
+
+        # Los originales se cargan una sola vez y los sospechosos se embeben juntos
+        files_and_content_processed = self.dataBaseProcessing()
+        texts = self._preprocess_texts([self._read_file(file) for file in evaluation_files], workers)
+        self.cascade_stats = cascade_stats()
+        found = self.similaritySearch(texts, files_and_content_processed, k=1)
+        best = [result[self.metric][0] if result[self.metric] else (None, np.nan) for result in found]
+        scores = np.array([score for _, score in best], dtype=np.float64)
+        labels = np.array([labels_by_file[os.path.basename(file)] for file in evaluation_files])
+
+        # Con la distancia euclidiana los valores pequeños indican plagio
+        report = evaluate(labels, scores, threshold=self.percentaje_simil, greater_is_positive=self.metric != 'euclidean')
+        report["files"] = [os.path.basename(file) for file in evaluation_files]
+        report["most_similar"] = [name for name, _ in best]
+        report["scores"] = scores
+        report["labels"] = labels
+        if plot_dir:
+            report["plots"] = save_plots(report, plot_dir)
+        print(format_report(report))
+        if self.prefilter is not None:
+            report["cascade"] = dict(self.cascade_stats)
+            print(f"Cascada: etapa léxica {report['cascade']['lexical_seconds']:.3f} s, transformer "
+                  f"{report['cascade']['transformer_seconds']:.2f} s, {report['cascade']['comparisons']} de "
+                  f"{report['cascade']['full_comparisons']} comparaciones")
+        return report
 
     def _read_file(self, path: str) -> str:
         try:
@@ -148,13 +439,60 @@ class similarityCalculation:
         return content
 
     def _get_embedding(self, text: str) -> torch.Tensor:
-        inputs = self.tokenizer(text, return_tensors='pt', padding=True, truncation=True, max_length=512)
-        with torch.no_grad():
-            outputs = self.model(**inputs)
-        return outputs.last_hidden_state.mean(dim=1)
+        return self._get_embeddings([text])
+
+    def _get_embeddings(self, texts: list, batch_size: int = 16) -> torch.Tensor:
+        if not texts:
+            return get_torch().zeros((0, self.model.config.hidden_size))
+        encoded = self.tokenizer(texts, truncation=True, max_length=512)
+        return self._embed_token_ids(encoded['input_ids'], batch_size)
+
+    def _document_embeddings(self, texts: list) -> list:
+        # Una matriz por texto: una sola fila, o una fila por ventana si se usan ventanas
+        if self.chunk_size:
+            return self._get_chunk_embeddings(texts)
+        return [embedding.unsqueeze(0) for embedding in self._get_embeddings(texts)]
+
+    def _get_chunk_embeddings(self, texts: list, batch_size: int = 16) -> list:
+        torch = get_torch()
+        # Ventanas de chunk_size tokens que se solapan chunk_size - chunk_stride tokens,
+        # las ventanas de todos los textos se procesan juntas en los mismos lotes
+        max_chunk = self.tokenizer.model_max_length - self.tokenizer.num_special_tokens_to_add()
+        if self.chunk_size > max_chunk:
+            raise ValueError(f'chunk_size must be at most {max_chunk} tokens')
+        if not 0 < self.chunk_stride <= self.chunk_size:
+            raise ValueError('chunk_stride must be between 1 and chunk_size')
+        if not texts:
+            return []
+        encoded = self.tokenizer(
+            texts, truncation=True, max_length=self.chunk_size + self.tokenizer.num_special_tokens_to_add(),
+            stride=self.chunk_size - self.chunk_stride, return_overflowing_tokens=True
+        )
+        embeddings = self._embed_token_ids(encoded['input_ids'], batch_size)
+        chunks_per_text = torch.bincount(torch.tensor(encoded['overflow_to_sample_mapping']), minlength=len(texts))
+        return list(torch.split(embeddings, chunks_per_text.tolist()))
+
+    def _embed_token_ids(self, input_ids: list, batch_size: int = 16) -> torch.Tensor:
+        # Se ordena por longitud y cada lote solo se rellena hasta su secuencia más larga
+        order = sorted(range(len(input_ids)), key=lambda i: len(input_ids[i]))
+        embeddings = [None] * len(input_ids)
+        with self.backend.context():
+            for start in range(0, len(order), batch_size):
+                batch = order[start:start + batch_size]
+                inputs = self.tokenizer.pad([{'input_ids': input_ids[i]} for i in batch], return_tensors='pt')
+                outputs = self.model(**inputs)
+                pooled = self._mean_pooling(outputs.last_hidden_state.float(), inputs['attention_mask'])
+                for i, embedding in zip(batch, pooled):
+                    embeddings[i] = embedding
+        return get_torch().stack(embeddings)
+
+    def _mean_pooling(self, last_hidden_state: torch.Tensor, attention_mask: torch.Tensor) -> torch.Tensor:
+        # Promedio solo de los tokens reales, sin contar el relleno
+        mask = attention_mask.unsqueeze(-1).to(last_hidden_state.dtype)
+        return (last_hidden_state * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)
 
     def _cosine_similarity(self, tensor1: torch.Tensor, tensor2: torch.Tensor) -> float:
-        return torch.nn.functional.cosine_similarity(tensor1, tensor2).item()
+        return get_torch().nn.functional.cosine_similarity(tensor1, tensor2).item()
 
     def _euclidean_distance(self, tensor1: torch.Tensor, tensor2: torch.Tensor) -> float:
-        return torch.dist(tensor1, tensor2).item()
+        return get_torch().dist(tensor1, tensor2).item()
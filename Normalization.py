@@ -0,0 +1,112 @@
+import re
+import string
+from functools import lru_cache
+# Importation of the libraries needed for the code
+
+# Characters TextProcessor.clean_file removes
+CLEAN_FILE_CHARACTERS = ",.¿?¡!()@#$"
+
+# Up to this many characters are deleted with str.replace (each one is found with a fast scan),
+# more characters are deleted with one precompiled character class
+FEW_CHARACTERS = 16
+
+# Distinct words whose lemma is remembered by each Normalizer, the least recently used are forgotten
+# so a normalizer that lives as long as the server doesn't keep growing
+LEMMA_CACHE_SIZE = 100000
+
+# Characters NLTKWordTokenizer (nltk 3.10) always makes separate tokens when the ASCII punctuation
+# is already removed: the unicode quotes and the figure, en and em dashes and the horizontal bar.
+# They are never alphabetic, so for the alphabetic tokens they work as spaces
+WORD_SEPARATORS = re.compile("[«“‘„»”’‒–—―]")
+
+# The contractions NLTKWordTokenizer divides in two tokens ("cannot" -> "can not") that don't need
+# an apostrophe, the ones with an apostrophe can't happen once the punctuation is removed.
+# The lookahead of the first letter only tries the alternatives at the start of those words
+CONTRACTIONS = re.compile(
+    r"(?i)\b(?=[cglw])(?:(can)(not)\b|(gim)(me)\b|(gon)(na)\b|(got)(ta)\b|(lem)(me)\b|(wan)(na)(?=\s|$))"
+)
+
+def _split_contraction(match: re.Match) -> str:
+    # The two groups of the contraction that matched are the last two that took part
+    return f" {match.group(match.lastindex - 1)} {match.group(match.lastindex)} "
+
+def split_words(text: str) -> list:
+    """
+    This function divides a text that has no ASCII punctuation in words, it gives the same
+    alphabetic tokens as NLTKWordTokenizer (the tokenizer of word_tokenize)
+    """
+    return CONTRACTIONS.sub(_split_contraction, WORD_SEPARATORS.sub(' ', text)).split()
+
+class Normalizer:
+    """
+    This class is a text normalization profile: the text is lowercased, the characters of delete are
+    removed, the text is divided in tokens (tokenizer 'split' for the whitespace, 'words' for the words
+    of NLTK), the tokens that aren't alphabetic (alpha_only) or are in stop_words are dropped and every
+    token is lemmatized once (the last lemma_cache_size lemmas are memoized)
+    """
+    def __init__(self, delete: str = "", tokenizer: str = "split", alpha_only: bool = False, stop_words=(),
+                 lemmatize=None, lemma_cache_size: int = LEMMA_CACHE_SIZE) -> None:
+        if tokenizer not in ("split", "words"):
+            raise ValueError("tokenizer must be 'split' or 'words'")
+        # Not str.translate: with texts that aren't only ASCII it is slower than str.replace and a character class
+        self.delete = delete
+        self.delete_pattern = re.compile(f"[{re.escape(delete)}]+") if len(delete) > FEW_CHARACTERS else None
+        self.tokenizer = split_words if tokenizer == "words" else str.split
+        self.alpha_only = alpha_only
+        self.stop_words = frozenset(stop_words)
+        self.lemmatize = lemmatize
+        self.lemma = lru_cache(maxsize=lemma_cache_size)(lemmatize) if lemmatize is not None else None
+
+    def remove_characters(self, text: str) -> str:
+        if self.delete_pattern is not None:
+            return self.delete_pattern.sub('', text)
+        for char in self.delete:
+            text = text.replace(char, '')
+        return text
+
+    def tokens(self, text: str, lowered: bool = False) -> list:
+        """
+        This function returns the normalized tokens of a text, lowered=True when it is already lowercased
+        """
+        tokens = self.tokenizer(self.remove_characters(text if lowered else text.lower()))
+        if self.alpha_only or self.stop_words:
+            stop_words = self.stop_words
+            alpha_only = self.alpha_only
+            tokens = [token for token in tokens if (not alpha_only or token.isalpha()) and token not in stop_words]
+        if self.lemma is not None:
+            lemma = self.lemma
+            tokens = [lemma(token) for token in tokens]
+        return tokens
+
+    def normalize(self, text: str, lowered: bool = False) -> str:
+        """
+        This function returns the normalized tokens joined by one space
+        """
+        return ' '.join(self.tokens(text, lowered))
+
+def normalize_all(text: str, normalizers: list) -> list:
+    """
+    This function normalizes the same text with several profiles, it is lowercased only once
+    """
+    lowered = text.lower()
+    return [normalizer.normalize(lowered, lowered=True) for normalizer in normalizers]
+
+def normalize_file(path: str, normalizers: list) -> list:
+    """
+    This function reads a .txt once and returns its text normalized with every profile,
+    for example CLEAN_FILE for TextProcessor and the normalizer of NewModel
+    """
+    with open(path, encoding="utf-8") as file:
+        return normalize_all(file.read(), normalizers)
+
+def text_processor_normalizer() -> Normalizer:
+    # Profile of TextProcessor.clean_file
+    return Normalizer(CLEAN_FILE_CHARACTERS)
+
+def new_model_normalizer(stop_words, lemmatize) -> Normalizer:
+    # Profile of similarityCalculation._preprocess_text: without punctuation, the words of NLTK,
+    # only alphabetic words that aren't stop words, lemmatized
+    return Normalizer(string.punctuation, tokenizer="words", alpha_only=True, stop_words=stop_words, lemmatize=lemmatize)
+
+# Profile of TextProcessor.clean_file, shared by every TextProcessor
+CLEAN_FILE = text_processor_normalizer()
@@ -0,0 +1,76 @@
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import Model
+from Model import TextProcessor, corpus_terms
+# Importation of the libraries needed for the code
+
+def init_worker(word_cache_size, word_cache_path):
+    """
+    This function prepares each process of the pool, the spaCy pipeline is loaded
+    only once per process and the word cache uses the same disk store as the main process
+    """
+    Model.configure_word_cache(word_cache_size, word_cache_path)
+    Model.get_nlp()
+
+def extract_terms(path):
+    # This function runs in the workers, it cleans and lemmatizes one .txt
+    return TextProcessor(None, None).extract_terms(path)
+
+class WorkerPool:
+    """
+    This class runs the preprocessing and the scoring in a pool of processes,
+    the results always come back in the same order as the serial execution.
+    With one worker everything runs in the current process
+    """
+    def __init__(self, workers=1):
+        self.workers = workers
+        self.executor = None
+        if workers > 1:
+            word_cache = Model.get_word_cache()
+            self.executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=init_worker,
+                initargs=(word_cache.max_size, word_cache.path),
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def map(self, function, tasks):
+        """
+        This function is a generator of function(*task) for every task in order, only
+        a few tasks per worker are sent at the same time so the memory stays bounded
+        """
+        if self.executor is None:
+            for task in tasks:
+                yield function(*task)
+            return
+        pending = deque()
+        for task in tasks:
+            pending.append(self.executor.submit(function, *task))
+            if len(pending) >= 2 * self.workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+    def document_terms(self, paths, processor=None):
+        """
+        This function returns the corpus of every .txt in paths, the files that
+        aren't in the document store yet are preprocessed by the workers
+        """
+        processor = processor if processor is not None else TextProcessor(None, None)
+        if self.executor is not None:
+            missing = list(dict.fromkeys(path for path in paths if path not in processor.document_store))
+            for path, terms in zip(missing, self.map(extract_terms, ((path,) for path in missing))):
+                processor.document_store.put(path, terms)
+        return corpus_terms(paths, processor)
@@ -0,0 +1,416 @@
+import argparse
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from NewModel import add_search_arguments, search_options, similarityCalculation
+# Importation of the libraries needed for the code
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_TOP_K = 5
+
+class RequestBatcher:
+    """
+    This class runs every query in one thread that owns the model: the queries that arrive
+    while a batch is being formed (up to max_batch, waiting at most max_wait seconds) are
+    embedded together, so concurrent requests share the same forward passes. The reference
+    corpus is refreshed before every batch, only the originals that changed are processed again
+    """
+    def __init__(self, calculation, max_batch: int = 16, max_wait: float = 0.01) -> None:
+        self.calculation = calculation
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.queue = queue.Queue()
+        self.batches = 0
+        self.queries = 0
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def submit(self, text: str, k: int = DEFAULT_TOP_K, path: str = None) -> Future:
+        """
+        This function queues a raw text (or the content of path) and returns the Future of its result
+        """
+        future = Future()
+        self.queue.put((text, path, k, future))
+        return future
+
+    def close(self) -> None:
+        self.queue.put(None)
+        self.thread.join()
+
+    def _run(self) -> None:
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                try:
+                    item = self.queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if item is None:
+                    self.queue.put(None)
+                    break
+                batch.append(item)
+            self._process(batch)
+
+    def _process(self, batch: list) -> None:
+        calculation = self.calculation
+        try:
+            corpus = calculation.dataBaseProcessing()
+        except Exception as e:
+            for _, _, _, future in batch:
+                future.set_exception(e)
+            return
+        # Every query is read and preprocessed on its own, an error only fails its own request
+        valid, texts = [], []
+        for item in batch:
+            text, path, _, future = item
+            try:
+                texts.append(calculation._preprocess_text(calculation._read_file(path) if path else text))
+                valid.append(item)
+            except Exception as e:
+                future.set_exception(e)
+        if not valid:
+            return
+        try:
+            found = calculation.similaritySearch(texts, corpus, k=max(k for _, _, k, _ in valid))
+        except Exception:
+            # The batch failed, every query is searched alone so only the one that fails gets the error
+            found = []
+            for item, text in zip(valid, texts):
+                try:
+                    found.append(calculation.similaritySearch([text], corpus, k=item[2])[0])
+                except Exception as e:
+                    item[3].set_exception(e)
+                    found.append(None)
+        self.batches += 1
+        self.queries += len(batch)
+        for (_, path, k, future), result in zip(valid, found):
+            if result is None:
+                continue
+            matches = {metric: [[name, score] for name, score in result[metric][:k]] for metric in ('cosine', 'euclidean')}
+            best = matches[calculation.metric][0] if matches[calculation.metric] else [None, None]
+            response = {
+                "most_similar": best[0],
+                "score": best[1],
+                # The same decision as plagiarismDetection
+                "plagiarism": best[1] is not None and best[1] >= calculation.percentaje_simil,
+                **matches,
+            }
+            if path:
+                response = {"file": path, **response}
+            future.set_result(response)
+
+class LexicalService:
+    """
+    This class keeps the lexical model of main.py (TextProcessor) warm: the spaCy pipeline, the
+    word cache and the inverted index of folder stay loaded. A file is compared with the files of
+    folder like main.py one-vs-folder and two files like main.py pair. The requests run one at a
+    time because the caches are shared, only the files of folder that changed are indexed again
+    """
+    def __init__(self, folder: str = "documents/", threshold: float = None, index_path: str = None) -> None:
+        from InvertedIndex import InvertedIndex
+        from Model import PLAGIARISM_THRESHOLD
+        from Parallel import WorkerPool
+        self.folder = folder
+        self.threshold = threshold if threshold is not None else PLAGIARISM_THRESHOLD
+        self.index_path = index_path
+        self.index = InvertedIndex.load(index_path) if index_path and os.path.isfile(index_path) else InvertedIndex()
+        self.pool = WorkerPool()
+        self.lock = threading.Lock()
+        self.queries = 0
+
+    def _refresh(self) -> None:
+        from main import folder_files
+        files = folder_files(self.folder)
+        if self.index.changed(files) or len(self.index) != len(files):
+            self.index.update(files)
+            if self.index_path:
+                self.index.save(self.index_path)
+
+    def check_file(self, path: str, k: int = DEFAULT_TOP_K) -> dict:
+        """
+        This function returns the k files of the folder most similar to path, in the format of TextProcessor.results
+        """
+        from main import query_terms, similarity_result
+        with self.lock:
+            self._refresh()
+            best = self.index.search(query_terms(self.index, path, self.pool), k=k, exclude=[path])
+            results = [similarity_result(path, file2, similarity, self.threshold) for file2, similarity in best]
+            self.queries += 1
+        return {"file": path, "plagiarism": any(result["Plagiarism"] == "Plagiarism detected" for result in results), "results": results}
+
+    def pair(self, file1: str, file2: str) -> dict:
+        """
+        This function returns the result of TextProcessor for two files
+        """
+        from Model import TextProcessor
+        with self.lock:
+            self.pool.document_terms([file1, file2])
+            result = TextProcessor(file1, file2, threshold=self.threshold).process()
+            self.queries += 1
+        return {"plagiarism": result["Plagiarism"] == "Plagiarism detected", "result": result}
+
+class SimilarityHandler(BaseHTTPRequestHandler):
+    """
+    This class answers the HTTP requests of the transformer model: POST /check-file {"path"},
+    POST /check-text {"text"}, POST /batch {"paths", "texts"} (every one with an optional "k"), of
+    the lexical model: POST /lexical/check-file {"path", "k"}, POST /lexical/pair {"file1", "file2"},
+    and GET /health. In /batch a query that fails gets {"error"} in its place of the results
+    """
+    def do_GET(self) -> None:
+        if self.path != "/health":
+            return self._send(404, {"error": f"Unknown endpoint {self.path}"})
+        batcher, lexical = self.server.batcher, self.server.lexical
+        self._send(200, {
+            "status": "ok",
+            "batches": batcher.batches if batcher else 0,
+            "queries": batcher.queries if batcher else 0,
+            "lexical_queries": lexical.queries if lexical else 0,
+        })
+
+    def do_POST(self) -> None:
+        if self.path.startswith("/lexical/"):
+            return self._lexical()
+        if self.server.batcher is None:
+            return self._send(404, {"error": "The transformer model isn't served"})
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            k = int(payload.get("k", DEFAULT_TOP_K))
+            if self.path == "/check-file":
+                futures = [self._submit_file(payload["path"], k)]
+            elif self.path == "/check-text":
+                futures = [self.server.batcher.submit(str(payload["text"]), k)]
+            elif self.path == "/batch":
+                futures = [self._submit_file(path, k) for path in payload.get("paths", [])]
+                futures += [self.server.batcher.submit(str(text), k) for text in payload.get("texts", [])]
+            else:
+                return self._send(404, {"error": f"Unknown endpoint {self.path}"})
+        except (KeyError, ValueError, TypeError) as e:
+            return self._send(400, {"error": f"Bad request: {e}"})
+
+        if self.path == "/batch":
+            return self._send(200, {"results": [self._result(future) for future in futures]})
+        try:
+            result = futures[0].result()
+        except Exception as e:
+            logging.error(f"Error al procesar la consulta: {e}")
+            return self._send(500, {"error": str(e)})
+        self._send(200, result)
+
+    def _result(self, future: Future) -> dict:
+        try:
+            return future.result()
+        except Exception as e:
+            logging.error(f"Error al procesar la consulta: {e}")
+            return {"error": str(e)}
+
+    def _lexical(self) -> None:
+        lexical = self.server.lexical
+        if lexical is None:
+            return self._send(404, {"error": "The lexical model isn't served"})
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            if self.path == "/lexical/check-file":
+                arguments = (self._existing(payload["path"]), int(payload.get("k", DEFAULT_TOP_K)))
+                run = lexical.check_file
+            elif self.path == "/lexical/pair":
+                arguments = (self._existing(payload["file1"]), self._existing(payload["file2"]))
+                run = lexical.pair
+            else:
+                return self._send(404, {"error": f"Unknown endpoint {self.path}"})
+        except (KeyError, ValueError, TypeError) as e:
+            return self._send(400, {"error": f"Bad request: {e}"})
+        try:
+            result = run(*arguments)
+        except Exception as e:
+            logging.error(f"Error al procesar la consulta: {e}")
+            return self._send(500, {"error": str(e)})
+        self._send(200, result)
+
+    def _existing(self, path: str) -> str:
+        if not os.path.isfile(path):
+            raise ValueError(f"{path} is not a file")
+        return path
+
+    def _submit_file(self, path: str, k: int) -> Future:
+        return self.server.batcher.submit(None, k, path=self._existing(path))
+
+    def _send(self, status: int, body: dict) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args) -> None:
+        logging.debug(format, *args)
+
+class SimilarityServer(ThreadingHTTPServer):
+    # Many clients can connect at the same time, the default backlog of 5 would reset them
+    request_queue_size = 128
+    daemon_threads = True
+
+def create_server(calculation, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, max_batch: int = 16,
+                  max_wait: float = 0.01, lexical: LexicalService = None) -> SimilarityServer:
+    """
+    This function returns the HTTP server for an already loaded similarityCalculation and/or
+    LexicalService (either can be None), with port 0 the system chooses a free port (server.server_address)
+    """
+    server = SimilarityServer((host, port), SimilarityHandler)
+    server.batcher = RequestBatcher(calculation, max_batch, max_wait) if calculation is not None else None
+    server.lexical = lexical
+    return server
+
+class SimilarityClient:
+    """
+    This class is the client of the server, it only needs the standard library so a check
+    doesn't load any model
+    """
+    def __init__(self, url: str = f"http://{DEFAULT_HOST}:{DEFAULT_PORT}", timeout: float = 600) -> None:
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def _request(self, endpoint: str, payload: dict = None) -> dict:
+        data = json.dumps(payload).encode("utf-8") if payload is not None else None
+        request = urllib.request.Request(self.url + endpoint, data=data, headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            raise RuntimeError(json.loads(e.read()).get("error", str(e))) from None
+
+    def health(self) -> dict:
+        return self._request("/health")
+
+    def check_file(self, path: str, k: int = DEFAULT_TOP_K) -> dict:
+        # The server may run in another directory, the path is sent absolute
+        return self._request("/check-file", {"path": os.path.abspath(path), "k": k})
+
+    def check_text(self, text: str, k: int = DEFAULT_TOP_K) -> dict:
+        return self._request("/check-text", {"text": text, "k": k})
+
+    def batch(self, paths: list = (), texts: list = (), k: int = DEFAULT_TOP_K) -> list:
+        # The queries that failed have {"error"} in their place
+        payload = {"paths": [os.path.abspath(path) for path in paths], "texts": list(texts), "k": k}
+        return self._request("/batch", payload)["results"]
+
+    def lexical_check_file(self, path: str, k: int = DEFAULT_TOP_K) -> dict:
+        return self._request("/lexical/check-file", {"path": os.path.abspath(path), "k": k})
+
+    def lexical_pair(self, file1: str, file2: str) -> dict:
+        return self._request("/lexical/pair", {"file1": os.path.abspath(file1), "file2": os.path.abspath(file2)})
+
+def serve(args) -> None:
+    # torch, transformers and spaCy are only loaded by the server, the client doesn't need them
+    calculation = lexical = None
+    if "transformer" in args.models:
+        from InferenceBackend import InferenceBackend
+        backend = InferenceBackend(quantize=args.quantize, intra_op_threads=args.threads)
+        calculation = similarityCalculation(args.originals, args.threshold, metric=args.metric,
+                                            embedding_store_dir=args.embeddings, backend=backend, **search_options(args))
+        # The originals are loaded and embedded, and the lemmatizer loaded, before accepting requests
+        calculation._reference_embedding_index(calculation.dataBaseProcessing())
+        calculation._preprocess_text("warm up")
+    if "lexical" in args.models:
+        from Model import get_nlp
+        lexical = LexicalService(args.lexical_folder, args.lexical_threshold, args.lexical_index)
+        # spaCy is loaded and the folder indexed before accepting requests
+        get_nlp()
+        lexical._refresh()
+    server = create_server(calculation, args.host, args.port, args.max_batch, args.max_wait_ms / 1000, lexical)
+    logging.info(f"Listening on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if server.batcher is not None:
+            server.batcher.close()
+
+def create_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Resident plagiarism detection server and its client")
+    parser.add_argument("--url", default=f"http://{DEFAULT_HOST}:{DEFAULT_PORT}", help="URL of the server (client)")
+    parser.add_argument("-k", type=int, default=DEFAULT_TOP_K, help="most similar originals to return")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    server = subparsers.add_parser("serve", help="load the models and answer requests")
+    server.add_argument("--originals", default="originals/")
+    server.add_argument("--threshold", type=float, default=0.988)
+    server.add_argument("--metric", choices=("cosine", "euclidean"), default="cosine")
+    server.add_argument("--embeddings", default="embeddings/", help="directory of the embedding store")
+    server.add_argument("--host", default=DEFAULT_HOST)
+    server.add_argument("--port", type=int, default=DEFAULT_PORT)
+    server.add_argument("--max-batch", type=int, default=16)
+    server.add_argument("--max-wait-ms", type=float, default=10)
+    server.add_argument("--quantize", action="store_true")
+    server.add_argument("--threads", type=int, default=None)
+    add_search_arguments(server)
+    server.add_argument("--models", nargs="+", choices=("transformer", "lexical"), default=["transformer", "lexical"],
+                        help="models kept loaded: NewModel (transformer) and/or TextProcessor of main.py (lexical)")
+    server.add_argument("--lexical-folder", default="documents/", help="folder the lexical check-file compares with")
+    server.add_argument("--lexical-threshold", type=float, default=None, help="percentage of the lexical model (50.1 by default)")
+    server.add_argument("--lexical-index", default="documents_index.json", help="file where the inverted index of the folder is saved")
+
+    check_file = subparsers.add_parser("check-file", help="check one or more files")
+    check_file.add_argument("paths", nargs="+")
+    check_text = subparsers.add_parser("check-text", help="check a text")
+    check_text.add_argument("text")
+    batch = subparsers.add_parser("batch", help="check every .txt file of a folder in one request")
+    batch.add_argument("folder")
+    lexical_file = subparsers.add_parser("lexical-check-file", help="compare files with the lexical folder (main.py one-vs-folder)")
+    lexical_file.add_argument("paths", nargs="+")
+    lexical_pair = subparsers.add_parser("lexical-pair", help="compare two files with the lexical model (main.py pair)")
+    lexical_pair.add_argument("file1")
+    lexical_pair.add_argument("file2")
+    subparsers.add_parser("health", help="state of the server")
+    return parser
+
+def main(arguments=None) -> int:
+    args = create_parser().parse_args(arguments)
+    if args.command == "serve":
+        serve(args)
+        return 0
+    client = SimilarityClient(args.url)
+    try:
+        if args.command == "health":
+            results = [client.health()]
+        elif args.command == "check-file":
+            results = client.batch(paths=args.paths, k=args.k) if len(args.paths) > 1 else [client.check_file(args.paths[0], args.k)]
+        elif args.command == "check-text":
+            results = [client.check_text(args.text, args.k)]
+        elif args.command == "lexical-check-file":
+            results = [client.lexical_check_file(path, args.k) for path in args.paths]
+        elif args.command == "lexical-pair":
+            results = [client.lexical_pair(args.file1, args.file2)]
+        else:
+            paths = sorted(os.path.join(args.folder, name) for name in os.listdir(args.folder) if name.endswith(".txt"))
+            results = client.batch(paths=paths, k=args.k)
+    except (OSError, RuntimeError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 3
+    for result in results:
+        print(json.dumps(result, ensure_ascii=False))
+    # Same exit codes as main.py: 1 when plagiarism was found, 3 when the request failed
+    if any("error" in result for result in results):
+        return 3
+    return 1 if any(result.get("plagiarism") for result in results) else 0
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s\n%(message)s')
+    sys.exit(main())
@@ -0,0 +1,92 @@
+import math
+from collections import Counter
+from Model import PLAGIARISM_THRESHOLD, binary_cosine, plagiarism_detected
+# Importation of the libraries needed for the code
+
+# Margin so the float rounding never makes a prefix shorter than it has to be
+EPSILON = 1e-9
+
+class PrefixFilterJoin:
+    """
+    This class finds every pair of documents whose cosine similarity is above the
+    threshold without scoring all the pairs (AllPairs / PPJoin). The terms of each
+    document are ordered from the least to the most frequent in the collection and
+    two documents can only reach the threshold if their prefixes share a term, the
+    length and position filters discard the rest of the pairs before scoring them.
+    A pair is kept when TextProcessor.results would say it is plagiarism, its rounded
+    percentage is above the threshold, so every kept pair is also above the threshold
+    that the filters use
+    """
+    def __init__(self, terms, threshold=PLAGIARISM_THRESHOLD / 100):
+        self.threshold = threshold
+        # Percentage of TextProcessor.results, rounded so 0.501 gives 50.1 and not 50.09999...
+        self.percentage = round(threshold * 100, 9)
+        self.terms = [set(document_terms) for document_terms in terms]
+        self.records = self.create_records(self.terms)
+        self.candidates = 0
+
+    def create_records(self, terms):
+        """
+        This function replaces every term by its rank in the global order
+        (least frequent first) and sorts the terms of each document by it
+        """
+        frequency = Counter(term for document_terms in terms for term in document_terms)
+        order = sorted(frequency, key=lambda term: (frequency[term], str(term)))
+        rank = {term: position for position, term in enumerate(order)}
+        return [sorted(rank[term] for term in document_terms) for document_terms in terms]
+
+    def min_overlap(self, size1, size2):
+        """
+        This function returns the number of common terms needed to reach the threshold
+        """
+        return math.ceil(self.threshold * math.sqrt(size1 * size2) - EPSILON)
+
+    def pairs(self):
+        """
+        This function returns the (i, j, similarity) with i < j of every pair detected as plagiarism,
+        in the same order as itertools.combinations. candidates is the number of pairs scored
+        """
+        threshold = self.threshold - EPSILON
+        index = {}
+        results = []
+        self.candidates = 0
+        # The documents are visited from the smallest, so every indexed document is not bigger
+        order = sorted(range(len(self.records)), key=lambda doc_id: len(self.records[doc_id]))
+        for x in order:
+            record = self.records[x]
+            size = len(record)
+            if size == 0:
+                continue
+            min_size = threshold * threshold * size
+            probe_prefix = size - math.ceil(threshold * threshold * size) + 1
+            overlaps = {}
+            for position, token in enumerate(record[:probe_prefix]):
+                for y, y_position in index.get(token, ()):
+                    y_size = len(self.records[y])
+                    # Length filter
+                    if y_size < min_size:
+                        continue
+                    overlap = overlaps.get(y, 0)
+                    if overlap < 0:
+                        continue
+                    # Position filter, the terms left after the two positions can't be enough
+                    remaining = min(size - position - 1, y_size - y_position - 1)
+                    if overlap + 1 + remaining < self.min_overlap(size, y_size):
+                        overlaps[y] = -1
+                    else:
+                        overlaps[y] = overlap + 1
+
+            for y, overlap in overlaps.items():
+                if overlap < 0:
+                    continue
+                self.candidates += 1
+                similarity = binary_cosine(self.terms[x], self.terms[y])
+                if plagiarism_detected(similarity, self.percentage):
+                    i, j = min(x, y), max(x, y)
+                    results.append((i, j, similarity))
+
+            index_prefix = size - math.ceil(threshold * size) + 1
+            for position, token in enumerate(record[:index_prefix]):
+                index.setdefault(token, []).append((x, position))
+
+        return sorted(results)
@@ -0,0 +1,500 @@
+import argparse
+import os
+import time
+import numpy as np
+# Importation of the libraries needed for the code
+
+METRICS = ('cosine', 'euclidean')
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """
+    This function divides every row by its L2 norm, like torch.nn.functional.normalize
+    """
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+def top_k(scores: np.ndarray, k: int, largest: bool = True) -> np.ndarray:
+    """
+    This function returns, for every row of scores, the columns of the k best scores sorted
+    from the best, ties are broken by the lowest column. Only the k best are sorted (argpartition)
+    """
+    k = min(k, scores.shape[1])
+    if k == 0:
+        return np.zeros((scores.shape[0], 0), dtype=np.int64)
+    keyed = -scores if largest else scores
+    candidates = np.argpartition(keyed, k - 1, axis=1)[:, :k]
+    # The k-th value can be tied with columns left out by argpartition, those columns are added
+    kth = np.take_along_axis(keyed, candidates, axis=1).max(axis=1, keepdims=True)
+    result = np.empty((scores.shape[0], k), dtype=np.int64)
+    for row in range(scores.shape[0]):
+        columns = np.union1d(candidates[row], np.flatnonzero(keyed[row] == kth[row]))
+        order = np.lexsort((columns, keyed[row, columns]))
+        result[row] = columns[order][:k]
+    return result
+
+def reduce_blocks(scores: np.ndarray, block_starts: np.ndarray, largest: bool) -> np.ndarray:
+    """
+    This function keeps, for every row, the best score of each block of consecutive columns
+    """
+    if block_starts is None:
+        return scores
+    reduce = np.maximum if largest else np.minimum
+    return reduce.reduceat(scores, block_starts, axis=1)
+
+def best_documents(names: list, scores: np.ndarray, k: int, metric: str) -> list:
+    """
+    This function returns, for every row of scores, the k best documents as (name, score),
+    the documents that weren't scored (infinite score) are left out
+    """
+    best = top_k(scores, k, largest=(metric == 'cosine'))
+    return [
+        [(names[column], float(scores[row, column])) for column in best[row] if np.isfinite(scores[row, column])]
+        for row in range(scores.shape[0])
+    ]
+
+def block_starts_of(rows_per_document: list):
+    # First row of every document, None when every document has one row
+    if rows_per_document is None or all(rows == 1 for rows in rows_per_document):
+        return None
+    return np.concatenate(([0], np.cumsum(rows_per_document)[:-1])).astype(np.int64)
+
+class FlatIndex:
+    """
+    This class searches the documents most similar to one or many queries with one matrix
+    product against all the stored embeddings. A document can have several rows (one per chunk),
+    its score is the best score of its rows. Cosine similarity (higher is better) and euclidean
+    distance (lower is better) are supported
+    """
+    def __init__(self, names: list, embeddings, rows_per_document: list = None) -> None:
+        self.names = list(names)
+        self.embeddings = np.ascontiguousarray(np.asarray(embeddings, dtype=np.float32))
+        self.normalized = normalize_rows(self.embeddings)
+        self.block_starts = block_starts_of(rows_per_document)
+        self._embeddings64 = None
+        self._squared_norms = None
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def scores(self, queries, metric: str = 'cosine') -> np.ndarray:
+        """
+        This function returns the matrix queries x documents with the score of every document
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        if metric == 'cosine':
+            row_scores = normalize_rows(queries) @ self.normalized.T
+            return reduce_blocks(row_scores, self.block_starts, largest=True)
+        if metric == 'euclidean':
+            # |q - x|² = |q|² + |x|² - 2·q·x, in float64 so close vectors don't lose precision
+            if self._embeddings64 is None:
+                self._embeddings64 = self.embeddings.astype(np.float64)
+                self._squared_norms = np.einsum('ij,ij->i', self._embeddings64, self._embeddings64)
+            queries = queries.astype(np.float64)
+            squared = np.einsum('ij,ij->i', queries, queries)[:, None] + self._squared_norms[None, :] - 2 * queries @ self._embeddings64.T
+            row_scores = np.sqrt(np.maximum(squared, 0))
+            return reduce_blocks(row_scores, self.block_starts, largest=False)
+        raise ValueError(f"Unknown metric {metric}, use one of {METRICS}")
+
+    def search(self, queries, k: int = 1, metric: str = 'cosine') -> list:
+        """
+        This function returns, for every query, the k best documents as (name, score)
+        """
+        return best_documents(self.names, self.scores(queries, metric), k, metric)
+
+def cluster_sums(data: np.ndarray, assignments: np.ndarray, n_clusters: int) -> np.ndarray:
+    """
+    This function returns the sum of the rows of every cluster, sorting the rows once
+    and adding them with reduceat is much faster than np.add.at
+    """
+    order = np.argsort(assignments, kind='stable')
+    counts = np.bincount(assignments, minlength=n_clusters)
+    sums = np.zeros((n_clusters, data.shape[1]), dtype=np.float64)
+    present = np.flatnonzero(counts)
+    if len(present):
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[present]
+        sums[present] = np.add.reduceat(data[order].astype(np.float64), starts, axis=0)
+    return sums
+
+def kmeans(data: np.ndarray, n_clusters: int, iterations: int = 20, seed: int = 0, spherical: bool = True) -> np.ndarray:
+    """
+    This function returns n_clusters centroids of the rows of data. With spherical=True (rows
+    already normalized) every row goes to the centroid with the highest dot product and every
+    centroid is the normalized mean of its rows, otherwise it is the usual k-means with the
+    euclidean distance. An empty centroid takes the worst assigned row
+    """
+    random = np.random.RandomState(seed)
+    n_clusters = min(n_clusters, len(data))
+    centroids = data[random.choice(len(data), n_clusters, replace=False)].copy()
+    for _ in range(iterations):
+        # argmin |x - c|² = argmax 2·x·c - |c|², the same matrix product as the spherical case
+        similarities = data @ centroids.T if spherical else 2 * data @ centroids.T - np.einsum('ij,ij->i', centroids, centroids)
+        assignments = similarities.argmax(axis=1)
+        sums = cluster_sums(data, assignments, n_clusters)
+        counts = np.bincount(assignments, minlength=n_clusters)
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            worst = np.argsort(similarities[np.arange(len(data)), assignments])[:len(empty)]
+            sums[empty] = data[worst]
+            counts[empty] = 1
+        new_centroids = (normalize_rows(sums) if spherical else sums / counts[:, None]).astype(data.dtype)
+        if np.array_equal(new_centroids, centroids):
+            break
+        centroids = new_centroids
+    return centroids
+
+class IVFIndex(FlatIndex):
+    """
+    This class is an approximate FlatIndex for large corpora: the rows are split in n_lists
+    inverted lists with k-means and a query only scores the rows of the nprobe lists whose
+    centroids are closest to it. The documents outside those lists get the worst score
+    (-inf for cosine, inf for euclidean). The lists can be saved to a .npz file, the vectors
+    aren't saved with them: they are given again to load (for example from an EmbeddingStore)
+    """
+    TRAINING_ROWS_PER_LIST = 256
+
+    def __init__(self, names: list, embeddings, rows_per_document: list = None, n_lists: int = None,
+                 nprobe: int = 8, seed: int = 0, centroids: np.ndarray = None, lists: tuple = None) -> None:
+        super().__init__(names, embeddings, rows_per_document)
+        rows_per_document = rows_per_document if rows_per_document is not None else [1] * len(self.names)
+        self.rows_per_document = np.asarray(rows_per_document, dtype=np.int64)
+        self.owners = np.repeat(np.arange(len(self.names)), self.rows_per_document)
+        self.nprobe = nprobe
+        self.seed = seed
+        if centroids is None:
+            n_lists = n_lists or max(1, int(round(np.sqrt(len(self.embeddings)))))
+            # k-means only needs a sample of the rows to place the centroids
+            random = np.random.RandomState(seed)
+            sample_size = min(len(self.normalized), n_lists * self.TRAINING_ROWS_PER_LIST)
+            sample = self.normalized[np.sort(random.choice(len(self.normalized), sample_size, replace=False))]
+            centroids = kmeans(sample, n_lists, seed=seed)
+        self.centroids = np.asarray(centroids, dtype=np.float32)
+        if lists is None:
+            self._assign()
+        else:
+            # The lists saved by save: rows sorted by list, first row of every list and euclidean centroids
+            self.list_rows, self.list_offsets, self.raw_centroids = lists
+
+    def _assign(self, batch_size: int = 65536) -> None:
+        # Every row goes to the list of its closest centroid, the lists are kept as one sorted array of rows
+        assignments = np.concatenate([
+            (self.normalized[start:start + batch_size] @ self.centroids.T).argmax(axis=1)
+            for start in range(0, len(self.normalized), batch_size)
+        ]) if len(self.normalized) else np.zeros(0, dtype=np.int64)
+        self.list_rows = np.argsort(assignments, kind='stable')
+        self.list_offsets = np.concatenate(([0], np.cumsum(np.bincount(assignments, minlength=len(self.centroids)))))
+        # For the euclidean distance the lists are probed by the mean of their rows without normalizing
+        sums = cluster_sums(self.embeddings, assignments, len(self.centroids))
+        self.raw_centroids = (sums / np.maximum(np.diff(self.list_offsets), 1)[:, None]).astype(np.float32)
+
+    @property
+    def n_lists(self) -> int:
+        return len(self.centroids)
+
+    def probe(self, queries: np.ndarray, metric: str = 'cosine', nprobe: int = None) -> np.ndarray:
+        """
+        This function returns, for every query, the nprobe lists that must be scored
+        """
+        nprobe = min(nprobe or self.nprobe, self.n_lists)
+        if metric == 'cosine':
+            return top_k(normalize_rows(queries) @ self.centroids.T, nprobe, largest=True)
+        if metric == 'euclidean':
+            distances = np.linalg.norm(queries[:, None, :] - self.raw_centroids[None, :, :], axis=2)
+            return top_k(distances, nprobe, largest=False)
+        raise ValueError(f"Unknown metric {metric}, use one of {METRICS}")
+
+    def scores(self, queries, metric: str = 'cosine', nprobe: int = None) -> np.ndarray:
+        """
+        This function returns the matrix queries x documents, only the documents in the
+        probed lists are scored
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        probed = self.probe(queries, metric, nprobe)
+        largest = metric == 'cosine'
+        result = np.full((len(queries), len(self.names)), -np.inf if largest else np.inf)
+        reduce = np.maximum if largest else np.minimum
+        if metric == 'euclidean' and self._embeddings64 is None:
+            self._embeddings64 = self.embeddings.astype(np.float64)
+            self._squared_norms = np.einsum('ij,ij->i', self._embeddings64, self._embeddings64)
+        for row, lists in enumerate(probed):
+            rows = np.concatenate([self.list_rows[self.list_offsets[lst]:self.list_offsets[lst + 1]] for lst in lists])
+            if largest:
+                row_scores = self.normalized[rows] @ normalize_rows(queries[row:row + 1])[0]
+            else:
+                query = queries[row].astype(np.float64)
+                squared = query @ query + self._squared_norms[rows] - 2 * self._embeddings64[rows] @ query
+                row_scores = np.sqrt(np.maximum(squared, 0))
+            reduce.at(result[row], self.owners[rows], row_scores)
+        return result.astype(np.float32) if largest else result
+
+    def save(self, path: str, fingerprint: str = "") -> None:
+        """
+        This function saves the lists of the index in a .npz file (centroids, rows of every list and
+        offsets of the lists), fingerprint identifies the data it was built from so load can reject an
+        outdated file. The embeddings aren't saved, they are already in the EmbeddingStore
+        """
+        temporary_path = path + ".tmp.npz"
+        np.savez(
+            temporary_path, names=np.array(self.names, dtype=str), rows_per_document=self.rows_per_document,
+            centroids=self.centroids, raw_centroids=self.raw_centroids, list_rows=self.list_rows,
+            list_offsets=self.list_offsets, nprobe=self.nprobe, seed=self.seed, fingerprint=np.array(fingerprint)
+        )
+        os.replace(temporary_path, path)
+
+    @classmethod
+    def load(cls, path: str, embeddings, fingerprint: str = None):
+        """
+        This function loads the lists saved with save for the same embeddings (one row per list row,
+        for example the memmap of an EmbeddingStore), or returns None when the file doesn't exist,
+        was saved with another fingerprint or doesn't have the same number of rows
+        """
+        if not os.path.isfile(path):
+            return None
+        with np.load(path) as data:
+            if fingerprint is not None and str(data["fingerprint"]) != fingerprint:
+                return None
+            # Files of the previous format saved the embeddings instead of the lists
+            if "list_rows" not in data.files or int(data["list_offsets"][-1]) != len(embeddings):
+                return None
+            lists = (data["list_rows"], data["list_offsets"], data["raw_centroids"])
+            return cls(
+                data["names"].tolist(), embeddings, data["rows_per_document"].tolist(),
+                nprobe=int(data["nprobe"]), seed=int(data["seed"]), centroids=data["centroids"], lists=lists
+            )
+
+class ScalarQuantizer:
+    """
+    This class stores every dimension in one signed byte (int8), scaled between the minimum
+    and the maximum of that dimension, 4 times less memory than float32
+    """
+    def __init__(self, dim: int) -> None:
+        self.dim = dim
+        self.minimum = None
+        self.scale = None
+
+    def train(self, data: np.ndarray) -> None:
+        self.minimum = data.min(axis=0).astype(np.float32)
+        self.scale = np.maximum((data.max(axis=0) - self.minimum) / 255, 1e-12).astype(np.float32)
+
+    def encode(self, data: np.ndarray) -> np.ndarray:
+        codes = np.rint((data - self.minimum) / self.scale) - 128
+        return np.clip(codes, -128, 127).astype(np.int8)
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        return (codes.astype(np.float32) + 128) * self.scale + self.minimum
+
+    def inner_products(self, queries: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        # q·x = q·minimum + (q * scale)·(code + 128), the codes are only turned into floats one block at a time
+        return (queries @ self.minimum)[:, None] + (queries * self.scale) @ (codes.astype(np.float32) + 128).T
+
+class ProductQuantizer:
+    """
+    This class splits the vectors in subspaces and stores, for every subspace, the byte of its
+    closest centroid (256 centroids trained with k-means per subspace). The distances are
+    computed without decoding (asymmetric distance computation): the query is compared once
+    with every centroid and the score of a row is the sum of the table entries of its codes
+    """
+    def __init__(self, dim: int, subspaces: int = 96, centroids: int = 256, seed: int = 0) -> None:
+        if dim % subspaces:
+            raise ValueError(f"The dimension {dim} must be divisible by the {subspaces} subspaces")
+        self.dim = dim
+        self.subspaces = subspaces
+        self.n_centroids = centroids
+        self.seed = seed
+        self.codebooks = None   # subspaces x centroids x (dim / subspaces)
+
+    def _split(self, data: np.ndarray) -> np.ndarray:
+        return data.reshape(len(data), self.subspaces, self.dim // self.subspaces)
+
+    def train(self, data: np.ndarray) -> None:
+        parts = self._split(data)
+        codebooks = [kmeans(parts[:, part], self.n_centroids, seed=self.seed + part, spherical=False) for part in range(self.subspaces)]
+        # With fewer rows than centroids the missing centroids repeat the last one, they are never chosen
+        size = max(len(codebook) for codebook in codebooks)
+        self.codebooks = np.stack([np.concatenate([codebook, np.repeat(codebook[-1:], size - len(codebook), axis=0)]) for codebook in codebooks])
+
+    def encode(self, data: np.ndarray) -> np.ndarray:
+        parts = self._split(data)
+        codes = np.empty((len(data), self.subspaces), dtype=np.uint8)
+        squared = np.einsum('mkd,mkd->mk', self.codebooks, self.codebooks)
+        for part in range(self.subspaces):
+            codes[:, part] = (2 * parts[:, part] @ self.codebooks[part].T - squared[part]).argmax(axis=1)
+        return codes
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        return self.codebooks[np.arange(self.subspaces), codes].reshape(len(codes), self.dim)
+
+    def inner_products(self, queries: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        tables = np.einsum('qmd,mkd->qmk', self._split(queries), self.codebooks)
+        scores = np.zeros((len(queries), len(codes)), dtype=np.float32)
+        for part in range(self.subspaces):
+            scores += tables[:, part, codes[:, part]]
+        return scores
+
+class CompressedIndex:
+    """
+    This class searches like FlatIndex but keeps only compressed codes in memory: int8 scalar
+    quantization ('int8', 4x smaller) or product quantization ('pq', dim*4/subspaces times
+    smaller, 32x for 768 dimensions and 96 subspaces). The scores are computed directly on the
+    codes. With rerank > 0 the best rerank documents of every query are scored again with the
+    full precision rows and the other documents get the worst score (-inf for cosine, inf for
+    euclidean), so the approximate scores are never compared with the exact ones. The full
+    precision rows come from full_embeddings (for example the memmap of an EmbeddingStore, read
+    only for those rows), full_rows maps the rows of the index to the rows of full_embeddings.
+    With embeddings=None the rows of the index are full_embeddings[full_rows]. The codes and
+    the norms are computed BLOCK_ROWS rows at a time, so a memmap is never read whole into memory
+    """
+    BLOCK_ROWS = 65536
+    TRAINING_ROWS = 65536
+
+    def __init__(self, names: list, embeddings, rows_per_document: list = None, method: str = 'int8',
+                 subspaces: int = 96, rerank: int = 0, full_embeddings=None, full_rows=None, seed: int = 0) -> None:
+        if embeddings is None:
+            source, source_rows = full_embeddings, full_rows
+        else:
+            source, source_rows = embeddings, None
+        n_rows = len(source_rows) if source_rows is not None else len(source)
+        dim = source.shape[1]
+        self.names = list(names)
+        self.block_starts = block_starts_of(rows_per_document)
+        if method == 'int8':
+            self.quantizer = ScalarQuantizer(dim)
+        elif method == 'pq':
+            self.quantizer = ProductQuantizer(dim, subspaces, seed=seed)
+        else:
+            raise ValueError("method must be 'int8' or 'pq'")
+        self.method = method
+
+        def read(rows):
+            # Only these rows of the source are read, as float32
+            return np.asarray(source[rows] if source_rows is None else source[source_rows[rows]], dtype=np.float32)
+        # The quantizer only needs a sample of the rows to be trained
+        random = np.random.RandomState(seed)
+        self.quantizer.train(read(np.sort(random.choice(n_rows, min(n_rows, self.TRAINING_ROWS), replace=False))))
+        self.codes = None
+        self.squared_norms = np.empty(n_rows, dtype=np.float32)
+        for start in range(0, n_rows, self.BLOCK_ROWS):
+            stop = min(start + self.BLOCK_ROWS, n_rows)
+            codes = self.quantizer.encode(read(slice(start, stop)))
+            if self.codes is None:
+                self.codes = np.empty((n_rows,) + codes.shape[1:], dtype=codes.dtype)
+            self.codes[start:stop] = codes
+            # The norms of the decoded rows give the cosine and the euclidean distance from q·x
+            decoded = self.quantizer.decode(codes)
+            self.squared_norms[start:stop] = np.einsum('ij,ij->i', decoded, decoded)
+        self.rerank = rerank
+        self.full_embeddings = full_embeddings
+        self.full_rows = full_rows
+        rows_per_document = rows_per_document if rows_per_document is not None else [1] * len(self.names)
+        self.row_offsets = np.concatenate(([0], np.cumsum(rows_per_document))).astype(np.int64)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @property
+    def memory_bytes(self) -> int:
+        return self.codes.nbytes + self.squared_norms.nbytes
+
+    def _row_scores(self, queries: np.ndarray, metric: str) -> np.ndarray:
+        blocks = []
+        for start in range(0, len(self.codes), self.BLOCK_ROWS):
+            codes = self.codes[start:start + self.BLOCK_ROWS]
+            norms = self.squared_norms[start:start + self.BLOCK_ROWS]
+            products = self.quantizer.inner_products(queries, codes)
+            if metric == 'cosine':
+                query_norms = np.linalg.norm(queries, axis=1, keepdims=True)
+                blocks.append(products / np.maximum(query_norms * np.sqrt(norms)[None, :], 1e-12))
+            else:
+                squared = np.einsum('ij,ij->i', queries, queries)[:, None] + norms[None, :] - 2 * products
+                blocks.append(np.sqrt(np.maximum(squared, 0)))
+        return np.concatenate(blocks, axis=1) if blocks else np.zeros((len(queries), 0), dtype=np.float32)
+
+    def scores(self, queries, metric: str = 'cosine', rerank: int = None) -> np.ndarray:
+        """
+        This function returns the matrix queries x documents with the approximate score of every
+        document, or with rerank the exact score of the best rerank documents of every query
+        """
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric {metric}, use one of {METRICS}")
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        largest = metric == 'cosine'
+        scores = reduce_blocks(self._row_scores(queries, metric), self.block_starts, largest)
+        rerank = self.rerank if rerank is None else rerank
+        if not rerank or self.full_embeddings is None:
+            return scores
+        exact_scores = np.full(scores.shape, -np.inf if largest else np.inf, dtype=scores.dtype)
+        for row, documents in enumerate(top_k(scores, rerank, largest)):
+            rows = np.concatenate([np.arange(self.row_offsets[doc], self.row_offsets[doc + 1]) for doc in documents])
+            full_rows = rows if self.full_rows is None else self.full_rows[rows]
+            exact = FlatIndex(documents, self.full_embeddings[full_rows], np.diff(self.row_offsets)[documents])
+            exact_scores[row, documents] = exact.scores(queries[row:row + 1], metric)[0]
+        return exact_scores
+
+    def search(self, queries, k: int = 1, metric: str = 'cosine') -> list:
+        """
+        This function returns, for every query, the k best documents as (name, score)
+        """
+        rerank = max(k, self.rerank) if self.rerank else 0
+        return best_documents(self.names, self.scores(queries, metric, rerank), k, metric)
+
+def recall_report(exact: FlatIndex, approximate: IVFIndex, queries, k: int = 10, nprobes: tuple = (1, 2, 4, 8, 16),
+                  metric: str = 'cosine') -> list:
+    """
+    This function measures, for every nprobe, the recall@k of the approximate index against the
+    exact search and the latency per query of both, it returns a list of dictionaries
+    """
+    queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+    start = time.perf_counter()
+    expected = exact.search(queries, k, metric)
+    exact_latency = (time.perf_counter() - start) * 1000 / len(queries)
+    report = []
+    for nprobe in nprobes:
+        start = time.perf_counter()
+        scores = approximate.scores(queries, metric, nprobe)
+        best = top_k(scores, k, largest=(metric == 'cosine'))
+        latency = (time.perf_counter() - start) * 1000 / len(queries)
+        found = 0
+        for row, results in enumerate(expected):
+            returned = {approximate.names[column] for column in best[row] if np.isfinite(scores[row, column])}
+            found += len(returned & {name for name, _ in results})
+        report.append({
+            "nprobe": min(nprobe, approximate.n_lists),
+            "recall": found / max(sum(len(results) for results in expected), 1),
+            "latency_ms": latency,
+            "exact_latency_ms": exact_latency,
+        })
+    return report
+
+def main(arguments=None) -> None:
+    # Recall vs latency of the IVF index on the embeddings saved by NewModel, some rows are left out as queries
+    from EmbeddingStore import EmbeddingStore
+    parser = argparse.ArgumentParser(description="Recall vs latency of the IVF index against exact search")
+    parser.add_argument("store", help="directory of the embedding store")
+    parser.add_argument("--model-id", default="roberta-base|pool=masked-v2", help="embedding_id the store was built with")
+    parser.add_argument("--lists", type=int, default=None, help="number of inverted lists (default sqrt of the rows)")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=100, help="rows left out of the index and used as queries")
+    parser.add_argument("--metric", choices=METRICS, default="cosine")
+    parser.add_argument("--output", help="save the IVF index to this .npz file")
+    args = parser.parse_args(arguments)
+
+    store = EmbeddingStore(args.store, args.model_id, read_only=True)
+    names = sorted(store.rows, key=lambda name: store.rows[name]["row"])
+    embeddings = store.embeddings(names)
+    random = np.random.RandomState(0)
+    held_out = random.choice(len(names), min(args.queries, len(names) - 1), replace=False)
+    kept = np.setdiff1d(np.arange(len(names)), held_out)
+    indexed_names = [names[row] for row in kept]
+
+    start = time.perf_counter()
+    exact = FlatIndex(indexed_names, embeddings[kept])
+    approximate = IVFIndex(indexed_names, embeddings[kept], n_lists=args.lists)
+    print(f"{len(kept)} documents, {approximate.n_lists} lists, built in {time.perf_counter() - start:.2f} s")
+    for line in recall_report(exact, approximate, embeddings[held_out], args.k, args.nprobe, args.metric):
+        print(f"nprobe={line['nprobe']:<5} recall@{args.k}={line['recall']:.3f}  "
+              f"{line['latency_ms']:.3f} ms/query (exact {line['exact_latency_ms']:.3f} ms/query)")
+    if args.output:
+        approximate.save(args.output)
+
+if __name__ == "__main__":
+    main()
@@ -3,17 +3,55 @@ Authors: Erika García,
 Christian Parrish,
 Jorge Blanco
 """
-from Model import TextProcessor
+from Model import PLAGIARISM_THRESHOLD, TextProcessor
+from AllPairs import AllPairsEngine
+from SetJoin import PrefixFilterJoin
+from InvertedIndex import InvertedIndex
+from MinHash import MinHashLSH
+from Parallel import WorkerPool
 from tabulate import tabulate
+import argparse
+import csv
+import heapq
+import json
 import logging
 import os
-from itertools import combinations
-from operator import itemgetter
+import sys
 
-def compare_two_files():
+# File where the inverted index of the folder 'documents' is saved between runs
+INDEX_PATH = "documents_index.json"
+
+# Exit codes of the batch commands (argparse exits with 2 when the arguments are wrong)
+EXIT_NO_PLAGIARISM = 0
+EXIT_PLAGIARISM = 1
+EXIT_ERROR = 3
+
+# Columns of the results, in the same order as TextProcessor.results
+RESULT_FIELDS = ["File", "Plagiarized from", "Percentage of similarity", "Plagiarism"]
+
+def load_index(files, pool, index_path=INDEX_PATH):
+    """
+    This function loads the saved inverted index and updates it with the files that changed
+    """
+    index = InvertedIndex.load(index_path) if os.path.isfile(index_path) else InvertedIndex()
+    pool.document_terms(index.changed(files))
+    index.update(files)
+    index.save(index_path)
+    return index
+
+def query_terms(index, path, pool):
+    """
+    This function returns the terms of the file to compare, when it is in the indexed folder
+    its terms come from the index and it isn't preprocessed again
+    """
+    doc_id = index.ids.get(os.path.normpath(path))
+    return index.terms[doc_id] if doc_id is not None else pool.document_terms([path])[0]
+
+def compare_two_files(pool=None):
     """
     This function compares two files that the user inputs, must be .txt files
     """
+    pool = pool if pool is not None else WorkerPool()
     while True:
         file1 = "documents/" + input("Please, input the name of the first file (name.txt): ")
         if os.path.isfile(file1):
@@ -28,16 +66,18 @@ def compare_two_files():
         else:
             print(f"The file {file2} isn't found. Please, input another file's name.")
     
+    pool.document_terms([file1, file2])
     processor = TextProcessor(file1, file2)
     result = processor.process()
     if result:
         print("\nResults:")
         print(tabulate([result], headers="keys", tablefmt="pretty"))
 
-def compare_file_with_folder():
+def compare_file_with_folder(pool=None):
     """
     This function compares a file that the user inputs with all the files in the folder 'documents'
     """
+    pool = pool if pool is not None else WorkerPool()
     while True:
         file1 = "documents/" + input("Please, input the name of the file to compare (name.txt): ")
         if os.path.isfile(file1):
@@ -45,53 +85,50 @@ def compare_file_with_folder():
         else:
             print(f"The file {file1} isn't found. Please, input another file's name.")
     
-    files_to_compare = [f for f in os.listdir("documents/") if os.path.isfile(os.path.join("documents/", f)) and f != os.path.basename(file1)]
+    files = [f for f in os.listdir("documents/") if os.path.isfile(os.path.join("documents/", f))]
+    files_to_compare = [f for f in files if f != os.path.basename(file1)]
     
     if not files_to_compare:
         print("There are no other files in the folder 'documents' to compare.")
     else:
-        results = []
-        for file2 in files_to_compare:
-            file2_path = os.path.join("documents/", file2)
-            processor = TextProcessor(file1, file2_path)
-            result = processor.process()
-            if result:
-                results.append(result)
+        # The whole folder is indexed (file1 too, so the saved index doesn't change between queries),
+        # only the files that share terms with file1 are scored and the best two are kept
+        index = load_index([os.path.join("documents/", file) for file in files], pool)
+        best_matches = index.search(query_terms(index, file1, pool), k=2, exclude=[file1])
+        results = [
+            TextProcessor(file1, file2_path).results([[1.0, similarity], [similarity, 1.0]])
+            for file2_path, similarity in best_matches
+        ]
         if results:
-            # Sort results by the "Comparing with" field in ascending order
-            results = sorted(results, key=lambda x: x["Percentage of similarity"], reverse=True)
-            
             print("\nResults:")
-            #print the first two results
-
-            print(tabulate(results[0:2], headers="keys", tablefmt="pretty"))
+            print(tabulate(results, headers="keys", tablefmt="pretty"))
 
-def compare_all_files_in_folder():
+def compare_all_files_in_folder(pool=None):
     """
     This function compares all the files in the folder 'documents' between them
     """
+    pool = pool if pool is not None else WorkerPool()
     files = (entry.name for entry in os.scandir("documents/") if entry.is_file())
     files = list(files)  # Convert generator to list to get length
 
     if len(files) < 2:
         print("There are not enough files in the folder 'documents' to compare.")
     else:
-        results = [
-            TextProcessor(os.path.join("documents/", file1), os.path.join("documents/", file2)).process()
-            for file1, file2 in combinations(files, 2)
-        ]
-        results = [result for result in results if result]  # Filter out None results
+        # Every pair is scored with one sparse matrix product, only the best two are kept
+        engine = AllPairsEngine.from_paths([os.path.join("documents/", file) for file in files], pool=pool)
+        results = [engine.result(i, j, similarity) for i, j, similarity in engine.top_k(2, pool=pool)]
 
         if results:
-            # Sort results by the "Comparing with" field in ascending order
-            results.sort(key=itemgetter("Comparing with"))
-
             print("\nResults:")
-            print(tabulate(results[0:2], headers="keys", tablefmt="pretty"))
+            print(tabulate(results, headers="keys", tablefmt="pretty"))
 
-def main():
+def main(workers=1):
     print("\nWelcome to the program that detects plagiarism")
     
+    with WorkerPool(workers) as pool:
+        menu(pool)
+
+def menu(pool):
     while True:
         print("\nMenu:")
         print("1. Compare two files")
@@ -102,16 +139,204 @@ def main():
         choice = input("Please, choose an option (1-4): ")
         
         if choice == '1':
-            compare_two_files()
+            compare_two_files(pool)
         elif choice == '2':
-            compare_file_with_folder()
+            compare_file_with_folder(pool)
         elif choice == '3':
-            compare_all_files_in_folder()
+            compare_all_files_in_folder(pool)
         elif choice == '4':
             print("Exiting the program.")
             break
         else:
             print("Invalid choice. Please, try again.")
 
+def folder_files(folder, exclude=None):
+    """
+    This function returns the sorted paths of the files in the folder, except exclude
+    """
+    exclude = os.path.abspath(exclude) if exclude else None
+    paths = (os.path.join(folder, entry.name) for entry in os.scandir(folder) if entry.is_file())
+    return sorted(path for path in paths if os.path.abspath(path) != exclude)
+
+def similarity_result(file1, file2, similarity, threshold):
+    """
+    This function returns the result of a pair in the same format as TextProcessor.results
+    """
+    return TextProcessor(file1, file2, threshold=threshold).results([[1.0, similarity], [similarity, 1.0]])
+
+def batch_pair(args, pool):
+    """
+    This function is a generator of the result of comparing two files
+    """
+    pool.document_terms([args.file1, args.file2])
+    result = TextProcessor(args.file1, args.file2, threshold=args.threshold).process()
+    if result:
+        yield result
+
+def batch_one_vs_folder(args, pool):
+    """
+    This function is a generator of the results of comparing a file with the files of a folder,
+    the files that don't share any term with it aren't returned
+    """
+    # The whole folder is indexed and the file is only excluded from the search, so the saved
+    # index stays the same when other files of the folder are compared
+    index = load_index(folder_files(args.folder), pool, args.index)
+    terms = query_terms(index, args.file, pool)
+    for file2, similarity in index.search(terms, k=args.top_k or len(index), exclude=[args.file]):
+        yield similarity_result(args.file, file2, similarity, args.threshold)
+
+def batch_all_pairs(args, pool):
+    """
+    This function is a generator of the results of comparing all the files of a folder between them,
+    without top-k every pair is written as soon as its tile is scored
+    """
+    if args.join == "prefix":
+        yield from prefix_join_pairs(args, pool)
+        return
+    if args.join == "minhash":
+        yield from minhash_pairs(args, pool)
+        return
+    engine = AllPairsEngine.from_paths(folder_files(args.folder), pool=pool)
+    min_similarity = args.threshold / 100 if args.only_plagiarism else 0.0
+    if args.top_k:
+        pairs = engine.top_k(args.top_k, min_similarity, pool=pool)
+    else:
+        pairs = engine.pairs(min_similarity, pool=pool)
+    for i, j, similarity in pairs:
+        yield engine.result(i, j, similarity, args.threshold)
+
+def prefix_join_pairs(args, pool):
+    """
+    This function is a generator of the results of the pairs of a folder detected as plagiarism,
+    the prefix filter join only scores the pairs that can reach the threshold
+    """
+    paths = folder_files(args.folder)
+    join = PrefixFilterJoin(pool.document_terms(paths), args.threshold / 100)
+    pairs = join.pairs()
+    total = len(paths) * (len(paths) - 1) // 2
+    print(f"Prefix filter join: {join.candidates} of {total} pairs scored, {total - join.candidates} pruned", file=sys.stderr)
+    if args.top_k:
+        pairs = heapq.nlargest(args.top_k, pairs, key=lambda pair: pair[2])
+    for i, j, similarity in pairs:
+        yield similarity_result(paths[i], paths[j], similarity, args.threshold)
+
+def minhash_pairs(args, pool):
+    """
+    This function is a generator of the results of the pairs of a folder detected as plagiarism,
+    only the candidate pairs of MinHash LSH (documents that share a band) are scored exactly,
+    so a pair with plagiarism can be missed with probability 1 - recall
+    """
+    paths = folder_files(args.folder)
+    lsh = MinHashLSH(args.bands, args.rows)
+    lsh.index(pool.document_terms(paths))
+    threshold = args.threshold / 100
+    pairs = list(lsh.similar_pairs(threshold))
+    total = len(paths) * (len(paths) - 1) // 2
+    print(f"MinHash LSH ({args.bands} bands x {args.rows} rows): {lsh.candidates} of {total} pairs scored, "
+          f"estimated recall at the threshold {lsh.recall_estimate(threshold):.3f}", file=sys.stderr)
+    if args.top_k:
+        pairs = heapq.nlargest(args.top_k, pairs, key=lambda pair: pair[2])
+    for i, j, similarity in pairs:
+        yield similarity_result(paths[i], paths[j], similarity, args.threshold)
+
+BATCH_COMMANDS = {"pair": batch_pair, "one-vs-folder": batch_one_vs_folder, "all-pairs": batch_all_pairs}
+
+class ResultWriter:
+    """
+    This class writes every result as soon as it is produced, as JSON Lines or CSV
+    """
+    def __init__(self, stream, output_format):
+        self.stream = stream
+        self.plagiarism_found = False
+        self.csv_writer = None
+        if output_format == "csv":
+            self.csv_writer = csv.DictWriter(stream, fieldnames=RESULT_FIELDS)
+            self.csv_writer.writeheader()
+
+    def write(self, result):
+        if result["Plagiarism"] == "Plagiarism detected":
+            self.plagiarism_found = True
+        if self.csv_writer is not None:
+            self.csv_writer.writerow(result)
+        else:
+            self.stream.write(json.dumps(result) + "\n")
+        self.stream.flush()
+
+def run_batch(args):
+    """
+    This function runs a batch command and returns the exit code:
+    0 when no plagiarism was found, 1 when it was found and 3 when the command failed
+    (the error is written to stderr, the results written before it are kept)
+    """
+    stream = None
+    writer = None
+    try:
+        stream = open(args.output, "w", encoding="utf-8", newline="") if args.output else sys.stdout
+        with WorkerPool(args.workers) as pool:
+            writer = ResultWriter(stream, args.format)
+            for result in BATCH_COMMANDS[args.command](args, pool):
+                if args.only_plagiarism and result["Plagiarism"] != "Plagiarism detected":
+                    continue
+                writer.write(result)
+    except Exception as error:
+        print(f"Error: {error}", file=sys.stderr)
+        return EXIT_ERROR
+    finally:
+        if stream is not None and stream is not sys.stdout:
+            stream.close()
+    return EXIT_PLAGIARISM if writer.plagiarism_found else EXIT_NO_PLAGIARISM
+
+def existing_file(path):
+    if not os.path.isfile(path):
+        raise argparse.ArgumentTypeError(f"The file {path} isn't found.")
+    return path
+
+def existing_folder(path):
+    if not os.path.isdir(path):
+        raise argparse.ArgumentTypeError(f"The folder {path} isn't found.")
+    return path
+
+def create_parser():
+    """
+    This function creates the parser of the command line, without a command the menu is shown
+    """
+    parser = argparse.ArgumentParser(
+        description="Plagiarism detection between .txt files",
+        epilog="Exit codes of the commands: 0 no plagiarism found, 1 plagiarism found, 2 wrong arguments, 3 error while running",
+    )
+    parser.add_argument("--workers", type=int, default=1, help="number of processes used to preprocess and compare the files")
+    commands = parser.add_subparsers(dest="command")
+
+    pair = commands.add_parser("pair", help="compare two files")
+    pair.add_argument("file1", type=existing_file)
+    pair.add_argument("file2", type=existing_file)
+
+    one_vs_folder = commands.add_parser("one-vs-folder", help="compare a file with all the files of a folder")
+    one_vs_folder.add_argument("file", type=existing_file)
+    one_vs_folder.add_argument("--folder", type=existing_folder, default="documents/")
+    one_vs_folder.add_argument("--index", default=INDEX_PATH, help="file where the inverted index of the folder is saved")
+
+    all_pairs = commands.add_parser("all-pairs", help="compare all the files of a folder between them")
+    all_pairs.add_argument("--folder", type=existing_folder, default="documents/")
+    all_pairs.add_argument("--join", choices=["matrix", "prefix", "minhash"], default="matrix",
+                           help="matrix scores every pair, prefix only writes the pairs with plagiarism and skips "
+                                "the pairs that can't reach the threshold, minhash only scores the candidate pairs "
+                                "of MinHash LSH (approximate)")
+    all_pairs.add_argument("--bands", type=int, default=50, help="bands of MinHash LSH (--join minhash)")
+    all_pairs.add_argument("--rows", type=int, default=2, help="rows per band of MinHash LSH (--join minhash)")
+
+    for command in (pair, one_vs_folder, all_pairs):
+        command.add_argument("--threshold", type=float, default=PLAGIARISM_THRESHOLD, help="percentage of similarity above which there is plagiarism")
+        command.add_argument("--format", choices=["jsonl", "csv"], default="jsonl")
+        command.add_argument("--output", help="file where the results are written, stdout by default")
+        command.add_argument("--only-plagiarism", action="store_true", help="write only the results with plagiarism")
+    for command in (one_vs_folder, all_pairs):
+        command.add_argument("--top-k", type=int, default=None, help="write only the k most similar results")
+    return parser
+
 if __name__ == "__main__":
-    main()
+    args = create_parser().parse_args()
+    if args.command is None:
+        main(args.workers)
+    else:
+        sys.exit(run_batch(args))
@@ -1,15 +1,23 @@
-from NewModel import similarityCalculation
+import argparse
+from NewModel import add_search_arguments, search_options, similarityCalculation
 
 # Definir el umbral de que es plagio o no
 TXT_FILES_PATH = 'originals/'
 UMBRAL = 0.988
+# Carpeta donde se guardan los embeddings de los originales entre ejecuciones
+EMBEDDINGS_PATH = 'embeddings/'
 
 if __name__ == '__main__':
     file_to_analyse = 'input_file.txt'
-    
-    plagiarism = similarityCalculation(TXT_FILES_PATH, UMBRAL, metric='cosine')
+    # Índice, compresión y cascada léxica, por ejemplo: python3 mainIA.py --prefilter terms --prefilter-k 10
+    parser = argparse.ArgumentParser(description="Evaluación del modelo con RoBERTa en suspicious/")
+    add_search_arguments(parser)
+    args = parser.parse_args()
+
+    plagiarism = similarityCalculation(TXT_FILES_PATH, UMBRAL, metric='cosine', embedding_store_dir=EMBEDDINGS_PATH,
+                                       **search_options(args))
     
     #result = plagiarism.plagiarismDetection(file_to_analyse)
     #Evaluar todos los archivos en el directorio 'Evaluation'
-    results = plagiarism.evaluate_directory('suspicious/')
-    print(results)
\ No newline at end of file
+    # Las etiquetas están en suspicious/labels.csv, las curvas ROC y precisión-recall se guardan en plots/
+    results = plagiarism.evaluate_directory('suspicious/', plot_dir='plots/')
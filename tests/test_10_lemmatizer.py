@@ -0,0 +1,68 @@
+"""
+Authors: Erika García,
+Christian Parrish,
+Jorge Blanco
+"""
+
+import sys
+import os
+import unittest
+from unittest.mock import patch
+
+# This is to add the parent directory to the system path in order to access Model.py
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from Model import TextProcessor
+from Cache import WordCache
+
+
+class FakeToken:
+    def __init__(self, text):
+        self.lemma_ = text.lower().rstrip('s')
+
+
+class FakeNlp:
+    """
+    Stand-in for the spaCy pipeline that records the words sent to pipe
+    """
+    def __init__(self):
+        self.piped = []
+
+    def pipe(self, texts, batch_size=1000):
+        for text in texts:
+            self.piped.append(text)
+            yield [FakeToken(text)]
+
+
+class TestLemmatizer(unittest.TestCase):
+
+    # Each different word is sent to the pipeline only once
+    def test_unique_words_are_lemmatized_once(self):
+        nlp = FakeNlp()
+        with patch('Model.get_nlp', return_value=nlp):
+            processor = TextProcessor("dummy1.txt", "dummy2.txt", word_cache=WordCache())
+            result = processor.lemmatizer([('cars',), ('dogs',), ('cars',)])
+        self.assertEqual(result, ['car', 'dog', 'car'])
+        self.assertEqual(nlp.piped, ['cars', 'dogs'])
+
+    # Contractions keep their special lemmas
+    def test_contractions(self):
+        with patch('Model.get_nlp', return_value=FakeNlp()):
+            processor = TextProcessor("dummy1.txt", "dummy2.txt", word_cache=WordCache())
+            result = processor.lemmatizer([("can't",), ("won't",), ("don't",)])
+        self.assertEqual(result, ['can', 'will', 'do'])
+
+    # Plain strings and empty entries are handled like in the stemmer
+    def test_plain_strings_and_empty_entries(self):
+        with patch('Model.get_nlp', return_value=FakeNlp()):
+            processor = TextProcessor("dummy1.txt", "dummy2.txt", word_cache=WordCache())
+            result = processor.lemmatizer(['houses', (), ('',)])
+        self.assertEqual(result, ['house'])
+
+    # Returns an empty list when the unigram is empty
+    def test_empty_unigram(self):
+        with patch('Model.get_nlp', return_value=FakeNlp()):
+            processor = TextProcessor("dummy1.txt", "dummy2.txt", word_cache=WordCache())
+            self.assertEqual(processor.lemmatizer([]), [])
+
+if __name__ == "__main__":
+    unittest.main()
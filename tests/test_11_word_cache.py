@@ -0,0 +1,102 @@
+"""
+Authors: Erika García,
+Christian Parrish,
+Jorge Blanco
+"""
+
+import sys
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# This is to add the parent directory to the system path in order to access Model.py
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import Model
+from Model import TextProcessor
+from Cache import WordCache
+
+
+class TestWordCache(unittest.TestCase):
+
+    # Only the words that aren't saved are computed, and only once each
+    def test_compute_only_missing_words(self):
+        cache = WordCache()
+        calls = []
+        def compute(words):
+            calls.append(list(words))
+            return [word.upper() for word in words]
+        self.assertEqual(cache.normalize("stem", ["a", "b", "a"], compute), ["A", "B", "A"])
+        self.assertEqual(cache.normalize("stem", ["b", "c"], compute), ["B", "C"])
+        self.assertEqual(calls, [["a", "b"], ["c"]])
+
+    # The same word is saved separately for each normalizer
+    def test_key_includes_normalizer(self):
+        cache = WordCache()
+        cache.put("stem", "running", "run")
+        self.assertIsNone(cache.get("lemma", "running"))
+        self.assertEqual(cache.get("stem", "running"), "run")
+
+    # The memory never holds more than max_size words, the least recently used is removed
+    def test_lru_eviction(self):
+        cache = WordCache(max_size=2)
+        cache.put("stem", "a", "1")
+        cache.put("stem", "b", "2")
+        cache.get("stem", "a")
+        cache.put("stem", "c", "3")
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("stem", "b"))
+        self.assertEqual(cache.get("stem", "a"), "1")
+
+    # The disk store is reused between runs and discarded when the version changes
+    def test_disk_store_version_invalidation(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "words.sqlite")
+            cache = WordCache(path=path, versions={"stem": "1"})
+            cache.put("stem", "cars", "car")
+            cache.close()
+
+            cache = WordCache(path=path, versions={"stem": "1"})
+            self.assertEqual(cache.get("stem", "cars"), "car")
+            cache.close()
+
+            cache = WordCache(path=path, versions={"stem": "2"})
+            self.assertIsNone(cache.get("stem", "cars"))
+            cache.close()
+
+    # A function of versions is only called when the disk store is opened
+    def test_lazy_versions(self):
+        calls = []
+
+        def versions():
+            calls.append(1)
+            return {"stem": "1"}
+        WordCache(versions=versions).close()
+        self.assertEqual(calls, [])
+        with tempfile.TemporaryDirectory() as directory:
+            cache = WordCache(path=os.path.join(directory, "words.sqlite"), versions=versions)
+            cache.close()
+        self.assertEqual(calls, [1])
+
+    # Upgrading the spaCy model changes the version of the lemmas, even with the same spaCy
+    def test_lemma_version_has_model(self):
+        versions = {"spacy": "3.7.0", "nltk": "3.8", "en_core_web_sm": "3.7.0"}
+        with patch.object(Model, "_normalizer_versions", None), \
+                patch.object(Model.metadata, "version", side_effect=versions.get):
+            old_version = Model.normalizer_versions()["lemma"]
+        versions["en_core_web_sm"] = "3.7.1"
+        with patch.object(Model, "_normalizer_versions", None), \
+                patch.object(Model.metadata, "version", side_effect=versions.get):
+            self.assertNotEqual(Model.normalizer_versions()["lemma"], old_version)
+
+    # The stemmer gives the same stems when they come from the cache
+    def test_stemmer_uses_cache(self):
+        cache = WordCache()
+        processor = TextProcessor("dummy1.txt", "dummy2.txt", word_cache=cache)
+        unigram = [('running',), ('easily',), ("won't",)]
+        self.assertEqual(processor.stemmer(unigram), ['run', 'easy', 'wo'])
+        self.assertEqual(cache.get("stem", "running"), 'run')
+        self.assertEqual(processor.stemmer(unigram), ['run', 'easy', 'wo'])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+"""
+Authors: Erika García,
+Christian Parrish,
+Jorge Blanco
+"""
+
+import sys
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# This is to add the parent directory to the system path in order to access Model.py
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from Model import TextProcessor
+from Cache import DocumentStore
+
+
+class TestDocumentStore(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "doc.txt")
+        with open(self.path, "w", encoding="utf-8") as file:
+            file.write("The cars, the dogs!")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    # A document is processed only once while its content doesn't change
+    def test_document_processed_once(self):
+        store = DocumentStore()
+        calls = []
+        def compute(path):
+            calls.append(path)
+            return ["car"]
+        self.assertEqual(store.get(self.path, compute), ["car"])
+        self.assertEqual(store.get(self.path, compute), ["car"])
+        self.assertEqual(len(calls), 1)
+        self.assertIn(self.path, store)
+
+    # A document is processed again when its content changes
+    def test_changed_document_is_processed_again(self):
+        store = DocumentStore()
+        store.get(self.path, lambda path: ["old"])
+        with open(self.path, "w", encoding="utf-8") as file:
+            file.write("Something else")
+        self.assertNotIn(self.path, store)
+        self.assertEqual(store.get(self.path, lambda path: ["new"]), ["new"])
+
+    # The TextProcessor cleans and lemmatizes each file once for every pair it is part of
+    def test_text_processor_reads_from_store(self):
+        store = DocumentStore()
+        lemmatize = lambda unigram: [word[0].rstrip("s") for word in unigram]
+        with patch.object(TextProcessor, "lemmatizer", side_effect=lemmatize) as lemmatizer:
+            first = TextProcessor(self.path, self.path, document_store=store).process()
+            second = TextProcessor(self.path, self.path, document_store=store).process()
+        self.assertEqual(lemmatizer.call_count, 1)
+        self.assertEqual(first["Percentage of similarity"], 100.0)
+        self.assertEqual(second, first)
+        self.assertEqual(TextProcessor(self.path, self.path, document_store=store).document_terms(self.path), ["the", "car", "dog"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+"""
+Authors: Erika García,
+Christian Parrish,
+Jorge Blanco
+"""
+
+import sys
+import os
+import random
+import unittest
+
+# This is to add the parent directory to the system path in order to access Model.py
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from Model import TextProcessor, binary_cosine
+
+
+class TestSetCosineEvaluation(unittest.TestCase):
+
+    # Gives the same percentages as the unigram matrix and cosine_evaluation
+    def test_same_percentage_as_unigram_matrix(self):
+        processor = TextProcessor("dummy1.txt", "dummy2.txt")
+        generator = random.Random(3)
+        for _ in range(300):
+            corpus1 = generator.sample(range(200), generator.randint(1, 120))
+            corpus2 = generator.sample(range(200), generator.randint(1, 120))
+            big_corpus = processor.create_big_corpus(corpus1, corpus2)
+            unigram_matrix = processor.create_unigram_matrix([corpus1, corpus2], big_corpus)
+            expected = processor.results(processor.cosine_evaluation(unigram_matrix))
+            result = processor.results(processor.set_cosine_evaluation(corpus1, corpus2))
+            self.assertEqual(result, expected)
+
+    # Two documents without common terms have a similarity of 0
+    def test_different_corpora(self):
+        processor = TextProcessor("dummy1.txt", "dummy2.txt")
+        self.assertEqual(processor.set_cosine_evaluation(['apple'], ['banana'])[0][1], 0)
+
+    # Equal corpora have a similarity of 1
+    def test_equal_corpora(self):
+        self.assertAlmostEqual(binary_cosine(['apple', 'banana'], ['banana', 'apple']), 1.0)
+
+    # An empty corpus has a similarity of 0 instead of dividing by zero
+    def test_empty_corpus(self):
+        self.assertEqual(binary_cosine([], ['apple']), 0.0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+"""
+Authors: Erika García,
+Christian Parrish,
+Jorge Blanco
+"""
+
+import sys
+import os
+import random
+import unittest
+from itertools import combinations
+
+# This is to add the parent directory to the system path in order to access Model.py
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from Model import binary_cosine
+from AllPairs import AllPairsEngine, score_tile
+
+
+class TestAllPairsEngine(unittest.TestCase):
+
+    def setUp(self):
+        generator = random.Random(5)
+        self.terms = [generator.sample(range(60), generator.randint(0, 25)) for _ in range(23)]
+        self.documents = [f"doc{i}.txt" for i in range(23)]
+
+    # Gives the same similarities as comparing every pair one by one, with any tile size
+    def test_same_as_pairwise(self):
+        expected = [
+            (i, j, binary_cosine(self.terms[i], self.terms[j]))
+            for i, j in combinations(range(len(self.terms)), 2)
+        ]
+        expected = [pair for pair in expected if pair[2] > 0]
+        for tile_size in (1, 4, 100):
+            engine = AllPairsEngine(self.documents, self.terms, tile_size=tile_size)
+            self.assertEqual(list(engine.pairs()), expected)
+
+    # The columns of a tile are multiplied by blocks, any block size gives the same pairs in the same order
+    def test_column_blocks(self):
+        engine = AllPairsEngine(self.documents, self.terms)
+        rows, columns, inverse_norms = engine.matrix[5:12], engine.matrix[5:], engine.inverse_norms[5:]
+        expected = score_tile(rows, columns, inverse_norms, 5, 0.1, column_tile=100)
+        self.assertTrue(expected)
+        for column_tile in (1, 3, 7):
+            self.assertEqual(score_tile(rows, columns, inverse_norms, 5, 0.1, column_tile), expected)
+
+    # Only the pairs above the threshold are returned
+    def test_threshold(self):
+        engine = AllPairsEngine(self.documents, self.terms, tile_size=5)
+        self.assertTrue(all(similarity > 0.3 for _, _, similarity in engine.pairs(0.3)))
+
+    # Top k returns the most similar pairs in descending order
+    def test_top_k(self):
+        engine = AllPairsEngine(self.documents, self.terms, tile_size=3)
+        expected = sorted(engine.pairs(), key=lambda pair: pair[2], reverse=True)[:3]
+        self.assertEqual(engine.top_k(3), expected)
+
+    # The results have the same format as TextProcessor.results
+    def test_results_format(self):
+        engine = AllPairsEngine(["a.txt", "b.txt"], [["x", "y"], ["x", "y"]])
+        result = next(engine.results())
+        self.assertEqual(result["File"], "a.txt")
+        self.assertEqual(result["Plagiarized from"], "b.txt")
+        self.assertEqual(result["Percentage of similarity"], 100.0)
+        self.assertEqual(result["Plagiarism"], "Plagiarism detected")
+
+if __name__ == "__main__":
+    unittest.main()
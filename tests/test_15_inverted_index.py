@@ -0,0 +1,76 @@
+"""
+Authors: Erika García,
+Christian Parrish,
+Jorge Blanco
+"""
+
+import sys
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+# This is to add the parent directory to the system path in order to access Model.py
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from Model import binary_cosine
+from InvertedIndex import InvertedIndex
+
+
+class TestInvertedIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = InvertedIndex()
+        self.index.add("a.txt", ["apple", "banana", "cherry"])
+        self.index.add("b.txt", ["banana", "date"])
+        self.index.add("c.txt", ["fig"])
+
+    # The similarities are the same as comparing the pair directly and sorted from the highest
+    def test_search_scores(self):
+        query = ["apple", "banana"]
+        result = self.index.search(query, k=3)
+        self.assertEqual(result, [
+            ("a.txt", binary_cosine(query, ["apple", "banana", "cherry"])),
+            ("b.txt", binary_cosine(query, ["banana", "date"])),
+        ])
+
+    # Only k results are returned and excluded files are skipped
+    def test_search_k_and_exclude(self):
+        self.assertEqual([path for path, _ in self.index.search(["banana"], k=1)], ["b.txt"])
+        self.assertEqual([path for path, _ in self.index.search(["banana"], k=2, exclude=["b.txt"])], ["a.txt"])
+
+    # A removed document is no longer found
+    def test_remove(self):
+        self.index.remove("a.txt")
+        self.assertEqual([path for path, _ in self.index.search(["apple", "banana"])], ["b.txt"])
+        self.assertNotIn("apple", self.index.postings)
+
+    # The index can be saved and loaded
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "index.json")
+            self.index.save(path)
+            loaded = InvertedIndex.load(path)
+        self.assertEqual(loaded.search(["banana", "fig"], k=3), self.index.search(["banana", "fig"], k=3))
+
+    # Update only preprocesses the files that are new or changed
+    def test_update_only_changed_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            paths = [os.path.join(directory, name) for name in ("x.txt", "y.txt")]
+            for path in paths:
+                with open(path, "w", encoding="utf-8") as file:
+                    file.write(path)
+            processor = MagicMock()
+            processor.document_terms.side_effect = lambda path: [os.path.basename(path)]
+            index = InvertedIndex()
+            index.update(paths, processor)
+            index.update(paths, processor)
+            self.assertEqual(processor.document_terms.call_count, 2)
+
+            with open(paths[0], "w", encoding="utf-8") as file:
+                file.write("changed content")
+            index.update(paths[:1], processor)
+            self.assertEqual(processor.document_terms.call_count, 3)
+            self.assertEqual(len(index), 1)
+
+if __name__ == "__main__":
+    unittest.main()
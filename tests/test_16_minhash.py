@@ -0,0 +1,62 @@
+"""
+Authors: Erika García,
+Christian Parrish,
+Jorge Blanco
+"""
+
+import sys
+import os
+import random
+import unittest
+
+# This is to add the parent directory to the system path in order to access Model.py
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from AllPairs import AllPairsEngine
+from MinHash import MinHashLSH
+
+
+class TestMinHashLSH(unittest.TestCase):
+
+    def setUp(self):
+        generator = random.Random(0)
+        self.terms = []
+        for _ in range(30):
+            original = generator.sample(range(3000), 150)
+            self.terms.append(original)
+            self.terms.append(original[:120] + generator.sample(range(3000), 30))
+
+    # Equal sets have equal signatures and the signature doesn't depend on the order of the terms
+    def test_signature_of_equal_sets(self):
+        lsh = MinHashLSH()
+        self.assertTrue((lsh.signature(["a", "b", "c"]) == lsh.signature(["c", "a", "b", "a"])).all())
+        self.assertEqual(len(lsh.signature(["a"])), lsh.bands * lsh.rows)
+
+    # The pairs found are exactly scored and the near duplicates are all found
+    def test_similar_pairs_found(self):
+        lsh = MinHashLSH(bands=50, rows=2)
+        lsh.index(self.terms)
+        exact = list(AllPairsEngine(range(len(self.terms)), self.terms).pairs(0.501))
+        self.assertEqual(list(lsh.similar_pairs(0.501)), exact)
+        self.assertEqual(lsh.measured_recall(exact), 1.0)
+
+    # Fewer pairs are scored than with the exhaustive comparison
+    def test_fewer_candidates_than_all_pairs(self):
+        lsh = MinHashLSH(bands=20, rows=4)
+        lsh.index(self.terms)
+        total = len(self.terms) * (len(self.terms) - 1) // 2
+        self.assertLess(len(lsh.candidate_pairs()), total)
+
+    # The recall estimate grows with more bands and falls with more rows
+    def test_recall_estimate(self):
+        self.assertGreater(MinHashLSH(bands=50, rows=2).recall_estimate(), MinHashLSH(bands=10, rows=2).recall_estimate())
+        self.assertGreater(MinHashLSH(bands=20, rows=2).recall_estimate(), MinHashLSH(bands=20, rows=5).recall_estimate())
+
+    # A query returns the documents that share a bucket with it
+    def test_query(self):
+        lsh = MinHashLSH()
+        lsh.index(self.terms)
+        self.assertIn(1, lsh.query(self.terms[0]))
+        self.assertEqual(lsh.query([]), [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+"""
+Authors: Erika García,
+Christian Parrish,
+Jorge Blanco
+"""
+
+import sys
+import os
+import random
+import unittest
+
+# This is to add the parent directory to the system path in order to access Model.py
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from AllPairs import AllPairsEngine
+from Model import TextProcessor
+from SetJoin import PrefixFilterJoin
+
+
+class TestPrefixFilterJoin(unittest.TestCase):
+
+    def setUp(self):
+        generator = random.Random(2)
+        self.terms = []
+        for _ in range(40):
+            if self.terms and generator.random() < 0.5:
+                copied = generator.choice(self.terms)
+                self.terms.append(copied[:generator.randint(0, len(copied))] + generator.sample(range(80), 8))
+            else:
+                self.terms.append(generator.sample(range(80), generator.randint(0, 30)))
+
+    # The result is the same as scoring every pair, for several thresholds
+    def test_same_as_exhaustive(self):
+        engine = AllPairsEngine(range(len(self.terms)), self.terms)
+        for threshold in (0.3, 0.501, 0.9):
+            join = PrefixFilterJoin(self.terms, threshold)
+            expected = [pair for pair in engine.pairs(threshold) if round(pair[2] * 100, 2) > threshold * 100]
+            self.assertEqual(join.pairs(), expected)
+
+    # A pair is kept only when TextProcessor.results says it is plagiarism: 2 / sqrt(8) = 0.70710...
+    # is above 0.7071 but its percentage is rounded to 70.71
+    def test_rounded_percentage(self):
+        terms = [["a", "b"], ["a", "b", "c", "d"]]
+        self.assertEqual(PrefixFilterJoin(terms, 0.7071).pairs(), [])
+        self.assertEqual(len(PrefixFilterJoin(terms, 0.707).pairs()), 1)
+        result = TextProcessor("a.txt", "b.txt", threshold=70.71).results([[1.0, 2 / 8 ** 0.5], [2 / 8 ** 0.5, 1.0]])
+        self.assertEqual(result["Plagiarism"], "No plagiarism detected")
+
+    # Fewer pairs than all of them are scored
+    def test_prunes_pairs(self):
+        join = PrefixFilterJoin(self.terms, 0.501)
+        join.pairs()
+        self.assertLess(join.candidates, len(self.terms) * (len(self.terms) - 1) // 2)
+
+    # Identical documents are found and empty documents are ignored
+    def test_identical_and_empty_documents(self):
+        join = PrefixFilterJoin([["a", "b"], [], ["b", "a"]], 0.501)
+        self.assertEqual([(i, j) for i, j, _ in join.pairs()], [(0, 2)])
+
+if __name__ == "__main__":
+    unittest.main()
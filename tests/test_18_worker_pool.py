@@ -0,0 +1,79 @@
+"""
+Authors: Erika García,
+Christian Parrish,
+Jorge Blanco
+"""
+
+import sys
+import os
+import random
+import tempfile
+import unittest
+from importlib.util import find_spec
+
+# This is to add the parent directory to the system path in order to access Model.py
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from AllPairs import AllPairsEngine
+from Cache import DocumentStore
+from Model import TextProcessor
+from Parallel import WorkerPool
+
+# The processes of the pool load the spaCy pipeline when they start
+SPACY_MODEL = find_spec("en_core_web_sm") is not None
+
+
+class TestWorkerPool(unittest.TestCase):
+
+    # With one worker the tasks run in the current process and keep their order
+    def test_serial_map_keeps_order(self):
+        with WorkerPool(1) as pool:
+            self.assertIsNone(pool.executor)
+            self.assertEqual(list(pool.map(pow, [(2, 3), (3, 2), (5, 0)])), [8, 9, 1])
+
+    # The tiles scored through the pool give the same pairs as the engine alone
+    def test_all_pairs_with_pool(self):
+        generator = random.Random(4)
+        terms = [generator.sample(range(50), generator.randint(1, 20)) for _ in range(15)]
+        engine = AllPairsEngine(range(15), terms, tile_size=4)
+        with WorkerPool(1) as pool:
+            self.assertEqual(list(engine.pairs(pool=pool)), list(engine.pairs()))
+            self.assertEqual(engine.top_k(3, pool=pool), engine.top_k(3))
+
+    # With two processes the tasks are sent to the workers and still come back in order
+    @unittest.skipUnless(SPACY_MODEL, "the spaCy model en_core_web_sm is not installed")
+    def test_process_map_keeps_order(self):
+        tasks = [(base, 3) for base in range(40)]
+        with WorkerPool(2) as pool:
+            self.assertIsNotNone(pool.executor)
+            self.assertEqual(list(pool.map(pow, tasks)), [pow(*task) for task in tasks])
+
+    @unittest.skipUnless(SPACY_MODEL, "the spaCy model en_core_web_sm is not installed")
+    def test_all_pairs_with_processes(self):
+        generator = random.Random(4)
+        terms = [generator.sample(range(50), generator.randint(1, 20)) for _ in range(15)]
+        engine = AllPairsEngine(range(15), terms, tile_size=4)
+        with WorkerPool(2) as pool:
+            self.assertEqual(list(engine.pairs(pool=pool)), list(engine.pairs()))
+
+    # The files lemmatized in the workers give the same corpus as the serial run, in the order of the paths
+    @unittest.skipUnless(SPACY_MODEL, "the spaCy model en_core_web_sm is not installed")
+    def test_document_terms_with_processes(self):
+        texts = ["The cats were eating fish.", "Dogs run fast!", "The cat eats fish today", "Birds, birds and more birds"]
+        with tempfile.TemporaryDirectory() as directory:
+            paths = []
+            for i, text in enumerate(texts):
+                paths.append(os.path.join(directory, f"{i}.txt"))
+                with open(paths[-1], "w", encoding="utf-8") as file:
+                    file.write(text)
+            paths.append(paths[0])
+            with WorkerPool(1) as pool:
+                serial = pool.document_terms(paths, TextProcessor(None, None, document_store=DocumentStore()))
+            processor = TextProcessor(None, None, document_store=DocumentStore())
+            with WorkerPool(2) as pool:
+                parallel = pool.document_terms(paths, processor)
+            self.assertEqual(parallel, serial)
+            self.assertEqual(parallel[0], parallel[-1])
+            self.assertEqual(len(processor.document_store), len(texts))
+
+if __name__ == "__main__":
+    unittest.main()
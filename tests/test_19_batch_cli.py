@@ -0,0 +1,134 @@
+"""
+Authors: Erika García,
+Christian Parrish,
+Jorge Blanco
+"""
+
+import sys
+import os
+import io
+import json
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# This is to add the parent directory to the system path in order to access Model.py
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from Model import TextProcessor
+from InvertedIndex import InvertedIndex
+import main
+
+
+class TestBatchCli(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.folder = os.path.join(self.directory.name, "documents")
+        os.mkdir(self.folder)
+        texts = {"a.txt": "the cat eats fish", "b.txt": "the cat eats fish today", "c.txt": "dogs run fast"}
+        for name, text in texts.items():
+            with open(os.path.join(self.folder, name), "w", encoding="utf-8") as file:
+                file.write(text)
+        self.lemmatizer = patch.object(TextProcessor, "lemmatizer", TextProcessor.stemmer)
+        self.lemmatizer.start()
+
+    def tearDown(self):
+        self.lemmatizer.stop()
+        self.directory.cleanup()
+
+    def run_batch(self, *arguments):
+        stdout = io.StringIO()
+        with patch("sys.stdout", stdout):
+            exit_code = main.run_batch(main.create_parser().parse_args(arguments))
+        return exit_code, stdout.getvalue()
+
+    # A pair with plagiarism is written as JSON Lines and the exit code is 1
+    def test_pair_jsonl(self):
+        exit_code, output = self.run_batch("pair", os.path.join(self.folder, "a.txt"), os.path.join(self.folder, "b.txt"))
+        result = json.loads(output)
+        self.assertEqual(exit_code, 1)
+        self.assertEqual(result["Plagiarism"], "Plagiarism detected")
+
+    # The threshold changes the decision and the exit code
+    def test_pair_threshold(self):
+        exit_code, output = self.run_batch("pair", os.path.join(self.folder, "a.txt"), os.path.join(self.folder, "b.txt"), "--threshold", "95")
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(json.loads(output)["Plagiarism"], "No plagiarism detected")
+
+    # All pairs are written as CSV with a header
+    def test_all_pairs_csv(self):
+        exit_code, output = self.run_batch("all-pairs", "--folder", self.folder, "--format", "csv")
+        lines = output.splitlines()
+        self.assertEqual(lines[0], ",".join(main.RESULT_FIELDS))
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(exit_code, 1)
+
+    # One file is compared with the folder through the index, without comparing it with itself
+    def test_one_vs_folder(self):
+        index = os.path.join(self.directory.name, "index.json")
+        exit_code, output = self.run_batch("one-vs-folder", os.path.join(self.folder, "a.txt"), "--folder", self.folder, "--index", index, "--top-k", "1")
+        results = [json.loads(line) for line in output.splitlines()]
+        self.assertEqual([os.path.basename(result["Plagiarized from"]) for result in results], ["b.txt"])
+        self.assertTrue(os.path.isfile(index))
+
+    # The query file stays in the saved index, so a second query doesn't preprocess or index anything
+    def test_one_vs_folder_twice(self):
+        index = os.path.join(self.directory.name, "index.json")
+        self.run_batch("one-vs-folder", os.path.join(self.folder, "a.txt"), "--folder", self.folder, "--index", index)
+        with patch.object(InvertedIndex, "remove") as remove, patch.object(TextProcessor, "extract_terms") as extract_terms:
+            exit_code, output = self.run_batch("one-vs-folder", os.path.join(self.folder, "b.txt"), "--folder", self.folder, "--index", index)
+        remove.assert_not_called()
+        extract_terms.assert_not_called()
+        results = [json.loads(line) for line in output.splitlines()]
+        self.assertEqual([os.path.basename(result["Plagiarized from"]) for result in results], ["a.txt"])
+        self.assertEqual(len(InvertedIndex.load(index)), 3)
+
+    # An error while running exits with 3 and is written to stderr, not confused with plagiarism found
+    def test_error_exit_code(self):
+        stderr = io.StringIO()
+        with patch("sys.stderr", stderr), patch.object(main, "WorkerPool", side_effect=RuntimeError("no processes")):
+            exit_code, output = self.run_batch("pair", os.path.join(self.folder, "a.txt"), os.path.join(self.folder, "b.txt"))
+        self.assertEqual(exit_code, main.EXIT_ERROR)
+        self.assertIn("no processes", stderr.getvalue())
+        self.assertEqual(output, "")
+
+    def test_output_error_exit_code(self):
+        output = os.path.join(self.directory.name, "missing", "results.jsonl")
+        with patch("sys.stderr", io.StringIO()):
+            exit_code, _ = self.run_batch("all-pairs", "--folder", self.folder, "--output", output)
+        self.assertEqual(exit_code, main.EXIT_ERROR)
+
+    # Wrong arguments exit with 2
+    def test_wrong_arguments_exit_code(self):
+        with patch("sys.stderr", io.StringIO()), self.assertRaises(SystemExit) as context:
+            main.create_parser().parse_args(["pair", os.path.join(self.folder, "missing.txt"), os.path.join(self.folder, "a.txt")])
+        self.assertEqual(context.exception.code, 2)
+
+    # Only the results with plagiarism are written when asked
+    def test_only_plagiarism(self):
+        exit_code, output = self.run_batch("all-pairs", "--folder", self.folder, "--only-plagiarism", "--threshold", "99")
+        self.assertEqual(output, "")
+        self.assertEqual(exit_code, 0)
+
+    # The prefix filter join writes the same pairs as scoring every pair and reports the pairs it scored
+    def test_prefix_join(self):
+        for threshold in ("30", "50.1", "99"):
+            expected = self.run_batch("all-pairs", "--folder", self.folder, "--only-plagiarism", "--threshold", threshold)
+            stderr = io.StringIO()
+            with patch("sys.stderr", stderr):
+                found = self.run_batch("all-pairs", "--folder", self.folder, "--join", "prefix", "--threshold", threshold)
+            self.assertEqual(found, expected)
+            self.assertIn("of 3 pairs scored", stderr.getvalue())
+
+    # MinHash LSH only scores its candidate pairs, the near duplicates are found and the recall is reported
+    def test_minhash_join(self):
+        expected = self.run_batch("all-pairs", "--folder", self.folder, "--only-plagiarism")
+        stderr = io.StringIO()
+        with patch("sys.stderr", stderr):
+            found = self.run_batch("all-pairs", "--folder", self.folder, "--join", "minhash", "--bands", "50", "--rows", "2")
+        self.assertEqual(found, expected)
+        self.assertIn("50 bands x 2 rows", stderr.getvalue())
+        self.assertIn("estimated recall at the threshold", stderr.getvalue())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+"""
+Authors: Erika García,
+Christian Parrish,
+Jorge Blanco
+"""
+
+import sys
+import os
+import tempfile
+import unittest
+import numpy as np
+
+# This is to add the parent directory to the system path in order to access EmbeddingStore.py
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from EmbeddingStore import EmbeddingStore
+
+
+class TestEmbeddingStore(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "embeddings")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    # The embeddings are saved and opened again in another run
+    def test_save_and_reopen(self):
+        store = EmbeddingStore(self.path, "model")
+        vectors = np.random.RandomState(0).rand(100, 8).astype(np.float32)
+        for row, vector in enumerate(vectors):
+            store.put(f"doc{row}.txt", f"hash{row}", vector)
+        store.save()
+
+        reopened = EmbeddingStore(self.path, "model", read_only=True)
+        self.assertEqual(len(reopened), 100)
+        self.assertTrue(np.array_equal(reopened.get("doc42.txt", "hash42"), vectors[42]))
+        self.assertTrue(np.array_equal(reopened.embeddings(["doc3.txt", "doc1.txt"]), vectors[[3, 1]]))
+
+    # A changed document is written in its same row and the old content is no longer valid
+    def test_update_in_place(self):
+        store = EmbeddingStore(self.path, "model")
+        store.put("doc.txt", "old", np.ones(4))
+        store.put("doc.txt", "new", np.zeros(4))
+        self.assertEqual(store.count, 1)
+        self.assertIsNone(store.get("doc.txt", "old"))
+        self.assertTrue(np.array_equal(store.get("doc.txt", "new"), np.zeros(4)))
+
+    # The embeddings of another model aren't used
+    def test_other_model_is_ignored(self):
+        store = EmbeddingStore(self.path, "model-a")
+        store.put("doc.txt", "hash", np.ones(4))
+        store.save()
+        self.assertIsNone(EmbeddingStore(self.path, "model-b").get("doc.txt", "hash"))
+
+    # A document can have a block of rows and its size can change
+    def test_blocks(self):
+        store = EmbeddingStore(self.path, "model")
+        store.put("doc.txt", "one", np.ones((3, 4)))
+        store.put("other.txt", "two", np.zeros(4))
+        self.assertEqual(store.get_block("doc.txt", "one").shape, (3, 4))
+        store.put("doc.txt", "three", np.full((5, 4), 2.0))
+        self.assertTrue(np.array_equal(store.get_block("doc.txt", "three"), np.full((5, 4), 2.0)))
+        self.assertTrue(np.array_equal(store.get_block("other.txt"), np.zeros((1, 4))))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+"""
+Authors: Erika García,
+Christian Parrish,
+Jorge Blanco
+"""
+
+import sys
+import os
+import unittest
+import numpy as np
+
+# This is to add the parent directory to the system path in order to access VectorIndex.py
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from VectorIndex import FlatIndex, top_k
+
+
+class TestVectorIndex(unittest.TestCase):
+
+    def setUp(self):
+        random = np.random.RandomState(0)
+        self.embeddings = random.rand(50, 16).astype(np.float32)
+        self.queries = random.rand(4, 16).astype(np.float32)
+        self.names = [f"org-{row:03d}.txt" for row in range(50)]
+
+    # The k best columns are returned sorted, ties go to the lowest column
+    def test_top_k(self):
+        scores = np.array([[0.1, 0.9, 0.5, 0.9, 0.2]])
+        self.assertEqual(top_k(scores, 3).tolist(), [[1, 3, 2]])
+        self.assertEqual(top_k(scores, 2, largest=False).tolist(), [[0, 4]])
+        self.assertEqual(top_k(scores, 10).shape, (1, 5))
+
+    # The search gives the same documents and scores as comparing one by one
+    def test_matches_brute_force(self):
+        index = FlatIndex(self.names, self.embeddings)
+        cosine = index.search(self.queries, k=5, metric='cosine')
+        euclidean = index.search(self.queries, k=5, metric='euclidean')
+        for query, cosine_result, euclidean_result in zip(self.queries, cosine, euclidean):
+            similarities = self.embeddings @ query / (np.linalg.norm(self.embeddings, axis=1) * np.linalg.norm(query))
+            distances = np.linalg.norm(self.embeddings - query, axis=1)
+            self.assertEqual([name for name, _ in cosine_result], [self.names[i] for i in np.argsort(-similarities)[:5]])
+            self.assertEqual([name for name, _ in euclidean_result], [self.names[i] for i in np.argsort(distances)[:5]])
+            self.assertAlmostEqual(cosine_result[0][1], similarities.max(), places=5)
+            self.assertAlmostEqual(euclidean_result[0][1], distances.min(), places=5)
+
+    # A document with several rows (chunks) keeps the best score of its rows
+    def test_blocks(self):
+        index = FlatIndex(["a.txt", "b.txt"], self.embeddings[:5], rows_per_document=[2, 3])
+        scores = index.scores(self.queries, 'euclidean')
+        distances = np.linalg.norm(self.embeddings[:5][None, :, :] - self.queries[:, None, :], axis=2)
+        self.assertTrue(np.allclose(scores[:, 0], distances[:, :2].min(axis=1)))
+        self.assertTrue(np.allclose(scores[:, 1], distances[:, 2:].min(axis=1)))
+
+    def test_unknown_metric(self):
+        with self.assertRaises(ValueError):
+            FlatIndex(self.names, self.embeddings).scores(self.queries, 'manhattan')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+"""
+Authors: Erika García,
+Christian Parrish,
+Jorge Blanco
+"""
+
+import sys
+import os
+import tempfile
+import unittest
+import numpy as np
+
+# This is to add the parent directory to the system path in order to access VectorIndex.py
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from EmbeddingStore import EmbeddingStore
+from VectorIndex import FlatIndex, IVFIndex, recall_report
+
+
+class TestIVFIndex(unittest.TestCase):
+
+    def setUp(self):
+        random = np.random.RandomState(0)
+        centers = random.randn(20, 16)
+        self.embeddings = (centers[random.randint(0, 20, 2000)] + 0.3 * random.randn(2000, 16)).astype(np.float32)
+        self.queries = (centers[random.randint(0, 20, 20)] + 0.3 * random.randn(20, 16)).astype(np.float32)
+        self.names = [f"org-{row:04d}.txt" for row in range(2000)]
+
+    # Probing every list gives the same result as the exact search
+    def test_all_lists_is_exact(self):
+        exact = FlatIndex(self.names, self.embeddings)
+        index = IVFIndex(self.names, self.embeddings, n_lists=20, nprobe=20)
+        for metric in ('cosine', 'euclidean'):
+            expected = exact.search(self.queries, k=5, metric=metric)
+            found = index.search(self.queries, k=5, metric=metric)
+            self.assertEqual([[name for name, _ in result] for result in found], [[name for name, _ in result] for result in expected])
+
+    # Every row is in exactly one list
+    def test_lists(self):
+        index = IVFIndex(self.names, self.embeddings, n_lists=20)
+        self.assertEqual(index.list_offsets[-1], 2000)
+        self.assertEqual(sorted(index.list_rows.tolist()), list(range(2000)))
+
+    # With few probed lists the recall is high and grows with nprobe
+    def test_recall_report(self):
+        exact = FlatIndex(self.names, self.embeddings)
+        index = IVFIndex(self.names, self.embeddings, n_lists=20)
+        report = recall_report(exact, index, self.queries, k=10, nprobes=(1, 4, 20))
+        recalls = [line["recall"] for line in report]
+        self.assertEqual(recalls, sorted(recalls))
+        self.assertGreater(recalls[1], 0.9)
+        self.assertEqual(recalls[2], 1.0)
+
+    # The saved index is loaded only with the same fingerprint
+    def test_save_and_load(self):
+        index = IVFIndex(self.names, self.embeddings, n_lists=20, nprobe=3)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "ivf.npz")
+            index.save(path, "corpus-1")
+            with np.load(path) as data:
+                self.assertNotIn("embeddings", data.files)
+            loaded = IVFIndex.load(path, self.embeddings, "corpus-1")
+            self.assertIsNone(IVFIndex.load(path, self.embeddings, "corpus-2"))
+            self.assertIsNone(IVFIndex.load(path, self.embeddings[:10], "corpus-1"))
+        self.assertEqual(loaded.nprobe, 3)
+        self.assertTrue(np.array_equal(loaded.list_rows, index.list_rows))
+        self.assertTrue(np.array_equal(loaded.scores(self.queries), index.scores(self.queries)))
+        self.assertTrue(np.array_equal(loaded.scores(self.queries, 'euclidean'), index.scores(self.queries, 'euclidean')))
+
+    # The vectors of a loaded index can be the memmap of the embedding store
+    def test_load_from_store(self):
+        index = IVFIndex(self.names, self.embeddings, n_lists=20)
+        with tempfile.TemporaryDirectory() as directory:
+            store = EmbeddingStore(os.path.join(directory, "embeddings"), "model")
+            for name, vector in zip(self.names, self.embeddings):
+                store.put(name, "hash", vector)
+            store.save()
+            path = os.path.join(directory, "ivf.npz")
+            index.save(path)
+            store = EmbeddingStore(os.path.join(directory, "embeddings"), "model", read_only=True)
+            loaded = IVFIndex.load(path, store.matrix[:store.count])
+            self.assertTrue(np.array_equal(loaded.scores(self.queries), index.scores(self.queries)))
+            del loaded, store
+
+    # A document with several rows keeps the best score of its probed rows
+    def test_blocks(self):
+        index = IVFIndex(["a.txt", "b.txt"], self.embeddings[:5], rows_per_document=[2, 3], n_lists=2, nprobe=2)
+        exact = FlatIndex(["a.txt", "b.txt"], self.embeddings[:5], rows_per_document=[2, 3])
+        self.assertTrue(np.allclose(index.scores(self.queries, 'euclidean'), exact.scores(self.queries, 'euclidean')))
+
+
+if __name__ == '__main__':
+    unittest.main()
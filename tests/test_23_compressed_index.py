@@ -0,0 +1,100 @@
+"""
+Authors: Erika García,
+Christian Parrish,
+Jorge Blanco
+"""
+
+import sys
+import os
+import tempfile
+import tracemalloc
+import unittest
+from unittest.mock import patch
+import numpy as np
+
+# This is to add the parent directory to the system path in order to access VectorIndex.py
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from VectorIndex import FlatIndex, CompressedIndex, ScalarQuantizer, ProductQuantizer
+
+
+class TestCompressedIndex(unittest.TestCase):
+
+    def setUp(self):
+        random = np.random.RandomState(0)
+        centers = random.randn(30, 64)
+        self.embeddings = (centers[random.randint(0, 30, 1000)] + 0.2 * random.randn(1000, 64)).astype(np.float32)
+        self.queries = (self.embeddings[random.randint(0, 1000, 10)] + 0.2 * random.randn(10, 64)).astype(np.float32)
+        self.names = [f"org-{row:04d}.txt" for row in range(1000)]
+        self.exact = FlatIndex(self.names, self.embeddings)
+
+    # The int8 codes decode close to the original vectors
+    def test_scalar_quantizer(self):
+        quantizer = ScalarQuantizer(64)
+        quantizer.train(self.embeddings)
+        codes = quantizer.encode(self.embeddings)
+        self.assertEqual(codes.dtype, np.int8)
+        self.assertLess(np.abs(quantizer.decode(codes) - self.embeddings).max(), quantizer.scale.max())
+        self.assertTrue(np.allclose(quantizer.inner_products(self.queries, codes), self.queries @ quantizer.decode(codes).T, atol=1e-3))
+
+    # The distance tables give the same inner products as the decoded vectors
+    def test_product_quantizer(self):
+        quantizer = ProductQuantizer(64, subspaces=8)
+        quantizer.train(self.embeddings)
+        codes = quantizer.encode(self.embeddings)
+        self.assertEqual(codes.shape, (1000, 8))
+        self.assertTrue(np.allclose(quantizer.inner_products(self.queries, codes), self.queries @ quantizer.decode(codes).T, atol=1e-3))
+
+    def test_memory(self):
+        self.assertEqual(CompressedIndex(self.names, self.embeddings, method='int8').codes.nbytes * 4, self.embeddings.nbytes)
+        self.assertEqual(CompressedIndex(self.names, self.embeddings, method='pq', subspaces=8).codes.nbytes * 32, self.embeddings.nbytes)
+
+    # With the re-rank the most similar document and its score are the exact ones
+    def test_rerank(self):
+        for method in ('int8', 'pq'):
+            index = CompressedIndex(self.names, self.embeddings, method=method, subspaces=8, rerank=20, full_embeddings=self.embeddings)
+            for metric in ('cosine', 'euclidean'):
+                expected = self.exact.search(self.queries, k=1, metric=metric)
+                found = index.search(self.queries, k=1, metric=metric)
+                for expected_result, found_result in zip(expected, found):
+                    self.assertEqual(found_result[0][0], expected_result[0][0])
+                    self.assertAlmostEqual(found_result[0][1], expected_result[0][1], places=5)
+
+    # Without re-rank the closest document is still found on the codes
+    def test_search_on_codes(self):
+        index = CompressedIndex(self.names, self.embeddings, method='int8')
+        expected = self.exact.search(self.queries, k=1)
+        found = index.search(self.queries, k=1)
+        self.assertEqual([result[0][0] for result in found], [result[0][0] for result in expected])
+
+    # Built from the rows of a memmap, block by block: the same codes and norms, and the memory
+    # used while building grows with the codes, not with the float rows
+    def test_build_from_memmap_blocks(self):
+        with tempfile.TemporaryDirectory() as directory, \
+                patch.object(CompressedIndex, "BLOCK_ROWS", 250), patch.object(CompressedIndex, "TRAINING_ROWS", 250):
+            for method in ('int8', 'pq'):
+                peaks = []
+                for copies in (2, 8):
+                    embeddings = np.tile(self.embeddings, (copies, 1))
+                    order = np.random.RandomState(copies).permutation(len(embeddings))
+                    store = np.lib.format.open_memmap(os.path.join(directory, f"{method}{copies}.npy"), mode="w+",
+                                                      dtype=np.float32, shape=embeddings.shape)
+                    store[order] = embeddings
+                    store.flush()
+                    names = list(range(len(embeddings)))
+                    tracemalloc.start()
+                    index = CompressedIndex(names, None, method=method, subspaces=8, full_embeddings=store, full_rows=order)
+                    peaks.append(tracemalloc.get_traced_memory()[1])
+                    tracemalloc.stop()
+                    expected = CompressedIndex(names, embeddings, method=method, subspaces=8)
+                    np.testing.assert_array_equal(index.codes, expected.codes)
+                    np.testing.assert_allclose(index.squared_norms, expected.squared_norms, rtol=1e-6)
+                    del store
+                self.assertLess(peaks[1] - peaks[0], 6 * self.embeddings.nbytes / 2)
+
+    def test_unknown_method(self):
+        with self.assertRaises(ValueError):
+            CompressedIndex(self.names, self.embeddings, method='float16')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+"""
+Authors: Erika García,
+Christian Parrish,
+Jorge Blanco
+"""
+
+import sys
+import os
+import tempfile
+import unittest
+import torch
+
+# This is to add the parent directory to the system path in order to access InferenceBackend.py
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from InferenceBackend import InferenceBackend, parity_report
+
+
+class FakeCalculation:
+    # Returns a fixed most similar original and score for every text
+    def __init__(self, results, percentaje_simil=0.988):
+        self.results = results
+        self.percentaje_simil = percentaje_simil
+        self.metric = 'cosine'
+
+    def _read_file(self, path):
+        with open(path, encoding='utf-8') as file:
+            return file.read()
+
+    def _preprocess_text(self, text):
+        return text
+
+    def dataBaseProcessing(self):
+        return {}
+
+    def similaritySearch(self, texts, files_and_content, k=1):
+        return [{'cosine': [self.results[text]], 'euclidean': []} for text in texts]
+
+
+class TestInferenceBackend(unittest.TestCase):
+
+    # The Linear layers are replaced by int8 layers that give almost the same output
+    def test_quantize(self):
+        torch.manual_seed(0)
+        model = torch.nn.Sequential(torch.nn.Linear(16, 16), torch.nn.ReLU(), torch.nn.Linear(16, 4))
+        inputs = torch.randn(8, 16)
+        expected = model(inputs)
+        quantized = InferenceBackend(quantize=True).prepare(model)
+        self.assertNotIsInstance(quantized[0], torch.nn.Linear)
+        with InferenceBackend(quantize=True).context():
+            self.assertTrue(torch.allclose(quantized(inputs), expected, atol=0.05))
+
+    def test_context(self):
+        with InferenceBackend().context():
+            self.assertTrue(torch.is_inference_mode_enabled())
+        self.assertFalse(torch.is_inference_mode_enabled())
+
+    def test_id(self):
+        self.assertEqual(InferenceBackend().id, "fp32")
+        self.assertEqual(InferenceBackend(quantize=True).id, "int8")
+        with self.assertRaises(ValueError):
+            InferenceBackend(quantize=True, bf16=True)
+
+    def test_threads(self):
+        threads = torch.get_num_threads()
+        try:
+            InferenceBackend(intra_op_threads=1).configure_threads()
+            self.assertEqual(torch.get_num_threads(), 1)
+        finally:
+            torch.set_num_threads(threads)
+
+    # The report counts the drift, the changed originals and the changed decisions
+    def test_parity_report(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for name in ("a", "b"):
+                with open(os.path.join(directory, f"{name}.txt"), "w", encoding="utf-8") as file:
+                    file.write(name)
+            reference = FakeCalculation({"a": ("org-1.txt", 0.990), "b": ("org-2.txt", 0.950)})
+            candidate = FakeCalculation({"a": ("org-1.txt", 0.987), "b": ("org-3.txt", 0.951)})
+            report = parity_report(reference, candidate, directory)
+        self.assertAlmostEqual(report["max_drift"], 0.003)
+        self.assertEqual(report["changed_files"], 1)
+        self.assertEqual(report["changed_decisions"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
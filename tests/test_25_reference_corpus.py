@@ -0,0 +1,73 @@
+"""
+Authors: Erika García,
+Christian Parrish,
+Jorge Blanco
+"""
+
+import sys
+import os
+import tempfile
+import unittest
+
+# This is to add the parent directory to the system path in order to access Corpus.py
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from Corpus import ReferenceCorpus
+
+
+class TestReferenceCorpus(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.processed = []
+        for name in ("a", "b", "c"):
+            self.write(f"{name}.txt", f"text {name}")
+        self.write("notes.md", "ignored")
+        self.corpus = ReferenceCorpus(self.directory.name, self.preprocess)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def preprocess(self, text):
+        self.processed.append(text)
+        return text.upper()
+
+    def write(self, name, text):
+        with open(os.path.join(self.directory.name, name), "w", encoding="utf-8") as file:
+            file.write(text)
+
+    # Every file is preprocessed only once while it doesn't change
+    def test_loaded_once(self):
+        texts = self.corpus.refresh()
+        self.assertEqual(texts, {"a.txt": "TEXT A", "b.txt": "TEXT B", "c.txt": "TEXT C"})
+        self.assertIs(self.corpus.refresh(), texts)
+        self.assertEqual(len(self.processed), 3)
+        self.assertEqual(self.corpus.version, 1)
+
+    # Only the changed file is preprocessed, the removed and new files are followed
+    def test_incremental_refresh(self):
+        self.corpus.refresh()
+        self.write("b.txt", "new text b")
+        os.remove(os.path.join(self.directory.name, "c.txt"))
+        self.write("d.txt", "text d")
+        texts = self.corpus.refresh()
+        self.assertEqual(texts, {"a.txt": "TEXT A", "b.txt": "NEW TEXT B", "d.txt": "TEXT D"})
+        self.assertEqual(sorted(self.processed[3:]), ["new text b", "text d"])
+        self.assertEqual(self.corpus.version, 2)
+
+    # A file saved again with the same content isn't preprocessed again
+    def test_same_content(self):
+        self.corpus.refresh()
+        path = os.path.join(self.directory.name, "a.txt")
+        os.utime(path, ns=(0, 0))
+        self.corpus.refresh()
+        self.assertEqual(len(self.processed), 3)
+        self.assertEqual(self.corpus.version, 1)
+
+    def test_text_hash(self):
+        texts = self.corpus.refresh()
+        self.assertEqual(self.corpus.text_hash("a.txt", texts["a.txt"]), self.corpus.text_hash("x.txt", "TEXT A"))
+        self.assertNotEqual(self.corpus.text_hash("a.txt", "other"), self.corpus.text_hash("a.txt", texts["a.txt"]))
+
+
+if __name__ == '__main__':
+    unittest.main()
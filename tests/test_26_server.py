@@ -0,0 +1,168 @@
+"""
+Authors: Erika García,
+Christian Parrish,
+Jorge Blanco
+"""
+
+import sys
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+# This is to add the parent directory to the system path in order to access Server.py
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from Model import TextProcessor
+from Server import create_server, LexicalService, RequestBatcher, SimilarityClient
+
+
+class FakeCalculation:
+    # The most similar original of a text is the original with its first word
+    metric = 'cosine'
+    percentaje_simil = 0.9
+
+    def __init__(self):
+        self.searches = []
+
+    def dataBaseProcessing(self):
+        return {"apple.txt": "apple", "pear.txt": "pear"}
+
+    def _read_file(self, path):
+        with open(path, encoding='utf-8') as file:
+            return file.read()
+
+    def _preprocess_text(self, text):
+        if text.startswith("boom"):
+            raise ValueError("text that can't be preprocessed")
+        return text.lower()
+
+    def similaritySearch(self, texts, files_and_content, k=5):
+        self.searches.append(len(texts))
+        if any(text.startswith("crash") for text in texts):
+            raise RuntimeError("text that can't be searched")
+        results = []
+        for text in texts:
+            scores = sorted(((1.0 if name[:-4] in text.split()[:1] else 0.5, name) for name in files_and_content), reverse=True)
+            results.append({
+                'cosine': [(name, score) for score, name in scores][:k],
+                'euclidean': [(name, 1 - score) for score, name in scores][:k],
+            })
+        return results
+
+
+class TestServer(unittest.TestCase):
+
+    def setUp(self):
+        self.calculation = FakeCalculation()
+        self.server = create_server(self.calculation, port=0, max_wait=0.2)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.client = SimilarityClient(f"http://127.0.0.1:{self.server.server_address[1]}")
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.server.batcher.close()
+
+    def test_check_text(self):
+        result = self.client.check_text("Apple pie", k=1)
+        self.assertEqual(result["most_similar"], "apple.txt")
+        self.assertTrue(result["plagiarism"])
+        self.assertEqual(len(result["cosine"]), 1)
+
+    def test_check_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "input.txt")
+            with open(path, "w", encoding="utf-8") as file:
+                file.write("pear juice")
+            result = self.client.check_file(path)
+        self.assertEqual(result["file"], os.path.abspath(path))
+        self.assertEqual(result["most_similar"], "pear.txt")
+        with self.assertRaises(RuntimeError):
+            self.client.check_file(path)
+
+    # The queries of a batch and of concurrent requests share the same search
+    def test_batching(self):
+        results = self.client.batch(texts=["apple", "pear", "plum"])
+        self.assertEqual([result["most_similar"] for result in results], ["apple.txt", "pear.txt", "pear.txt"])
+        self.assertFalse(results[2]["plagiarism"])
+
+        answers = {}
+        def check(text):
+            answers[text] = self.client.check_text(text)["most_similar"]
+        threads = [threading.Thread(target=check, args=(text,)) for text in ("apple tart", "pear tart", "apple cake")]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(answers, {"apple tart": "apple.txt", "pear tart": "pear.txt", "apple cake": "apple.txt"})
+        self.assertLess(len(self.calculation.searches), 5)
+        self.assertEqual(self.client.health()["queries"], 6)
+
+    # A query that fails only fails its own request, the others of the same batch are answered
+    def test_bad_query_in_batch(self):
+        results = self.client.batch(texts=["apple", "boom", "crash", "pear"])
+        self.assertEqual(results[0]["most_similar"], "apple.txt")
+        self.assertIn("error", results[1])
+        self.assertIn("error", results[2])
+        self.assertEqual(results[3]["most_similar"], "pear.txt")
+
+    def test_bad_concurrent_request(self):
+        batcher = RequestBatcher(self.calculation, max_wait=0.2)
+        futures = [batcher.submit(text) for text in ("apple", "crash", "boom", "pear")]
+        self.assertEqual(futures[0].result()["most_similar"], "apple.txt")
+        with self.assertRaises(RuntimeError):
+            futures[1].result()
+        with self.assertRaises(ValueError):
+            futures[2].result()
+        self.assertEqual(futures[3].result()["most_similar"], "pear.txt")
+        batcher.close()
+
+
+class TestLexicalServer(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.folder = os.path.join(self.directory.name, "documents")
+        os.mkdir(self.folder)
+        texts = {"a.txt": "the cat eats fish", "b.txt": "the cat eats fish today", "c.txt": "dogs run fast"}
+        for name, text in texts.items():
+            with open(os.path.join(self.folder, name), "w", encoding="utf-8") as file:
+                file.write(text)
+        self.lemmatizer = patch.object(TextProcessor, "lemmatizer", TextProcessor.stemmer)
+        self.lemmatizer.start()
+        self.lexical = LexicalService(self.folder, index_path=os.path.join(self.directory.name, "index.json"))
+        self.server = create_server(None, port=0, lexical=self.lexical)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.client = SimilarityClient(f"http://127.0.0.1:{self.server.server_address[1]}")
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.lemmatizer.stop()
+        self.directory.cleanup()
+
+    # The same results as main.py pair and one-vs-folder
+    def test_lexical_pair(self):
+        file1, file2 = os.path.join(self.folder, "a.txt"), os.path.join(self.folder, "b.txt")
+        result = self.client.lexical_pair(file1, file2)
+        self.assertTrue(result["plagiarism"])
+        self.assertEqual(result["result"], TextProcessor(os.path.abspath(file1), os.path.abspath(file2)).process())
+
+    def test_lexical_check_file(self):
+        result = self.client.lexical_check_file(os.path.join(self.folder, "a.txt"), k=1)
+        self.assertTrue(result["plagiarism"])
+        self.assertEqual([os.path.basename(match["Plagiarized from"]) for match in result["results"]], ["b.txt"])
+        self.assertEqual(len(self.lexical.index), 3)
+        with self.assertRaises(RuntimeError):
+            self.client.lexical_check_file(os.path.join(self.folder, "missing.txt"))
+
+    # Only the served models have endpoints
+    def test_transformer_not_served(self):
+        with self.assertRaises(RuntimeError):
+            self.client.check_text("apple")
+        self.assertEqual(self.client.health()["lexical_queries"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
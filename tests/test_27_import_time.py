@@ -0,0 +1,69 @@
+"""
+Authors: Erika García,
+Christian Parrish,
+Jorge Blanco
+"""
+
+import sys
+import os
+import json
+import subprocess
+import unittest
+
+# The modules are imported in a new interpreter from the parent directory
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Libraries that take seconds to import and must only be imported when they are used
+HEAVY_MODULES = ("torch", "transformers", "matplotlib", "sklearn", "spacy", "nltk", "scipy")
+
+# Seconds that importing one of the project modules may take
+IMPORT_BUDGET_SECONDS = 1.0
+
+
+def measure_import(module):
+    # This function returns the seconds the import took and the heavy libraries it imported
+    code = (
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "seconds = time.perf_counter() - start\n"
+        f"print(json.dumps([seconds, [name for name in {HEAVY_MODULES!r} if name in sys.modules]]))\n"
+    )
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+class TestImportTime(unittest.TestCase):
+
+    def test_no_heavy_imports(self):
+        for module in ("Model", "main", "NewModel", "InferenceBackend", "Server", "VectorIndex", "Corpus"):
+            with self.subTest(module=module):
+                _, imported = measure_import(module)
+                self.assertEqual(imported, [])
+
+    def test_import_budget(self):
+        for module in ("main", "NewModel"):
+            with self.subTest(module=module):
+                seconds, _ = measure_import(module)
+                self.assertLess(seconds, IMPORT_BUDGET_SECONDS)
+
+    # Without the spaCy distribution the modules import and the stemmer works, its lemma version is "missing"
+    def test_import_without_spacy(self):
+        code = (
+            "import os, sys, tempfile\n"
+            "from importlib import metadata\n"
+            "version = metadata.version\n"
+            "def without_spacy(name):\n"
+            "    if name.startswith('spacy') or name == 'en_core_web_sm':\n"
+            "        raise metadata.PackageNotFoundError(name)\n"
+            "    return version(name)\n"
+            "metadata.version = without_spacy\n"
+            "import Model, main\n"
+            "cache = Model.configure_word_cache(path=os.path.join(tempfile.mkdtemp(), 'words.sqlite'))\n"
+            "print(Model.TextProcessor(None, None).stemmer([('running',)]), Model.normalizer_versions()['lemma'])\n"
+        )
+        output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True).stdout
+        self.assertEqual(output.split(), ["['run']", "spacy-missing|en_core_web_sm-missing"])
+
+if __name__ == '__main__':
+    unittest.main()
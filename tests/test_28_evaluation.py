@@ -0,0 +1,90 @@
+"""
+Authors: Erika García,
+Christian Parrish,
+Jorge Blanco
+"""
+
+import sys
+import os
+import tempfile
+import unittest
+import numpy as np
+from sklearn.metrics import roc_auc_score, roc_curve
+
+# This is to add the parent directory to the system path in order to access Evaluation.py
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from Evaluation import evaluate, load_labels, save_plots, threshold_metrics, threshold_sweep
+
+
+class TestEvaluation(unittest.TestCase):
+
+    def setUp(self):
+        generator = np.random.default_rng(0)
+        self.labels = generator.integers(0, 2, 200)
+        # Rounded so there are ties between the scores
+        self.scores = np.round(self.labels * 0.3 + generator.random(200), 2)
+
+    # The AUC is the same as scikit-learn's, also with ties
+    def test_auc_matches_sklearn(self):
+        report = evaluate(self.labels, self.scores)
+        self.assertAlmostEqual(report["auc"], roc_auc_score(self.labels, self.scores))
+
+    # The ROC curve has the same points as scikit-learn's (without the (0, 0) point it adds)
+    def test_roc_curve_matches_sklearn(self):
+        sweep = threshold_sweep(self.labels, self.scores)
+        fpr, tpr, thresholds = roc_curve(self.labels, self.scores, drop_intermediate=False)
+        np.testing.assert_allclose(sweep["false_positive_rate"], fpr[1:])
+        np.testing.assert_allclose(sweep["recall"], tpr[1:])
+        np.testing.assert_allclose(sweep["thresholds"], thresholds[1:])
+
+    # Every threshold of the sweep gives the same metrics as evaluating it alone
+    def test_sweep_matches_single_thresholds(self):
+        sweep = threshold_sweep(self.labels, self.scores)
+        for index in (0, 10, len(sweep["thresholds"]) - 1):
+            single = threshold_metrics(self.labels, self.scores, sweep["thresholds"][index])
+            for name in ("true_positives", "false_positives", "precision", "recall", "f1", "accuracy"):
+                self.assertAlmostEqual(sweep[name][index], single[name])
+
+    # With distances the small values are the positives, the AUC is the same as with -distance
+    def test_distances(self):
+        report = evaluate(self.labels, -self.scores, greater_is_positive=False)
+        self.assertAlmostEqual(report["auc"], roc_auc_score(self.labels, self.scores))
+        self.assertAlmostEqual(report["best_f1"]["thresholds"], -evaluate(self.labels, self.scores)["best_f1"]["thresholds"])
+
+    # The best thresholds separate perfectly separable scores
+    def test_best_threshold(self):
+        report = evaluate([0, 0, 1, 1], [0.1, 0.4, 0.6, 0.9], threshold=0.5)
+        self.assertEqual(report["auc"], 1.0)
+        self.assertEqual(report["best_f1"]["thresholds"], 0.6)
+        self.assertEqual(report["best_youden"]["thresholds"], 0.6)
+        self.assertEqual(report["at_threshold"]["accuracy"], 1.0)
+
+    # Without negatives the AUC isn't defined, but it doesn't fail
+    def test_single_class(self):
+        report = evaluate([1, 1, 1], [0.2, 0.5, 0.9])
+        self.assertTrue(np.isnan(report["auc"]))
+        self.assertEqual(report["best_f1"]["recall"], 1.0)
+
+    def test_load_labels(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "labels.csv")
+            with open(path, "w") as f:
+                f.write("file,label\nsuspicious/FID-001.txt,0\nFID-002.txt,1\n")
+            self.assertEqual(load_labels(path), {"FID-001.txt": 0, "FID-002.txt": 1})
+
+    # The labels of the repository are the ones the evaluation always used
+    def test_repository_manifest(self):
+        labels = load_labels(os.path.join(os.path.dirname(__file__), "..", "suspicious", "labels.csv"))
+        self.assertEqual(len(labels), 40)
+        self.assertEqual([labels[f"FID-{i:03d}.txt"] for i in range(1, 21)], [0, 0, 0, 0, 1, 0, 0, 0, 0, 1, 0, 0, 1, 1, 1, 1, 1, 1, 1, 1])
+
+    # The plots are only written to files
+    def test_save_plots(self):
+        with tempfile.TemporaryDirectory() as directory:
+            paths = save_plots(evaluate(self.labels, self.scores), directory)
+            self.assertEqual([os.path.basename(path) for path in paths], ["roc.png", "precision_recall.png"])
+            self.assertTrue(all(os.path.getsize(path) > 0 for path in paths))
+
+
+if __name__ == "__main__":
+    unittest.main()
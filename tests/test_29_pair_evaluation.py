@@ -0,0 +1,128 @@
+"""
+Authors: Erika García,
+Christian Parrish,
+Jorge Blanco
+"""
+
+import sys
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+import numpy as np
+import torch
+
+# This is to add the parent directory to the system path in order to access AUC.py
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from Cache import ScoreCache
+from Model import TextProcessor
+from NewModel import similarityCalculation
+import AUC
+
+
+class FakeCalculation:
+    # The embedding of a text counts the letters a, b and c
+    embedding_id = "fake"
+    chunk_aggregation = "max"
+    _document_scores = similarityCalculation._document_scores
+
+    def __init__(self):
+        self.embedded = []
+
+    def _read_file(self, path):
+        with open(path, encoding='utf-8') as file:
+            return file.read()
+
+    def _preprocess_text(self, text):
+        return text
+
+    def _document_embeddings(self, texts):
+        self.embedded.extend(texts)
+        return [torch.tensor([[float(text.count(letter)) for letter in "abc"]]) for text in texts]
+
+
+class TestPairEvaluation(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        texts = {"a.txt": "the cat eats fish", "b.txt": "the cat eats fish today", "c.txt": "dogs run fast"}
+        for name, text in texts.items():
+            with open(os.path.join(self.directory.name, name), "w", encoding="utf-8") as file:
+                file.write(text)
+        self.pairs_path = os.path.join(self.directory.name, "pairs.csv")
+        with open(self.pairs_path, "w", encoding="utf-8") as file:
+            file.write("file1,file2,label\na.txt,b.txt,1\na.txt,c.txt,0\nc.txt,b.txt,0\n")
+        self.pairs = AUC.load_pairs(self.pairs_path)
+        self.lemmatizer = patch.object(TextProcessor, "lemmatizer", TextProcessor.stemmer)
+        self.lemmatizer.start()
+
+    def tearDown(self):
+        self.lemmatizer.stop()
+        self.directory.cleanup()
+
+    # The paths of the pairs are relative to the pairs file
+    def test_load_pairs(self):
+        self.assertEqual(self.pairs[0], (os.path.join(self.directory.name, "a.txt"), os.path.join(self.directory.name, "b.txt"), 1))
+        self.assertEqual([label for *_, label in self.pairs], [1, 0, 0])
+
+    # The scores are the percentages of TextProcessor, without rounding
+    def test_lexical_scores(self):
+        scores = AUC.lexical_scores(self.pairs, ScoreCache())
+        expected = [TextProcessor(file1, file2).process()["Percentage of similarity"] for file1, file2, _ in self.pairs]
+        np.testing.assert_allclose(np.round(scores, 2), expected)
+
+    # The second time every pair comes from the cache, also from the SQLite file
+    def test_lexical_cache(self):
+        path = os.path.join(self.directory.name, "scores.sqlite")
+        cache = ScoreCache(path)
+        first = AUC.lexical_scores(self.pairs, cache)
+        cache.close()
+        cache = ScoreCache(path)
+        with patch.object(TextProcessor, "document_terms") as document_terms:
+            second = AUC.lexical_scores(self.pairs, cache)
+        cache.close()
+        document_terms.assert_not_called()
+        np.testing.assert_array_equal(first, second)
+
+    # A pair is scored again when one of its files changes, the key is the content so
+    # c.txt with the content of a.txt reuses the score of (a.txt, b.txt)
+    def test_changed_file(self):
+        cache = ScoreCache()
+        AUC.lexical_scores(self.pairs, cache)
+        with open(os.path.join(self.directory.name, "c.txt"), "w", encoding="utf-8") as file:
+            file.write("the cat eats fish")
+        scores = AUC.lexical_scores(self.pairs, cache)
+        self.assertEqual(len(cache), 4)
+        self.assertEqual(scores[2], scores[0])
+        self.assertAlmostEqual(scores[1], 100.0)
+
+    # Both metrics come from one embedding of every file, and only once
+    def test_transformer_scores(self):
+        calculation = FakeCalculation()
+        cache = ScoreCache()
+        scores = AUC.transformer_scores(calculation, self.pairs, cache)
+        self.assertEqual(len(calculation.embedded), 3)
+        a, b = np.array([2.0, 0.0, 1.0]), np.array([3.0, 0.0, 1.0])
+        self.assertAlmostEqual(scores["cosine"][0], a @ b / np.linalg.norm(a) / np.linalg.norm(b), places=5)
+        self.assertAlmostEqual(scores["euclidean"][0], 1.0, places=5)
+        again = AUC.transformer_scores(calculation, self.pairs, cache)
+        self.assertEqual(len(calculation.embedded), 3)
+        np.testing.assert_array_equal(again["cosine"], scores["cosine"])
+
+    # The configuration is part of the key, another pipeline doesn't reuse the scores
+    def test_config(self):
+        cache = ScoreCache()
+        cache.put_many("one", {("x", "y"): 0.5})
+        self.assertEqual(cache.get_many("one", [("x", "y")]), {("x", "y"): 0.5})
+        self.assertEqual(cache.get_many("two", [("x", "y")]), {})
+
+    # The thresholds are calibrated on the saved scores
+    def test_calibrate(self):
+        with patch("sys.stdout"):
+            report = AUC.calibrate("textprocessor", [1, 0, 0], AUC.lexical_scores(self.pairs, ScoreCache()), 50.1)
+        self.assertEqual(report["auc"], 1.0)
+        self.assertEqual(report["at_threshold"]["accuracy"], 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
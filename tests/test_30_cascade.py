@@ -0,0 +1,112 @@
+"""
+Authors: Erika García,
+Christian Parrish,
+Jorge Blanco
+"""
+
+import sys
+import os
+import unittest
+import numpy as np
+import torch
+
+# This is to add the parent directory to the system path in order to access Cascade.py
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from Cascade import LexicalPrefilter, cascade_stats, term_sets
+from Corpus import ReferenceCorpus
+from Model import binary_cosine
+from NewModel import similarityCalculation
+
+
+ORIGINALS = {
+    "cats.txt": "cat eat fish cat sleep",
+    "dogs.txt": "dog run park dog bark",
+    "birds.txt": "bird fly sky bird sing",
+    "fish.txt": "fish swim sea cat",
+}
+
+
+def make_calculation(prefilter=None, prefilter_k=2):
+    # similarityCalculation without the models, the embedding of a text counts some letters
+    calculation = similarityCalculation.__new__(similarityCalculation)
+    calculation.metric = 'cosine'
+    calculation.corpus = ReferenceCorpus(".", None)
+    calculation.embedding_id = "fake"
+    calculation.embedding_store = None
+    calculation.chunk_aggregation = 'max'
+    calculation.index_type = 'flat'
+    calculation.compression = None
+    calculation._reference_embeddings = {}
+    calculation._reference_names = []
+    calculation._reference_index = None
+    calculation.prefilter = LexicalPrefilter(prefilter) if prefilter else None
+    calculation.prefilter_k = prefilter_k
+    calculation.cascade_stats = cascade_stats()
+    calculation.embedded = []
+
+    def document_embeddings(texts):
+        calculation.embedded.extend(texts)
+        return [torch.tensor([[float(text.count(letter)) + 1 for letter in "abcdfgiklnoprsty"]]) for text in texts]
+    calculation._document_embeddings = document_embeddings
+    return calculation
+
+
+class TestCascade(unittest.TestCase):
+
+    # The term scores are the binary cosine of the term sets
+    def test_term_scores(self):
+        prefilter = LexicalPrefilter('terms')
+        prefilter.fit(list(ORIGINALS), term_sets(ORIGINALS.values()))
+        queries = ["cat eat fish", "dog bark unknown", ""]
+        scores = prefilter.scores(term_sets(queries))
+        for row, query in enumerate(queries):
+            for column, text in enumerate(ORIGINALS.values()):
+                self.assertAlmostEqual(scores[row, column], binary_cosine(set(query.split()), set(text.split())))
+
+    def test_shortlist(self):
+        prefilter = LexicalPrefilter('terms')
+        prefilter.fit(list(ORIGINALS), term_sets(ORIGINALS.values()))
+        self.assertEqual(prefilter.shortlist(term_sets(["cat fish swim"]), 2).tolist(), [[3, 0]])
+
+    # MinHash gives 1 to the same set of terms and shortlists it first
+    def test_minhash(self):
+        prefilter = LexicalPrefilter('minhash')
+        prefilter.fit(list(ORIGINALS), term_sets(ORIGINALS.values()))
+        scores = prefilter.scores(term_sets([ORIGINALS["dogs.txt"], ""]))
+        self.assertEqual(scores[0, 1], 1.0)
+        self.assertTrue((scores[1] == 0).all())
+        self.assertEqual(prefilter.shortlist(term_sets([ORIGINALS["birds.txt"]]), 1).tolist(), [[2]])
+
+    def test_unknown_method(self):
+        with self.assertRaises(ValueError):
+            LexicalPrefilter('bm25')
+
+    # Only the shortlisted originals are embedded, and they get the same scores as the full search
+    def test_cascade_search(self):
+        texts = ["cat eat fish", "bird sky sing"]
+        full = make_calculation().similaritySearch(texts, ORIGINALS, k=4)
+        cascade = make_calculation('terms', prefilter_k=1)
+        results = cascade.similaritySearch(texts, ORIGINALS, k=1)
+        self.assertEqual(sorted(cascade.embedded[:2]), sorted([ORIGINALS["cats.txt"], ORIGINALS["birds.txt"]]))
+        self.assertEqual(results[0]['cosine'][0][0], "cats.txt")
+        self.assertEqual(results[1]['cosine'][0][0], "birds.txt")
+        for result, expected in zip(results, full):
+            name, score = result['cosine'][0]
+            self.assertAlmostEqual(score, dict(expected['cosine'])[name], places=6)
+        self.assertEqual(cascade.cascade_stats['comparisons'], 2)
+        self.assertEqual(cascade.cascade_stats['full_comparisons'], 8)
+        self.assertEqual(cascade.cascade_stats['originals_embedded'], 2)
+
+    # With every original in the shortlist the cascade is the full search
+    def test_cascade_all_originals(self):
+        texts = ["cat eat fish", "dog run"]
+        full = make_calculation().similaritySearch(texts, ORIGINALS, k=4)
+        cascade = make_calculation('terms', prefilter_k=4).similaritySearch(texts, ORIGINALS, k=4)
+        for metric in ('cosine', 'euclidean'):
+            for result, expected in zip(cascade, full):
+                self.assertEqual([name for name, _ in result[metric]], [name for name, _ in expected[metric]])
+                np.testing.assert_allclose([score for _, score in result[metric]], [score for _, score in expected[metric]], rtol=1e-6)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+"""
+Authors: Erika García,
+Christian Parrish,
+Jorge Blanco
+"""
+
+import sys
+import os
+import glob
+import string
+import tempfile
+import unittest
+from nltk.tokenize import NLTKWordTokenizer
+
+# This is to add the parent directory to the system path in order to access Normalization.py
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from Normalization import CLEAN_FILE, Normalizer, new_model_normalizer, normalize_all, normalize_file, split_words
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+EDGE_CASES = [
+    "cannot …cannot wanna” gonna—go “quoted” wanna… tab\tseparated gimme lemme gotta",
+    "xcannot cannot2 wannabe wanna",
+    "CANNOT Wanna Gonna",
+    "‒a–b—c―d wanna—x «left» „low‘ ’right",
+    "",
+]
+
+
+def corpus_texts():
+    # Some files of every folder of the corpus
+    paths = []
+    for folder in ("originals", "suspicious", "documents"):
+        paths.extend(sorted(glob.glob(os.path.join(ROOT, folder, "*.txt")))[:15])
+    texts = []
+    for path in paths:
+        with open(path, encoding="utf-8") as file:
+            texts.append(file.read())
+    return texts
+
+
+def old_clean_file(text):
+    # TextProcessor.clean_file before the normalization engine
+    text = text.lower()
+    for char in ",.¿?¡!()@#$":
+        text = text.replace(char, '')
+    return ' '.join(text.split())
+
+
+def old_preprocess_text(text, stop_words, lemmatize):
+    # similarityCalculation._preprocess_text before the normalization engine (word_tokenize without punkt)
+    text = text.lower().translate(str.maketrans('', '', string.punctuation))
+    tokens = [token for token in NLTKWordTokenizer().tokenize(text) if token.isalpha() and token not in stop_words]
+    return ' '.join(lemmatize(token) for token in tokens)
+
+
+def lemmatize(word):
+    return word[:-1] if word.endswith("s") else word
+
+
+class TestNormalization(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.texts = corpus_texts() + EDGE_CASES
+
+    def test_clean_file_profile(self):
+        texts = self.texts + ["¡Hola! ¿Qué tal? (bien) @user #tag $5 1,000.5", "  espacios \n\t y  saltos  "]
+        for text in texts:
+            self.assertEqual(CLEAN_FILE.normalize(text), old_clean_file(text))
+
+    # The alphabetic words are the same as the ones of the tokenizer of NLTK
+    def test_split_words(self):
+        tokenizer = NLTKWordTokenizer()
+        for text in self.texts:
+            text = text.lower().translate(str.maketrans('', '', string.punctuation))
+            self.assertEqual([word for word in split_words(text) if word.isalpha()],
+                             [token for token in tokenizer.tokenize(text) if token.isalpha()])
+
+    def test_contractions(self):
+        self.assertEqual(split_words("cannot wanna”"), ["can", "not", "wan", "na"])
+        self.assertEqual(split_words("wannabe cannot2"), ["wannabe", "cannot2"])
+
+    def test_new_model_profile(self):
+        stop_words = {"the", "a", "of", "and", "to", "in", "not"}
+        normalizer = new_model_normalizer(stop_words, lemmatize)
+        for text in self.texts:
+            self.assertEqual(normalizer.normalize(text), old_preprocess_text(text, stop_words, lemmatize))
+
+    # Every distinct word is lemmatized only once
+    def test_memoized_lemmas(self):
+        calls = []
+
+        def counting(word):
+            calls.append(word)
+            return lemmatize(word)
+        normalizer = new_model_normalizer(set(), counting)
+        self.assertEqual(normalizer.normalize("cats cats dogs"), "cat cat dog")
+        self.assertEqual(normalizer.normalize("dogs and cats"), "dog and cat")
+        self.assertEqual(sorted(calls), ["and", "cats", "dogs"])
+
+    # Only the last lemma_cache_size lemmas are kept
+    def test_bounded_lemmas(self):
+        calls = []
+
+        def counting(word):
+            calls.append(word)
+            return lemmatize(word)
+        normalizer = Normalizer(tokenizer="words", lemmatize=counting, lemma_cache_size=2)
+        self.assertEqual(normalizer.normalize("cats dogs birds cats"), "cat dog bird cat")
+        self.assertEqual(normalizer.lemma.cache_info().currsize, 2)
+        self.assertEqual(calls, ["cats", "dogs", "birds", "cats"])
+
+    # One reading of the file feeds both profiles
+    def test_normalize_file(self):
+        normalizer = new_model_normalizer({"the"}, lemmatize)
+        text = "The cats, (the) dogs!"
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "text.txt")
+            with open(path, "w", encoding="utf-8") as file:
+                file.write(text)
+            results = normalize_file(path, [CLEAN_FILE, normalizer])
+        self.assertEqual(results, ["the cats the dogs", "cat dog"])
+        self.assertEqual(normalize_all(text, [CLEAN_FILE, normalizer]), results)
+
+    def test_invalid_tokenizer(self):
+        with self.assertRaises(ValueError):
+            Normalizer(tokenizer="spacy")
+
+
+if __name__ == "__main__":
+    unittest.main()
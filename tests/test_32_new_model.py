@@ -0,0 +1,276 @@
+"""
+Authors: Erika García,
+Christian Parrish,
+Jorge Blanco
+"""
+
+import sys
+import os
+import argparse
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+import numpy as np
+import torch
+
+# This is to add the parent directory to the system path in order to access NewModel.py
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import NewModel
+from NewModel import POOLING_ID, add_search_arguments, search_options, similarityCalculation
+from Server import create_parser
+from VectorIndex import FlatIndex
+from EmbeddingStore import EmbeddingStore
+from Normalization import new_model_normalizer
+
+
+WORDS = ["<pad>", "<s>", "</s>", "<unk>"] + (
+    "alpha bravo charlie delta echo foxtrot golf hotel india juliet kilo lima mike "
+    "november oscar papa quebec romeo sierra tango uniform victor whiskey xray yankee zulu"
+).split()
+
+ORIGINALS = {
+    "a.txt": "alpha bravo charlie delta",
+    "b.txt": "echo foxtrot golf hotel india juliet",
+    "c.txt": "alpha kilo lima",
+}
+
+
+def make_tokenizer(model_max_length=12):
+    # Fast tokenizer of one token per word that adds <s> and </s> like the one of RoBERTa
+    from tokenizers import Tokenizer, models, pre_tokenizers, processors
+    from transformers import PreTrainedTokenizerFast
+    tokenizer = Tokenizer(models.WordLevel({word: i for i, word in enumerate(WORDS)}, unk_token="<unk>"))
+    tokenizer.pre_tokenizer = pre_tokenizers.WhitespaceSplit()
+    tokenizer.post_processor = processors.TemplateProcessing(single="<s> $A </s>", special_tokens=[("<s>", 1), ("</s>", 2)])
+    return PreTrainedTokenizerFast(tokenizer_object=tokenizer, pad_token="<pad>", bos_token="<s>", eos_token="</s>",
+                                   unk_token="<unk>", model_max_length=model_max_length)
+
+
+class FakeModel(torch.nn.Module):
+    # The hidden state of every token is a fixed vector of its id, the padding is far from the rest
+    config = SimpleNamespace(hidden_size=6)
+
+    def __init__(self):
+        super().__init__()
+        generator = torch.Generator().manual_seed(3)
+        weights = torch.randn(len(WORDS), self.config.hidden_size, generator=generator)
+        weights[0] = 100.0
+        self.embedding = torch.nn.Embedding.from_pretrained(weights)
+        self.sequences = 0
+
+    def forward(self, input_ids, attention_mask=None):
+        self.sequences += len(input_ids)
+        return SimpleNamespace(last_hidden_state=self.embedding(input_ids))
+
+
+def make_calculation(documents_dir=".", **options):
+    # similarityCalculation with the fake tokenizer and model, without the NLTK resources
+    with patch.object(NewModel, "missing_nltk_resources", return_value=[]), \
+            patch("nltk.corpus.stopwords", new=SimpleNamespace(words=lambda language: ["the"])), \
+            patch("transformers.AutoTokenizer.from_pretrained", return_value=make_tokenizer()), \
+            patch("transformers.AutoModel.from_pretrained", return_value=FakeModel()):
+        calculation = similarityCalculation(documents_dir, 0.9, **options)
+    calculation.normalizer = new_model_normalizer(calculation.stop_words, lambda word: word)
+    return calculation
+
+
+class TestNewModel(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        for name, text in ORIGINALS.items():
+            self.write(name, text)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, name, text):
+        with open(os.path.join(self.directory.name, name), "w", encoding="utf-8") as file:
+            file.write(text)
+
+    # The originals are embedded once, only a changed file is embedded again
+    def test_reference_embeddings_cache(self):
+        calculation = make_calculation(self.directory.name)
+        model = calculation.model
+        calculation.similarityComparison("query.txt", "alpha bravo india", calculation.dataBaseProcessing())
+        self.assertEqual(model.sequences, len(ORIGINALS) + 1)
+
+        calculation.similarityComparison("query.txt", "alpha bravo india", calculation.dataBaseProcessing())
+        self.assertEqual(model.sequences, len(ORIGINALS) + 2)
+
+        self.write("b.txt", "echo foxtrot mike")
+        calculation.similarityComparison("query.txt", "alpha bravo india", calculation.dataBaseProcessing())
+        self.assertEqual(model.sequences, len(ORIGINALS) + 4)
+
+    # One matrix product gives the same best original and score as comparing every pair
+    def test_matrix_scores_same_as_pairs(self):
+        for metric in ("cosine", "euclidean"):
+            calculation = make_calculation(self.directory.name, metric=metric)
+            corpus = calculation.dataBaseProcessing()
+            for query in ("alpha bravo india", "foxtrot golf alpha", "kilo lima charlie delta"):
+                pair_scores = {}
+                for name, content in corpus.items():
+                    query_embedding = calculation._get_embedding(query)
+                    original_embedding = calculation._get_embedding(content)
+                    if metric == "cosine":
+                        pair_scores[name] = calculation._cosine_similarity(query_embedding, original_embedding)
+                    else:
+                        pair_scores[name] = calculation._euclidean_distance(query_embedding, original_embedding)
+                expected = max(pair_scores, key=pair_scores.get) if metric == "cosine" else min(pair_scores, key=pair_scores.get)
+                name, score = calculation.similarityComparison("query.txt", query, corpus)
+                self.assertEqual(name, expected)
+                self.assertAlmostEqual(score, pair_scores[expected], places=5)
+
+    # The padding tokens don't change the mean of the real tokens
+    def test_masked_pooling(self):
+        calculation = make_calculation(self.directory.name)
+        alone = calculation._get_embeddings(["alpha bravo"])[0]
+        padded = calculation._get_embeddings(["alpha bravo", "charlie delta echo foxtrot golf hotel"])[0]
+        ids = calculation.tokenizer("alpha bravo")["input_ids"]
+        expected = calculation.model.embedding.weight[ids].mean(dim=0)
+        torch.testing.assert_close(alone, expected)
+        torch.testing.assert_close(padded, expected)
+
+    # The batches of texts of similar length give the embeddings in the order of the texts
+    def test_length_buckets_keep_order(self):
+        calculation = make_calculation(self.directory.name)
+        texts = ["alpha bravo charlie delta echo", "kilo", "lima mike november", "alpha", "oscar papa quebec romeo", "sierra tango"]
+        bucketed = calculation._get_embeddings(texts, batch_size=2)
+        one_by_one = torch.stack([calculation._get_embeddings([text], batch_size=1)[0] for text in texts])
+        torch.testing.assert_close(bucketed, one_by_one)
+
+    # The saved embeddings of another pooling aren't used
+    def test_pooling_in_embedding_id(self):
+        store_dir = os.path.join(self.directory.name, "embeddings")
+        old_store = EmbeddingStore(store_dir, "roberta-base")
+        old_store.put("a.txt", "hash", np.ones(FakeModel.config.hidden_size))
+        old_store.save()
+        calculation = make_calculation(self.directory.name, embedding_store_dir=store_dir)
+        self.assertIn(POOLING_ID, calculation.embedding_id)
+        self.assertEqual(calculation.embedding_store.model_id, calculation.embedding_id)
+        self.assertEqual(len(calculation.embedding_store), 0)
+
+    # Windows of chunk_size words that start every chunk_stride words, the last one can be shorter
+    def test_chunk_windows(self):
+        calculation = make_calculation(self.directory.name, chunk_size=4, chunk_stride=2)
+        words = "alpha bravo charlie delta echo foxtrot golf".split()
+        chunks = calculation._document_embeddings([" ".join(words), "kilo lima"])
+        self.assertEqual([len(chunk) for chunk in chunks], [3, 1])
+        windows = [" ".join(words[0:4]), " ".join(words[2:6]), " ".join(words[4:7])]
+        torch.testing.assert_close(chunks[0], calculation._get_embeddings(windows))
+        torch.testing.assert_close(chunks[1], calculation._get_embeddings(["kilo lima"]))
+
+    # A text that fits in one window gives the same embedding as without windows
+    def test_chunk_short_text(self):
+        chunked = make_calculation(self.directory.name, chunk_size=4, chunk_stride=4)._document_embeddings(["alpha bravo charlie delta"])
+        whole = make_calculation(self.directory.name)._document_embeddings(["alpha bravo charlie delta"])
+        torch.testing.assert_close(chunked[0], whole[0])
+
+    def test_chunk_limits(self):
+        with self.assertRaises(ValueError):
+            make_calculation(self.directory.name, chunk_size=11)._document_embeddings(["alpha"])
+        with self.assertRaises(ValueError):
+            make_calculation(self.directory.name, chunk_size=4, chunk_stride=5)._document_embeddings(["alpha"])
+
+    # Every window of the text takes its best window of each original, then the max or the mean of the windows
+    def test_chunk_aggregation(self):
+        random = np.random.RandomState(1)
+        originals = [random.randn(2, 6).astype(np.float32), random.randn(3, 6).astype(np.float32)]
+        texts = [torch.from_numpy(random.randn(3, 6).astype(np.float32)), torch.from_numpy(random.randn(1, 6).astype(np.float32))]
+        index = FlatIndex(["a.txt", "b.txt"], np.concatenate(originals), [2, 3])
+        for aggregation in ("max", "mean"):
+            calculation = make_calculation(self.directory.name, chunk_aggregation=aggregation)
+            for metric in ("cosine", "euclidean"):
+                scores = calculation._document_scores(index, texts, metric)
+                for row, text in enumerate(text.numpy() for text in texts):
+                    for column, original in enumerate(originals):
+                        if metric == "cosine":
+                            unit_text = text / np.linalg.norm(text, axis=1, keepdims=True)
+                            unit_original = original / np.linalg.norm(original, axis=1, keepdims=True)
+                            windows = (unit_text @ unit_original.T).max(axis=1)
+                            expected = windows.max() if aggregation == "max" else windows.mean()
+                        else:
+                            windows = np.linalg.norm(text[:, None] - original[None], axis=2).min(axis=1)
+                            expected = windows.min() if aggregation == "max" else windows.mean()
+                        self.assertAlmostEqual(scores[row, column], expected, places=5)
+
+    # The saved IVF index only has the lists, the vectors come from the embedding store
+    def test_ivf_index_from_store(self):
+        store_dir = os.path.join(self.directory.name, "embeddings")
+        first = make_calculation(self.directory.name, embedding_store_dir=store_dir, index_type='ivf', ivf_lists=2, ivf_nprobe=2)
+        expected = first.similaritySearch(["alpha bravo india"], first.dataBaseProcessing(), k=3)
+        second = make_calculation(self.directory.name, embedding_store_dir=store_dir, index_type='ivf', ivf_lists=2, ivf_nprobe=2)
+        with patch.object(NewModel, "IVFIndex", wraps=NewModel.IVFIndex) as ivf_index:
+            ivf_index.load = NewModel.IVFIndex.load
+            found = second.similaritySearch(["alpha bravo india"], second.dataBaseProcessing(), k=3)
+        ivf_index.assert_not_called()
+        self.assertEqual(second.model.sequences, 1)
+        self.assertEqual(found, expected)
+
+    # With compression only the codes stay in memory, the full rows are read from the store's memmap
+    def test_compressed_index_memory(self):
+        store_dir = os.path.join(self.directory.name, "embeddings")
+        exact = make_calculation(self.directory.name)
+        expected = exact.similaritySearch(["alpha bravo india", "kilo lima"], exact.dataBaseProcessing(), k=3)
+        for method in ("int8", "pq"):
+            calculation = make_calculation(self.directory.name, embedding_store_dir=store_dir, compression=method, pq_subspaces=3)
+            found = calculation.similaritySearch(["alpha bravo india", "kilo lima"], calculation.dataBaseProcessing(), k=3)
+            for found_result, expected_result in zip(found, expected):
+                for metric in ("cosine", "euclidean"):
+                    self.assertEqual([name for name, _ in found_result[metric]], [name for name, _ in expected_result[metric]])
+                    np.testing.assert_allclose([score for _, score in found_result[metric]],
+                                               [score for _, score in expected_result[metric]], rtol=1e-5)
+            self.assertTrue(all(block is None for _, _, block in calculation._reference_embeddings.values()))
+            index = calculation._reference_index
+            self.assertIsInstance(index.full_embeddings, np.memmap)
+            in_memory = [value for value in vars(index).values() if isinstance(value, np.ndarray) and not isinstance(value, np.memmap)]
+            self.assertFalse([value for value in in_memory if value.dtype == np.float32 and value.ndim == 2])
+
+    def test_compression_needs_store(self):
+        with self.assertRaises(ValueError):
+            make_calculation(self.directory.name, compression="int8")
+
+    # evaluate_directory gives its workers to the preprocessing of the evaluated files
+    def test_evaluate_directory_workers(self):
+        evaluation_dir = os.path.join(self.directory.name, "suspicious")
+        os.mkdir(evaluation_dir)
+        for name, text in (("x.txt", "alpha bravo charlie"), ("y.txt", "mike oscar papa")):
+            with open(os.path.join(evaluation_dir, name), "w", encoding="utf-8") as file:
+                file.write(text)
+        with open(os.path.join(evaluation_dir, "labels.csv"), "w", encoding="utf-8") as file:
+            file.write("file,label\nx.txt,1\ny.txt,0\n")
+        calculation = make_calculation(self.directory.name)
+        serial = calculation._preprocess_texts
+        with patch("builtins.print"):
+            expected = calculation.evaluate_directory(evaluation_dir)
+            with patch.object(calculation, "_preprocess_texts", side_effect=lambda texts, workers: serial(texts)) as preprocess:
+                report = calculation.evaluate_directory(evaluation_dir, workers=2)
+        self.assertEqual(preprocess.call_args.args[1], 2)
+        self.assertEqual(report["most_similar"], expected["most_similar"])
+        np.testing.assert_array_equal(report["scores"], expected["scores"])
+
+    # The cascade is turned on from the command line options of the tools and of the server
+    def test_search_options(self):
+        parser = argparse.ArgumentParser()
+        add_search_arguments(parser)
+        args = parser.parse_args(["--prefilter", "minhash", "--prefilter-k", "2"])
+        calculation = make_calculation(self.directory.name, **search_options(args))
+        self.assertEqual(calculation.prefilter.method, "minhash")
+        self.assertEqual(calculation.prefilter_k, 2)
+        self.assertIsNone(make_calculation(self.directory.name, **search_options(parser.parse_args([]))).prefilter)
+        server_args = create_parser().parse_args(["serve", "--prefilter", "minhash", "--prefilter-k", "2"])
+        self.assertEqual(make_calculation(self.directory.name, **search_options(server_args)).prefilter.method, "minhash")
+
+    # The processes clean and lemmatize the texts like _preprocess_text, in the same order
+    @unittest.skipIf(NewModel.missing_nltk_resources(), "needs the NLTK resources")
+    def test_preprocess_texts_workers(self):
+        with patch("transformers.AutoTokenizer.from_pretrained", return_value=make_tokenizer()), \
+                patch("transformers.AutoModel.from_pretrained", return_value=FakeModel()):
+            calculation = similarityCalculation(self.directory.name, 0.9)
+        texts = ["The cats were running.", "", "Dogs and mice!", "alpha bravo charlie"] * 3
+        self.assertEqual(calculation._preprocess_texts(texts, workers=2), [calculation._preprocess_text(text) for text in texts])
+
+
+if __name__ == "__main__":
+    unittest.main()